@@ -1,37 +1,55 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, List
+import asyncio
+import json
+import logging
 import os
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-import io
 from app.core.config import settings
+from app.core.metrics import span
 # from app.db.session import get_db
-from app.services.cv_processor.processor import CVProcessor
-from app.services.llm.extractor import InformationExtractor
+from app.services.cv_processor.processor import CV_MIMETYPES, CVDocument, get_cv_processor
+from app.services.cv_processor.executor import ExtractionTimeout
+from app.services.cv_processor.spool import SpooledRequest, SpooledUpload, UploadRejected, spool_request
+from app.services.llm.extractor import get_information_extractor
+from app.services.storage.base import CVStorage
+from app.services.storage.factory import get_cv_storage
 from app.schemas.candidate import CandidateCreate
 from app.crud import candidate as candidate_crud
-from google.oauth2 import service_account
 from datetime import datetime
 import re
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-SCOPES = ['https://www.googleapis.com/auth/drive.file']
+def store_cv(storage: CVStorage, spool: SpooledUpload) -> str:
+    """Store a spooled CV with the given backend and return its file ID."""
+    with span("upload.store") as s:
+        s.add_bytes(spool.size)
+        mimetype = CV_MIMETYPES.get(os.path.splitext(spool.filename)[1].lower(), 'application/pdf')
+        return storage.save(spool.path, spool.filename, spool.sha256, mimetype)
 
-def get_google_drive_service():
-    """Get Google Drive service using a Service Account."""
-    SCOPES = ['https://www.googleapis.com/auth/drive']
-    SERVICE_ACCOUNT_FILE = settings.GOOGLE_DRIVE_CREDENTIALS_FILE
+def store_cv_deferred(storage: CVStorage, spool: SpooledUpload, candidate_id: int) -> None:
+    """Store a CV after its candidate was created, then link the stored file."""
+    try:
+        file_id = store_cv(storage, spool)
+        candidate_crud.update_cv_file_id(candidate_id, file_id)
+    except Exception as e:
+        logger.error(f"Deferred {storage.name} upload failed for candidate {candidate_id}: {str(e)}")
+    finally:
+        spool.cleanup()
 
-    credentials = service_account.Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE, scopes=SCOPES
-    )
-    return build('drive', 'v3', credentials=credentials)
+async def discard_stored_cv(storage: CVStorage, store_task: "asyncio.Task[str]") -> None:
+    """Wait for a storage task and remove what it stored, for an upload that failed afterwards."""
+    file_id = (await asyncio.gather(store_task, return_exceptions=True))[0]
+    if not file_id or isinstance(file_id, BaseException):
+        return
+    try:
+        await asyncio.to_thread(storage.discard, file_id)
+    except Exception as e:
+        logger.warning(f"Could not discard stored CV {file_id} of a failed upload: {str(e)}")
 
 def sanitize_dates(data):
     """
@@ -54,91 +72,169 @@ def sanitize_dates(data):
             sanitize_dates(item)
     return data
 
-@router.post("/upload", response_model=CandidateCreate)
-async def upload_cv(
-    file: UploadFile = File(...)
-):
+def check_extension(filename: str) -> None:
+    if os.path.splitext(filename)[1].lower() not in CV_MIMETYPES:
+        raise UploadRejected("Only PDF and DOCX files are supported")
+
+def multipart_body(field_name: str, multiple: bool = False) -> dict:
+    """OpenAPI request body of an upload endpoint, which reads its files from the raw request."""
+    schema = {"type": "string", "format": "binary"}
+    if multiple:
+        schema = {"type": "array", "items": schema}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": [field_name], "properties": {field_name: schema}
+    }}}}}
+
+async def spool_or_reject(
+    request: Request,
+    field_name: str,
+    max_files: int = 1,
+    keep_going: bool = False
+) -> SpooledRequest:
     """
-    Upload and process a CV file to Google Drive.
-    The file will be processed to extract information and create a candidate profile.
+    Stream the uploaded files to disk, rejecting the request as soon as it is too large.
+
+    The body is parsed here rather than by FastAPI, so an oversized upload is
+    refused before it has been received and each file is written to disk once.
     """
-    if not file.filename.endswith('.pdf'):
+    try:
+        with span("upload.spool") as s:
+            spooled = await spool_request(
+                request, field_name, max_files=max_files, check=check_extension, keep_going=keep_going
+            )
+            s.add_bytes(sum(spool.size for spool in spooled.files))
+    except UploadRejected as e:
         raise HTTPException(
             status_code=400,
-            detail="Only PDF files are supported"
+            detail=str(e)
         )
-    
+    if not spooled.files and not spooled.rejected:
+        spooled.cleanup()
+        raise HTTPException(
+            status_code=422,
+            detail=f"No file uploaded in the '{field_name}' field"
+        )
+    return spooled
+
+async def analyze_spool(spool: SpooledUpload) -> CVDocument:
+    """
+    Validate and extract the CV in one pass over the spooled file.
+
+    Raises:
+        HTTPException: If the file cannot be parsed, is invalid, or is a
+            scanned image, so nothing is spent on the LLM for it
+    """
+    processor = get_cv_processor()
     try:
-        # Read file content
-        content = await file.read()
-        if len(content) > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail="File size exceeds maximum allowed size"
-            )
+        with span("upload.extract"):
+            document = await processor.analyze_async(spool.path)
+    except ExtractionTimeout:
+        raise HTTPException(
+            status_code=422,
+            detail="CV took too long to parse"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error extracting text from CV: {str(e)}"
+        )
 
-        # Upload to Google Drive
-        drive_service = get_google_drive_service()
-        file_metadata = {
-            'name': file.filename,
-            'parents': [settings.GOOGLE_DRIVE_FOLDER_ID]
-        }
-        
-        media = MediaIoBaseUpload(
-            io.BytesIO(content),
-            mimetype='application/pdf',
-            resumable=True
+    # Route unusable files away before spending anything on the LLM
+    if not document.valid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid or corrupted CV file: {document.error}"
         )
-        
-        uploaded_file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
-        
-        file_id = uploaded_file.get('id')
-        
-        # Process the CV
-        processor = CVProcessor()
-        try:
-            cv_text = processor.extract_text(content)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error extracting text from CV: {str(e)}"
-            )
+    if document.is_scanned:
+        raise HTTPException(
+            status_code=422,
+            detail="CV appears to be a scanned image without a text layer"
+        )
+    return document
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/upload", response_model=CandidateCreate, openapi_extra=multipart_body("file"))
+async def upload_cv(
+    request: Request,
+    background_tasks: BackgroundTasks
+):
+    """
+    Upload and process a CV file to the configured CV storage.
+    The file will be processed to extract information and create a candidate profile.
+    """
+    spool = (await spool_or_reject(request, "file")).files[0]
+    return await process_upload(spool, background_tasks)
+
+async def process_upload(spool: SpooledUpload, background_tasks: BackgroundTasks):
+    """Create a candidate from a spooled CV; the spool is cleaned up, or handed to the deferred upload."""
+    storage = get_cv_storage()
+    deferred = False
+    store_task = None
+    candidate = None
+    try:
+        # The upload runs as a small dependency graph:
+        #                  ┌→ store ──────────────┐
+        #   extract text ──┴→ LLM → embeddings ───┴→ DB write
+        # Only files that pass validation are stored, and only the final write
+        # needs the stored file ID, so storage overlaps with the LLM branch.
+        document = await analyze_spool(spool)
+        cv_text = document.text
+        if not storage.deferred:
+            store_task = asyncio.create_task(asyncio.to_thread(store_cv, storage, spool))
         
         # Extract information using LLM
-        extractor = InformationExtractor()
+        extractor = get_information_extractor()
         try:
-            candidate_data = extractor.extract_information(cv_text)
+            with span("upload.llm"):
+                candidate_data = await asyncio.to_thread(
+                    extractor.extract_information, cv_text, document.sections
+                )
             # Sanitize dates in the extracted data
             candidate_data_dict = candidate_data.model_dump()
             candidate_data_dict = sanitize_dates(candidate_data_dict)
+            candidate_data = CandidateCreate(**candidate_data_dict)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error extracting information from CV: {str(e)}"
             )
         
-        # Add Google Drive file ID to candidate data
-        candidate_data_dict['cv_file_id'] = file_id
-        candidate_data = CandidateCreate(**candidate_data_dict)
-        
-        # Generate embeddings
+        # Generate embeddings as soon as extraction returns
         try:
-            embeddings = extractor.generate_embeddings(candidate_data, cv_text)
+            with span("upload.embed"):
+                embeddings = await asyncio.to_thread(extractor.generate_embeddings, candidate_data, cv_text)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error generating embeddings: {str(e)}"
             )
+
+        # The DB write is the only step that waits on the storage branch
+        file_id = None
+        if store_task is not None:
+            try:
+                file_id = await store_task
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Error storing CV file: {str(e)}"
+                )
+        candidate_data = candidate_data.model_copy(update={'cv_file_id': file_id})
         
         # Create candidate profile with embeddings
-        candidate = candidate_crud.create_candidate(
-            candidate_data=candidate_data,
-            embeddings=embeddings
-        )
+        with span("upload.db"):
+            candidate = await asyncio.to_thread(
+                candidate_crud.create_candidate,
+                candidate_data=candidate_data,
+                embeddings=embeddings
+            )
+
+        if storage.deferred:
+            background_tasks.add_task(store_cv_deferred, storage, spool, candidate['id'])
+            deferred = True
         
         return candidate
         
@@ -150,31 +246,153 @@ async def upload_cv(
             status_code=500,
             detail=f"Error processing CV: {str(e)}"
         )
+    finally:
+        if store_task is not None:
+            # The storage thread may still be reading the spooled file; let it finish first
+            if candidate is None:
+                await discard_stored_cv(storage, store_task)
+            else:
+                await asyncio.gather(store_task, return_exceptions=True)
+        if not deferred:
+            spool.cleanup()
 
-@router.post("/upload/batch", response_model=List[CandidateCreate])
+@router.post("/upload/stream", openapi_extra=multipart_body("file"))
+async def upload_cv_stream(
+    request: Request,
+    background_tasks: BackgroundTasks
+):
+    """
+    Upload and process a CV file, streaming progress as server-sent events.
+
+    Events:
+        section: {"section", "value", "item"} for each extracted field, or each
+            entry of a list field, as soon as the model has written it
+        candidate: the created candidate, once it is stored
+        error: {"detail"} if processing fails after the stream has started
+
+    Validation errors are returned as regular HTTP errors before streaming starts.
+    """
+    spool = (await spool_or_reject(request, "file")).files[0]
+    storage = get_cv_storage()
+    try:
+        document = await analyze_spool(spool)
+    except BaseException:
+        spool.cleanup()
+        raise
+    started = False
+
+    async def events():
+        nonlocal started
+        started = True
+        deferred = False
+        candidate = None
+        extractor = get_information_extractor()
+        skills_embedding_task = None
+        # Only files that pass validation are stored, and only once the stream runs,
+        # so the finally below always sees the task
+        store_task = None
+        try:
+            if not storage.deferred:
+                store_task = asyncio.create_task(asyncio.to_thread(store_cv, storage, spool))
+            candidate_data = None
+            with span("upload.llm"):
+                async for event in extractor.stream_information(document.text, document.sections):
+                    if isinstance(event, CandidateCreate):
+                        candidate_data = event
+                        continue
+                    if event.key == "skills" and not event.item and skills_embedding_task is None:
+                        # Warm the embedding cache while the model writes the remaining fields
+                        skills_embedding_task = asyncio.create_task(asyncio.to_thread(
+                            extractor.warm_skills_embedding, event.value or []
+                        ))
+                    yield sse_event("section", {"section": event.key, "value": event.value, "item": event.item})
+
+            if candidate_data is None:
+                raise ValueError("The extraction ended without a candidate")
+            candidate_data = CandidateCreate(**sanitize_dates(candidate_data.model_dump()))
+            with span("upload.embed"):
+                embeddings = await asyncio.to_thread(extractor.generate_embeddings, candidate_data, document.text)
+
+            file_id = await store_task if store_task is not None else None
+            candidate_data = candidate_data.model_copy(update={'cv_file_id': file_id})
+            with span("upload.db"):
+                candidate = await asyncio.to_thread(
+                    candidate_crud.create_candidate,
+                    candidate_data=candidate_data,
+                    embeddings=embeddings
+                )
+
+            if storage.deferred:
+                background_tasks.add_task(store_cv_deferred, storage, spool, candidate['id'])
+                deferred = True
+            yield sse_event("candidate", candidate)
+        except Exception as e:
+            logger.error(f"Error processing streamed CV upload: {str(e)}")
+            yield sse_event("error", {"detail": f"Error processing CV: {str(e)}"})
+        finally:
+            if skills_embedding_task is not None:
+                await asyncio.gather(skills_embedding_task, return_exceptions=True)
+            if store_task is not None:
+                if candidate is None:
+                    await discard_stored_cv(storage, store_task)
+                else:
+                    await asyncio.gather(store_task, return_exceptions=True)
+            if not deferred:
+                spool.cleanup()
+
+    def cleanup_unstarted():
+        # A client that disconnects before the first event never runs events()
+        if not started:
+            spool.cleanup()
+
+    # Background tasks run even after a disconnect
+    background_tasks.add_task(cleanup_unstarted)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+@router.post(
+    "/upload/batch",
+    response_model=List[CandidateCreate],
+    openapi_extra=multipart_body("files", multiple=True)
+)
 async def upload_multiple_cvs(
-    files: List[UploadFile] = File(...)
+    request: Request,
+    background_tasks: BackgroundTasks
 ):
     """
     Upload and process multiple CV files in batch.
     """
+    spooled = await spool_or_reject(
+        request, "files", max_files=settings.MAX_BATCH_UPLOAD_FILES, keep_going=True
+    )
     results = []
-    errors = []
+    errors = [{"filename": filename, "error": reason} for filename, reason in spooled.rejected]
     
-    for file in files:
-        try:
-            result = await upload_cv(file=file)
-            results.append(result)
-        except HTTPException as e:
-            errors.append({
-                "filename": file.filename,
-                "error": e.detail
-            })
-        except Exception as e:
-            errors.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
+    processed = 0
+    try:
+        for spool in spooled.files:
+            processed += 1
+            try:
+                result = await process_upload(spool, background_tasks)
+                results.append(result)
+            except HTTPException as e:
+                errors.append({
+                    "filename": spool.filename,
+                    "error": e.detail
+                })
+            except Exception as e:
+                errors.append({
+                    "filename": spool.filename,
+                    "error": str(e)
+                })
+    finally:
+        # Files not reached, e.g. when the client went away
+        for spool in spooled.files[processed:]:
+            spool.cleanup()
     
     # Always return both successful and failed uploads
     return {
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from typing import List, Optional
 from app.core.supabase import get_supabase_client
 from app.schemas.candidate import CandidateDetail
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 @router.get("/semantic", response_model=List[CandidateDetail])
 def semantic_search(
     query: str,
+    response: Response,
     min_experience_years: Optional[int] = Query(None, ge=0, description="Minimum years of experience required"),
     required_skills: Optional[List[str]] = Query(None, description="List of required skills"),
     location: Optional[str] = None,
@@ -29,6 +30,9 @@ def semantic_search(
     - **education_level**: Education level filter
     - **limit**: Maximum number of results to return
     - **offset**: Number of results to skip
+
+    When the embedding model is unavailable the results are ranked with the
+    fallback model and the response has an `X-Search-Degraded: true` header.
     """
     try:
         search_service = SearchService(supabase)
@@ -41,6 +45,8 @@ def semantic_search(
             limit=limit,
             offset=offset
         )
+        if search_service.degraded:
+            response.headers["X-Search-Degraded"] = "true"
         return results
     except Exception as e:
         logger.error(f"Error performing semantic search: {str(e)}")
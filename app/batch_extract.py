@@ -0,0 +1,177 @@
+"""
+Offline batch extraction of CVs through JSONL files.
+
+Usage:
+    python -m app.batch_extract prepare /path/to/cvs ./data/batch
+    python -m app.batch_extract submit ./data/batch
+    python -m app.batch_extract fetch ./data/batch
+    python -m app.batch_extract ingest ./data/batch
+
+``prepare`` parses and stores every CV and writes the chunk requests; the
+requests go through the OpenAI Batch API (``submit``/``fetch``) or, offline,
+through canned responses (``replay --responses canned.jsonl``); ``ingest``
+creates the candidates in bulk from the results.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from tqdm import tqdm
+from app.bulk_import import ImportItem, iter_items, materialize
+from app.services.cv_processor.executor import get_extraction_executor, shutdown_extraction_executor
+from app.services.cv_processor.processor import CV_MIMETYPES
+from app.services.llm.batch import (
+    REQUESTS_PATTERN,
+    BatchWriter,
+    BatchIngestor,
+    LocalBatchProcessor,
+    download_batch_results,
+    submit_batch,
+)
+from app.services.llm.gateway import BULK, priority, shutdown_llm_gateway
+from app.services.storage.base import sha256_file
+from app.services.storage.factory import get_cv_storage
+
+logger = logging.getLogger(__name__)
+
+BATCHES_FILE = "batches.json"
+
+
+def _results_path(requests_path: str) -> str:
+    directory, name = os.path.split(requests_path)
+    return os.path.join(directory, name.replace("requests-", "results-", 1))
+
+
+def prepare(source: str, directory: str, workers: int) -> None:
+    """Parse and store every CV under source, and write its chunk requests."""
+    executor = get_extraction_executor()
+    executor.start()
+    storage = get_cv_storage()
+    items = list(iter_items(source))
+
+    with BatchWriter(directory) as writer:
+        def add(item: ImportItem) -> None:
+            try:
+                with materialize(item) as path:
+                    # Skip what an earlier run already prepared, before parsing it again
+                    sha256 = sha256_file(path)
+                    if writer.known(item.key, sha256):
+                        return
+                    document = executor.analyze(path)
+                    if not document.valid or document.is_scanned:
+                        logger.warning(f"Skipping {item.key}: {document.error or 'scanned image'}")
+                        return
+                    filename = os.path.basename(item.key)
+                    file_id = storage.save(
+                        path, filename, sha256,
+                        CV_MIMETYPES.get(os.path.splitext(filename)[1].lower(), 'application/pdf')
+                    )
+                writer.add(item.key, document.text, document.sections, cv_file_id=file_id, sha256=sha256)
+            except Exception as e:
+                logger.error(f"Could not prepare {item.key}: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(tqdm(pool.map(add, items), total=len(items), unit="cv"))
+
+    logger.info(
+        f"Wrote {writer.requests_written} requests for {writer.documents_written} CVs to {directory}, "
+        f"{writer.documents_skipped} already prepared"
+    )
+
+
+def submit(directory: str) -> None:
+    """Start a Batch API job for every request file not submitted yet."""
+    batches_path = os.path.join(directory, BATCHES_FILE)
+    batches = {}
+    if os.path.exists(batches_path):
+        with open(batches_path, "r", encoding="utf-8") as f:
+            batches = json.load(f)
+    for requests_path in sorted(glob.glob(os.path.join(directory, REQUESTS_PATTERN))):
+        name = os.path.basename(requests_path)
+        if name in batches:
+            continue
+        batches[name] = submit_batch(requests_path)
+        logger.info(f"Submitted {name} as batch {batches[name]}")
+        with open(batches_path, "w", encoding="utf-8") as f:
+            json.dump(batches, f, indent=2)
+
+
+def fetch(directory: str) -> None:
+    """Download the results of every finished batch job."""
+    with open(os.path.join(directory, BATCHES_FILE), "r", encoding="utf-8") as f:
+        batches = json.load(f)
+    for name, batch_id in sorted(batches.items()):
+        results_path = _results_path(os.path.join(directory, name))
+        if os.path.exists(results_path):
+            continue
+        status = download_batch_results(batch_id, results_path)
+        logger.info(f"Batch {batch_id} ({name}): {status}")
+
+
+def replay(directory: str, responses: str) -> None:
+    """Answer every request file offline with canned responses."""
+    processor = LocalBatchProcessor.from_file(responses)
+    for requests_path in sorted(glob.glob(os.path.join(directory, REQUESTS_PATTERN))):
+        count = processor.process(requests_path, _results_path(requests_path))
+        logger.info(f"Replayed {count} responses for {os.path.basename(requests_path)}")
+
+
+def ingest(directory: str, batch_size: int) -> None:
+    """Create candidates in bulk from the available results."""
+    stats = BatchIngestor(directory, batch_size=batch_size).ingest()
+    logger.info(
+        f"Ingested {stats.succeeded} candidates, {stats.failed} failed, "
+        f"{stats.skipped} already ingested"
+    )
+    for key, error in sorted(stats.errors.items()):
+        logger.warning(f"{key}: {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline batch extraction of CVs through JSONL files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prepare_parser = commands.add_parser("prepare", help="Parse CVs and write chunk requests")
+    prepare_parser.add_argument("source", help="Directory or .zip archive of CVs")
+    prepare_parser.add_argument("directory", help="Batch working directory")
+    prepare_parser.add_argument("--workers", type=int, default=8, help="CVs parsed concurrently")
+
+    submit_parser = commands.add_parser("submit", help="Submit request files to the Batch API")
+    submit_parser.add_argument("directory")
+
+    fetch_parser = commands.add_parser("fetch", help="Download finished Batch API results")
+    fetch_parser.add_argument("directory")
+
+    replay_parser = commands.add_parser("replay", help="Answer requests offline with canned responses")
+    replay_parser.add_argument("directory")
+    replay_parser.add_argument("--responses", required=True, help="JSONL file of canned function call arguments")
+
+    ingest_parser = commands.add_parser("ingest", help="Create candidates from results")
+    ingest_parser.add_argument("directory")
+    ingest_parser.add_argument("--batch-size", type=int, default=50, help="Candidates written per bulk insert")
+
+    args = parser.parse_args(argv)
+    try:
+        # Embedding calls made while ingesting are paced by LLM_BULK_REQUESTS_PER_MINUTE
+        with priority(BULK):
+            if args.command == "prepare":
+                prepare(args.source, args.directory, args.workers)
+            elif args.command == "submit":
+                submit(args.directory)
+            elif args.command == "fetch":
+                fetch(args.directory)
+            elif args.command == "replay":
+                replay(args.directory, args.responses)
+            elif args.command == "ingest":
+                ingest(args.directory, args.batch_size)
+    finally:
+        shutdown_extraction_executor()
+        shutdown_llm_gateway()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
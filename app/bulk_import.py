@@ -0,0 +1,290 @@
+"""
+Resumable bulk import of CVs from a directory or a zip archive.
+
+Usage:
+    python -m app.bulk_import /path/to/cvs [--workers 8] [--manifest path]
+    python -m app.bulk_import archive.zip --retry-failed
+
+Every processed file is appended to a JSONL manifest. Re-running the same
+command skips files that were already imported, so an interrupted import
+resumes where it stopped. A file whose candidate was written just before a
+crash, but not yet recorded, is imported again on resume; candidates are
+keyed on the file's SHA-256, so this updates the same candidate rather than
+creating a duplicate.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set
+from tqdm import tqdm
+from app.core.config import settings
+from app.services.cv_processor.executor import get_extraction_executor, shutdown_extraction_executor
+from app.services.cv_processor.processor import CV_MIMETYPES
+from app.services.ingestion.pipeline import STAGES, CVIngestionPipeline, IngestionError
+from app.services.llm.gateway import BULK, priority, shutdown_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = set(CV_MIMETYPES)
+
+
+@dataclass
+class ImportItem:
+    """A CV to import, identified by its path relative to the source."""
+    key: str
+    source: str
+    in_archive: bool = False
+
+
+def iter_items(source: str) -> Iterator[ImportItem]:
+    """Yield every supported CV in a directory tree or zip archive, in a stable order."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = sorted(
+                info.filename for info in archive.infolist()
+                if not info.is_dir()
+                and os.path.splitext(info.filename)[1].lower() in SUPPORTED_EXTENSIONS
+            )
+        for name in names:
+            yield ImportItem(key=name, source=source, in_archive=True)
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                path = os.path.join(root, name)
+                yield ImportItem(key=os.path.relpath(path, source), source=source)
+
+
+@contextmanager
+def materialize(item: ImportItem) -> Iterator[str]:
+    """Yield a filesystem path for an item, streaming zip members to a temp file."""
+    if not item.in_archive:
+        yield os.path.join(item.source, item.key)
+        return
+
+    spool_dir = os.path.join(settings.UPLOAD_FOLDER, "tmp")
+    os.makedirs(spool_dir, exist_ok=True)
+    suffix = os.path.splitext(item.key)[1].lower()
+    with tempfile.NamedTemporaryFile(dir=spool_dir, suffix=suffix, delete=False) as tmp:
+        with zipfile.ZipFile(item.source) as archive, archive.open(item.key) as member:
+            shutil.copyfileobj(member, tmp, settings.UPLOAD_CHUNK_SIZE)
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+
+class Manifest:
+    """Append-only JSONL record of processed items."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def load(self) -> Dict[str, dict]:
+        """Return the latest entry for every key recorded so far."""
+        entries: Dict[str, dict] = {}
+        if not os.path.exists(self.path):
+            return entries
+        line = ""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves at most one truncated trailing line
+                    continue
+                entries[entry["key"]] = entry
+        if line and not line.endswith("\n"):
+            # Terminate the truncated line so the next append starts cleanly
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+        return entries
+
+    def append(self, entry: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ImportStats:
+    """Running throughput and per-stage latency figures."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.succeeded = 0
+        self.failed = 0
+        self.stage_timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.failures_by_stage: Dict[str, int] = {}
+
+    def record(self, timings: Dict[str, float], failed_stage: Optional[str] = None) -> None:
+        for stage, seconds in timings.items():
+            self.stage_timings.setdefault(stage, []).append(seconds)
+        if failed_stage:
+            self.failed += 1
+            self.failures_by_stage[failed_stage] = self.failures_by_stage.get(failed_stage, 0) + 1
+        else:
+            self.succeeded += 1
+
+    @property
+    def throughput(self) -> float:
+        """Completed CVs per minute."""
+        elapsed = time.perf_counter() - self.started
+        return (self.succeeded + self.failed) / elapsed * 60 if elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Imported {self.succeeded}, failed {self.failed}, "
+            f"{self.throughput:.1f} CVs/min"
+        ]
+        for stage, values in self.stage_timings.items():
+            if not values:
+                continue
+            p95 = statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+            lines.append(
+                f"  {stage:<8} n={len(values):<6} "
+                f"p50={statistics.median(values):.2f}s p95={p95:.2f}s"
+            )
+        if self.failures_by_stage:
+            lines.append(f"  failures by stage: {self.failures_by_stage}")
+        return "\n".join(lines)
+
+
+def import_item(pipeline: CVIngestionPipeline, item: ImportItem) -> dict:
+    """Run one item through the pipeline and build its manifest entry."""
+    entry = {"key": item.key, "finished_at": None}
+    try:
+        # Paced by LLM_BULK_REQUESTS_PER_MINUTE, the only limit shared with the API server's process
+        with priority(BULK), materialize(item) as path:
+            result = pipeline.ingest_file(path, filename=os.path.basename(item.key))
+        entry.update(
+            status="done",
+            candidate_id=result.candidate.get("id"),
+            timings=result.timings
+        )
+    except IngestionError as e:
+        entry.update(status="failed", stage=e.stage, error=str(e.error), timings=e.timings)
+    except Exception as e:
+        entry.update(status="failed", stage="read", error=str(e), timings={})
+    entry["finished_at"] = time.time()
+    return entry
+
+
+def run_import(
+    source: str,
+    manifest_path: str,
+    workers: int,
+    retry_failed: bool = False,
+    report_every: int = 100,
+    bypass_llm_cache: bool = False
+) -> ImportStats:
+    """
+    Import every CV under source, skipping items already in the manifest.
+
+    Args:
+        source: Directory or zip archive containing CVs
+        manifest_path: JSONL file used to checkpoint progress
+        workers: Number of CVs processed concurrently
+        retry_failed: Also re-process items that failed in a previous run
+        report_every: Log a latency summary after this many completions
+        bypass_llm_cache: Call the LLM even for chunks already in the response cache
+
+    Returns:
+        ImportStats: Figures for this run
+    """
+    manifest = Manifest(manifest_path)
+    previous = manifest.load()
+    skip: Set[str] = {
+        key for key, entry in previous.items()
+        if entry.get("status") == "done" or (entry.get("status") == "failed" and not retry_failed)
+    }
+    pending = [item for item in iter_items(source) if item.key not in skip]
+    logger.info(f"{len(skip)} items already in manifest, {len(pending)} to import")
+
+    # Spin up the parsing workers before the LLM threads start feeding them
+    get_extraction_executor().start()
+    pipeline = CVIngestionPipeline(bypass_llm_cache=bypass_llm_cache)
+    stats = ImportStats()
+    # Bound the number of queued futures so huge imports don't hold every item in memory
+    window = workers * 2
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            tqdm(total=len(pending), unit="cv") as progress:
+        items = iter(pending)
+        in_flight = set()
+        while True:
+            while len(in_flight) < window:
+                item = next(items, None)
+                if item is None:
+                    break
+                in_flight.add(pool.submit(import_item, pipeline, item))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = future.result()
+                manifest.append(entry)
+                stats.record(
+                    entry.get("timings", {}),
+                    failed_stage=entry.get("stage") if entry["status"] == "failed" else None
+                )
+                if entry["status"] == "failed":
+                    logger.warning(f"Failed to import {entry['key']} at {entry['stage']}: {entry['error']}")
+                progress.update(1)
+                progress.set_postfix(ok=stats.succeeded, failed=stats.failed, per_min=f"{stats.throughput:.1f}")
+                if (stats.succeeded + stats.failed) % report_every == 0:
+                    logger.info(stats.summary())
+
+    logger.info(stats.summary())
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import CVs from a directory or zip archive.")
+    parser.add_argument("source", help="Directory or .zip archive of CVs")
+    parser.add_argument(
+        "--manifest",
+        default=os.path.join(os.path.dirname(settings.UPLOAD_FOLDER.rstrip("/")), "bulk_import_manifest.jsonl"),
+        help="JSONL checkpoint file (default: next to the upload folder)"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="CVs processed concurrently")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-process items that failed before")
+    parser.add_argument("--report-every", type=int, default=100, help="Log stage latencies every N items")
+    parser.add_argument(
+        "--bypass-llm-cache", action="store_true",
+        help="Re-run LLM extraction for every CV instead of reusing cached results"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        run_import(
+            source=args.source,
+            manifest_path=args.manifest,
+            workers=args.workers,
+            retry_failed=args.retry_failed,
+            report_every=args.report_every,
+            bypass_llm_cache=args.bypass_llm_cache
+        )
+    finally:
+        shutdown_extraction_executor()
+        shutdown_llm_gateway()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
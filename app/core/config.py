@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_BATCH_UPLOAD_FILES: int = 20  # Files accepted by one batch upload request
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # CV files are copied and sent to storage 1MB at a time
     ALLOWED_EXTENSIONS: set = {"pdf", "doc", "docx"}
     
     # Application Settings
@@ -40,20 +42,54 @@ class Settings(BaseSettings):
     # LLM Settings
     LLM_PROVIDER: str = "openai"
     OPENAI_MODEL: str = "gpt-3.5-turbo"
-    EMBEDDING_MODEL: str = "text-embedding-ada-002"  # Updated to newer, faster model
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"  # Updated to newer, faster model; "local" for the offline model
+    EMBEDDING_FALLBACK_MODEL: Optional[str] = None  # e.g. "local": ranks search results when EMBEDDING_MODEL fails (degraded mode)
+    EMBEDDING_TRANSPORT: str = "json"  # Search reads vectors as "json", or packed "float32"/"float16" (pgvector >= 0.7) once app/db/sql is applied
+    LOCAL_EMBEDDING_MODEL_PATH: str = "./data/local_embedding.pkl"  # Built with python -m app.local_embeddings fit
+    LLM_MAX_OUTPUT_TOKENS: int = 2000  # Completion tokens reserved per extraction call
+    LLM_CHUNK_TOKEN_BUDGET: int = 6000  # Max CV tokens per extraction call; fewer chunks mean fewer calls
+    LLM_LITE_MAX_TOKENS: int = 1500  # Simple CVs up to this size only ask the LLM for experience and skills
+    LLM_CHUNK_CONCURRENCY: int = 4  # Chunks of one CV extracted at once
+    LLM_INITIAL_CONCURRENCY: int = 4  # Starting OpenAI concurrency; adapts to rate limits from there
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_BULK_SHARE: int = 4  # When interactive work is queued, bulk ingestion still gets 1 in N slots
+    LLM_BULK_REQUESTS_PER_MINUTE: int = 0  # Pace bulk CLI calls below the account limit to leave room for the API; 0 = unpaced
+    LLM_MAX_RETRIES: int = 6  # Attempts per OpenAI call on 429s, timeouts and 5xx errors
+    LLM_CACHE_ENABLED: bool = True  # Reuse extraction results for chunks seen before
+    LLM_CACHE_DIR: str = "./data/llm_cache"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Least recently used entries are evicted past this
+    LLM_WARMUP_PROBE: bool = True  # Open the OpenAI connection at startup so the first upload is not slow
+    EMBEDDING_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # In-memory vectors (float32), least recently used evicted
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # SQLite file to persist vectors across restarts; memory only when unset
+    EMBEDDING_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024  # Oldest persisted vectors are dropped past this
     
     # Legacy Mistral settings (will be removed in future)
     MISTRAL_API_KEY: Optional[str] = None
     MISTRAL_MODEL: Optional[str] = None
     
-    # Google Drive Settings
-    GOOGLE_DRIVE_CREDENTIALS_FILE: str
-    GOOGLE_DRIVE_FOLDER_ID: str
+    # Google Drive Settings (only required with the google_drive storage backend)
+    GOOGLE_DRIVE_CREDENTIALS_FILE: str = ""
+    GOOGLE_DRIVE_FOLDER_ID: str = ""
     GOOGLE_DRIVE_APPLICATION_NAME: str = "CV Analysis System"
+
+    # CV Storage Settings
+    CV_STORAGE_BACKEND: str = "google_drive"  # "google_drive" or "local"
+    CV_STORAGE_DEFERRED: bool = False  # Upload to Drive after the candidate is created
     
+    # Metrics Settings
+    METRICS_ENABLED: bool = True  # Expose stage histograms on /metrics
+    SERVER_TIMING_ENABLED: bool = False  # Attach stage timings as a Server-Timing header
+
     # File Upload Settings
     UPLOAD_FOLDER: str = "./data/uploads"
-    
+
+    # CV Extraction Worker Pool Settings
+    EXTRACTION_WORKERS: Optional[int] = None  # Defaults to the number of CPU cores
+    EXTRACTION_TIMEOUT: float = 30.0  # Seconds allowed to parse a single document
+    EXTRACTION_START_METHOD: str = "spawn"  # Avoid forking a threaded server process
+    PDF_MAX_PAGES: int = 30  # Stop reading a document after this many pages (0 = no limit)
+    PDF_MAX_CHARS: int = 60000  # Stop reading a document after this many characters (0 = no limit)
+
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
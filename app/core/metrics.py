@@ -0,0 +1,236 @@
+"""
+Lightweight in-process metrics for the ingestion pipeline.
+
+Stages are timed with ``span()`` and recorded into histograms, alongside
+counters for bytes, LLM tokens and retries. Everything is exposed in the
+Prometheus text format on ``/metrics`` and, when enabled, per request as a
+``Server-Timing`` header.
+
+Work that runs in the extraction process pool records into a capture list
+(``capture()``) that is sent back to the parent and applied with ``replay()``.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricEvent(NamedTuple):
+    """A single observation, used to ship metrics between processes."""
+    kind: str  # "observe" or "inc"
+    name: str
+    labels: Labels
+    value: float
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (bucket counts, sum, count)
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, labels: Labels = ()) -> None:
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{str(value)}"' for key, value in labels)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe collection of histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def counter(self, name: str, help: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help))
+
+    def apply(self, event: MetricEvent) -> None:
+        with self._lock:
+            metric = self._metrics.get(event.name)
+            if isinstance(metric, Histogram) and event.kind == "observe":
+                metric.observe(event.value, event.labels)
+            elif isinstance(metric, Counter) and event.kind == "inc":
+                metric.inc(event.value, event.labels)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            for metric in self._metrics.values():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "cv_stage_duration_seconds", "Duration of ingestion and search stages"
+)
+STAGE_BYTES = registry.counter("cv_stage_bytes_total", "Bytes processed per stage")
+LLM_TOKENS = registry.counter("llm_tokens_total", "LLM tokens used, by model and kind")
+STAGE_RETRIES = registry.counter("cv_stage_retries_total", "Retries per stage")
+CACHE_LOOKUPS = registry.counter("cache_lookups_total", "Cache lookups, by cache and result")
+
+# Events recorded while capturing, instead of going to the registry (worker processes)
+_captured: ContextVar[Optional[List[MetricEvent]]] = ContextVar("metrics_captured", default=None)
+# (stage, seconds) pairs for the Server-Timing header of the current request
+_server_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+
+def _emit(event: MetricEvent) -> None:
+    captured = _captured.get()
+    if captured is not None:
+        captured.append(event)
+        return
+    registry.apply(event)
+    if event.name == STAGE_DURATION.name:
+        timings = _server_timings.get()
+        if timings is not None:
+            timings.append((dict(event.labels)["stage"], event.value))
+
+
+class Span:
+    """Handle yielded by span() for attaching counts to the current stage."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.error = False
+
+    def add_bytes(self, count: int) -> None:
+        record_bytes(self.stage, count)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[Span]:
+    """
+    Time a pipeline stage.
+
+    Example:
+        with span("pdf.parse") as s:
+            s.add_bytes(len(data))
+            ...
+    """
+    current = Span(stage)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        status = "error" if current.error else "ok"
+        _emit(MetricEvent(
+            "observe",
+            STAGE_DURATION.name,
+            (("stage", stage), ("status", status)),
+            time.perf_counter() - start
+        ))
+
+
+def record_bytes(stage: str, count: int) -> None:
+    _emit(MetricEvent("inc", STAGE_BYTES.name, (("stage", stage),), count))
+
+
+def record_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    _emit(MetricEvent("inc", LLM_TOKENS.name, (("kind", "prompt"), ("model", model)), prompt_tokens))
+    _emit(MetricEvent("inc", LLM_TOKENS.name, (("kind", "completion"), ("model", model)), completion_tokens))
+
+
+def record_retry(stage: str) -> None:
+    _emit(MetricEvent("inc", STAGE_RETRIES.name, (("stage", stage),), 1))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    _emit(MetricEvent("inc", CACHE_LOOKUPS.name, (("cache", cache), ("result", "hit" if hit else "miss")), 1))
+
+
+@contextmanager
+def capture() -> Iterator[List[MetricEvent]]:
+    """Collect events in a list instead of recording them, e.g. inside a worker process."""
+    events: List[MetricEvent] = []
+    token = _captured.set(events)
+    try:
+        yield events
+    finally:
+        _captured.reset(token)
+
+
+def replay(events: List[MetricEvent]) -> None:
+    """Record events captured elsewhere into this process."""
+    for event in events:
+        _emit(event)
+
+
+@contextmanager
+def collect_server_timings() -> Iterator[List[Tuple[str, float]]]:
+    """Collect stage timings recorded while handling the current request."""
+    timings: List[Tuple[str, float]] = []
+    token = _server_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _server_timings.reset(token)
+
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Format timings for the Server-Timing header, summing repeated stages."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(
+        f"{stage.replace('.', '-')};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()
+    )
@@ -1,124 +1,101 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from app.schemas.candidate import CandidateCreate
 from app.core.supabase import get_supabase
-from datetime import datetime
+from app.core.metrics import span
+from app.crud.skill import link_skills
+from app.services.embeddings.transport import vector_literal
 import json
 
-def _serialize_datetimes(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Recursively serialize datetime objects to ISO 8601 strings."""
-    serialized_data = {}
-    for key, value in data.items():
-        if isinstance(value, datetime):
-            # Convert datetime to ISO 8601 string, handle potential timezone issues if necessary
-            serialized_data[key] = value.isoformat()
-        elif isinstance(value, dict):
-            serialized_data[key] = _serialize_datetimes(value)
-        elif isinstance(value, list):
-            serialized_data[key] = [_serialize_datetimes(item) if isinstance(item, (dict, list)) else item for item in value]
-        else:
-            serialized_data[key] = value
-    return serialized_data
+# Fields of CandidateCreate written to their own tables by write_candidates
+RELATED_FIELDS = ['education', 'work_experience', 'projects', 'certifications']
+
+def _candidate_payload(candidate_data: CandidateCreate, embeddings: Optional[dict] = None) -> Dict[str, Any]:
+    """One element of the write_candidates payload: the candidate row and its related rows."""
+    # JSON mode turns datetimes and URLs into strings
+    candidate_dict = candidate_data.model_dump(mode='json')
+    if embeddings:
+        candidate_dict.update({
+            "experience_embedding": vector_literal(embeddings.get('experience_embedding')),
+            "skills_embedding": vector_literal(embeddings.get('skills_embedding'))
+        })
+    payload = {field: candidate_dict.pop(field, None) or [] for field in RELATED_FIELDS}
+    payload['skills'] = candidate_dict.pop('skills', None) or []
+    payload['candidate'] = candidate_dict
+    return payload
+
+def _write_candidates(supabase, payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Write candidates and their related rows through the write_candidates function.
+
+    The function (app/db/sql/007_write_candidates.sql) runs as one
+    transaction, so a failed call writes nothing. A candidate whose cv_sha256
+    is already stored is updated and its related rows replaced, so re-importing
+    a file (a resumed or retried import) reuses its candidate.
+
+    Returns:
+        List[Dict[str, Any]]: The written candidate rows, in the order of payload
+    """
+    return supabase.rpc('write_candidates', {'payload': payload}).execute().data
 
 def create_candidate(candidate_data: CandidateCreate, embeddings: Optional[dict] = None) -> Dict[str, Any]:
-    """Create a new candidate with all related data using Supabase."""
+    """
+    Create a new candidate with all related data using Supabase.
+
+    Everything is written in one transaction. A candidate whose cv_sha256 is
+    already stored is updated and its related data replaced, so importing the
+    same file twice yields one candidate.
+    """
     supabase = get_supabase()
     
     try:
-        # Start a transaction (Supabase client doesn't have explicit transactions, 
-        # but we can structure inserts sequentially and handle errors)
-        candidate_dict = candidate_data.model_dump()
-        
-        # Add embeddings if provided
-        if embeddings:
-            candidate_dict.update({
-                "experience_embedding": embeddings.get('experience_embedding'),
-                "skills_embedding": embeddings.get('skills_embedding')
-            })
-        
-        # Remove all related table fields from main candidate dict since they are in separate tables
-        fields_to_remove = ['education', 'work_experience', 'skills', 'projects', 'certifications']
-        for field in fields_to_remove:
-            candidate_dict.pop(field, None)
-        
-        # Serialize datetimes in the main candidate dictionary
-        serialized_candidate_dict = _serialize_datetimes(candidate_dict)
-        
-        # Insert candidate
-        # Note: Supabase client insert execute() returns a PostgrestResponse object
-        # Use .model_dump_json() for more complex Pydantic models if needed, but simple dict should work
-        candidate_response = supabase.table('candidates').insert(serialized_candidate_dict).execute()
-        
-        if not candidate_response.data:
+        with span("db.candidates"):
+            candidates = _write_candidates(supabase, [_candidate_payload(candidate_data, embeddings)])
+        if not candidates:
             raise Exception("Failed to create candidate in main table")
+        return candidates[0]
         
-        candidate = candidate_response.data[0]
-        candidate_id = candidate['id']
-        
-        # Insert education entries
-        education_data = []
-        for edu in candidate_data.education:
-            edu_dict = edu.model_dump()
-            edu_dict['candidate_id'] = candidate_id
-            education_data.append(_serialize_datetimes(edu_dict))
-        if education_data:
-             supabase.table('education').insert(education_data).execute()
-        
-        # Insert work experience entries
-        work_experience_data = []
-        for exp in candidate_data.work_experience:
-            exp_dict = exp.model_dump()
-            exp_dict['candidate_id'] = candidate_id
-            work_experience_data.append(_serialize_datetimes(exp_dict))
-        if work_experience_data:
-            supabase.table('work_experience').insert(work_experience_data).execute()
-        
-        # Insert skills and create candidate_skills relationships
-        for skill_name in candidate_data.skills:
-            # First, get or create skill
-            skill_response = supabase.table('skills').select('id').eq('name', skill_name).execute()
-            skill_id = None
-            if skill_response.data:
-                skill_id = skill_response.data[0]['id']
-            else:
-                # Insert skill if it doesn't exist
-                insert_skill_response = supabase.table('skills').insert({'name': skill_name}).execute()
-                if insert_skill_response.data:
-                     skill_id = insert_skill_response.data[0]['id']
-
-            if skill_id:
-                # Create relationship, check if it already exists to avoid errors
-                relationship_response = supabase.table('candidate_skills').select('*').eq('candidate_id', candidate_id).eq('skill_id', skill_id).execute()
-                if not relationship_response.data:
-                     supabase.table('candidate_skills').insert({
-                        'candidate_id': candidate_id,
-                         'skill_id': skill_id
-                     }).execute()
+    except Exception as e:
+        raise Exception(f"Error creating candidate: {str(e)}")
 
-        
-        # Insert projects
-        projects_data = []
-        for proj in candidate_data.projects:
-            proj_dict = proj.model_dump()
-            proj_dict['candidate_id'] = candidate_id
-            projects_data.append(_serialize_datetimes(proj_dict))
-        if projects_data:
-            supabase.table('projects').insert(projects_data).execute()
-        
-        # Insert certifications
-        certifications_data = []
-        for cert in candidate_data.certifications:
-            cert_dict = cert.model_dump()
-            cert_dict['candidate_id'] = candidate_id
-            certifications_data.append(_serialize_datetimes(cert_dict))
-        if certifications_data:
-            supabase.table('certifications').insert(certifications_data).execute()
-        
-        # Get the complete candidate data
-        response = supabase.table('candidates').select('*').eq('id', candidate_id).execute()
-        return response.data[0]
+def create_candidates_bulk(
+    items: List[Tuple[CandidateCreate, Optional[dict]]]
+) -> List[Dict[str, Any]]:
+    """
+    Create many candidates with all related data in one request and one transaction.
+
+    Candidates are upserted on cv_sha256 and their related rows replaced, so
+    retrying a call, or writing a file imported before, updates the existing
+    candidates instead of duplicating them.
+
+    Args:
+        items: (candidate data, embeddings) pairs, at most one per cv_sha256
+
+    Returns:
+        List[Dict[str, Any]]: The created candidate rows, in the order of items
+    """
+    if not items:
+        return []
+    supabase = get_supabase()
+    
+    try:
+        with span("db.candidates"):
+            candidates = _write_candidates(supabase, [
+                _candidate_payload(candidate_data, embeddings) for candidate_data, embeddings in items
+            ])
+        if not candidates or len(candidates) != len(items):
+            raise Exception("Failed to create candidates in main table")
+        return candidates
         
     except Exception as e:
-        raise Exception(f"Error creating candidate: {str(e)}")
+        raise Exception(f"Error creating candidates in bulk: {str(e)}")
+
+def update_cv_file_id(candidate_id: int, cv_file_id: str) -> None:
+    """Record where a candidate's original CV file is stored."""
+    supabase = get_supabase()
+    try:
+        supabase.table('candidates').update({'cv_file_id': cv_file_id}).eq('id', candidate_id).execute()
+    except Exception as e:
+        raise Exception(f"Error updating CV file id: {str(e)}")
 
 def get_candidate(candidate_id: int) -> Optional[Dict[str, Any]]:
     """Get a candidate by ID."""
@@ -171,16 +148,7 @@ def update_candidate(
             exp_dict['candidate_id'] = candidate_id
             supabase.table('work_experience').insert(exp_dict).execute()
         
-        for skill_name in candidate_data.skills:
-            skill_response = supabase.table('skills').select('id').eq('name', skill_name).execute()
-            if not skill_response.data:
-                skill_response = supabase.table('skills').insert({'name': skill_name}).execute()
-            skill_id = skill_response.data[0]['id']
-            
-            supabase.table('candidate_skills').insert({
-                'candidate_id': candidate_id,
-                'skill_id': skill_id
-            }).execute()
+        link_skills(((candidate_id, skill_name) for skill_name in candidate_data.skills), supabase)
         
         for proj in candidate_data.projects:
             proj_dict = proj.model_dump()
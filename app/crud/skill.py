@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from supabase import Client
+from app.core.supabase import get_supabase
+
+# Skill ids by name. Skills are never deleted, so ids stay valid for the life of the process
+_skill_ids: Dict[str, int] = {}
+_skill_ids_lock = threading.Lock()
+
+def get_skill_ids(names: Iterable[str], supabase: Optional[Client] = None) -> Dict[str, int]:
+    """
+    Get the ids of skills by name, creating the missing ones.
+
+    Known names are answered from a process-local cache; the rest are
+    created or looked up in a single upsert on the unique skill name.
+
+    Args:
+        names: Skill names, duplicates and blanks allowed
+        supabase: Client to use, the shared one by default
+
+    Returns:
+        Dict[str, int]: Skill id for every non-blank name
+    """
+    unique = list(dict.fromkeys(name for name in names if name and name.strip()))
+    with _skill_ids_lock:
+        skill_ids = {name: _skill_ids[name] for name in unique if name in _skill_ids}
+    missing = [name for name in unique if name not in skill_ids]
+    if missing:
+        supabase = supabase or get_supabase()
+        # Merging on name returns existing rows as well as new ones
+        response = supabase.table('skills')\
+            .upsert([{'name': name} for name in missing], on_conflict='name')\
+            .execute()
+        fetched = {row['name']: row['id'] for row in response.data or []}
+        with _skill_ids_lock:
+            _skill_ids.update(fetched)
+        skill_ids.update(fetched)
+    return skill_ids
+
+def link_skills(links: Iterable[Tuple[int, str]], supabase: Optional[Client] = None) -> None:
+    """
+    Link candidates to skills by name in one request, ignoring existing links.
+
+    Each link records the position of the skill among its candidate's links,
+    so the skills can be read back in the order they were extracted in.
+
+    Args:
+        links: (candidate id, skill name) pairs, each candidate's skills in order
+        supabase: Client to use, the shared one by default
+    """
+    links = list(links)
+    if not links:
+        return
+    supabase = supabase or get_supabase()
+    skill_ids = get_skill_ids((skill_name for _, skill_name in links), supabase)
+    # Keyed by link, so a skill listed twice keeps its first position
+    positions: Dict[Tuple[int, int], int] = {}
+    counts: Dict[int, int] = {}
+    for candidate_id, skill_name in links:
+        position = counts.get(candidate_id, 0)
+        counts[candidate_id] = position + 1
+        if skill_name in skill_ids:
+            positions.setdefault((candidate_id, skill_ids[skill_name]), position)
+    rows: List[Dict[str, int]] = [
+        {'candidate_id': candidate_id, 'skill_id': skill_id, 'position': position}
+        for (candidate_id, skill_id), position in positions.items()
+    ]
+    if rows:
+        supabase.table('candidate_skills')\
+            .upsert(rows, on_conflict='candidate_id,skill_id', ignore_duplicates=True)\
+            .execute()
+
+def clear_skill_cache() -> None:
+    """Forget cached skill ids, e.g. after skills were changed outside this process."""
+    with _skill_ids_lock:
+        _skill_ids.clear()
@@ -1,4 +1,5 @@
 import logging
+import os
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.db.base_class import Base
@@ -8,6 +9,23 @@ from app.db.models import *  # noqa
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+
+def create_sql_functions() -> None:
+    """Create the SQL functions in app/db/sql, in file name order."""
+    for name in sorted(os.listdir(SQL_DIR)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(SQL_DIR, name), encoding="utf-8") as f:
+            statement = f.read()
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(statement))
+            logger.info(f"Applied {name}")
+        except Exception as e:
+            # The float16 transport needs pgvector >= 0.7; the others still work without it
+            logger.warning(f"Could not apply {name}: {e}")
+
 def init_db() -> None:
     try:
         # Enable pgvector extension
@@ -23,6 +41,9 @@ def init_db() -> None:
         # Create vector indexes
         create_vector_indexes()
         logger.info("Vector indexes created successfully")
+
+        # Create the functions serving packed embeddings
+        create_sql_functions()
         
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
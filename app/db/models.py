@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Table, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Table, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import ARRAY
 from pgvector.sqlalchemy import Vector
+from app.core.config import settings
 from app.db.base_class import Base
 
 # Association table for candidate skills
@@ -10,7 +11,9 @@ candidate_skills = Table(
     'candidate_skills',
     Base.metadata,
     Column('candidate_id', Integer, ForeignKey('candidates.id')),
-    Column('skill_id', Integer, ForeignKey('skills.id'))
+    Column('skill_id', Integer, ForeignKey('skills.id')),
+    Column('position', Integer, nullable=True),  # Order the skill was extracted in
+    UniqueConstraint('candidate_id', 'skill_id', name='uq_candidate_skills_candidate_skill')
 )
 
 class Candidate(Base):
@@ -18,7 +21,7 @@ class Candidate(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)  # Also set by trigger, see 005_candidates_updated_at_trigger.sql
     
     # Personal Information
     full_name = Column(String, index=True)
@@ -28,12 +31,13 @@ class Candidate(Base):
     
     # CV Information
     cv_file_id = Column(String, index=True)  # Google Drive file ID
+    cv_sha256 = Column(String, unique=True, index=True, nullable=True)  # Content hash, makes re-imports idempotent
     cv_text = Column(Text)  # Raw extracted text
     
     # Vector embeddings for semantic search
     # Using pgvector extension in Supabase
-    experience_embedding = Column(Vector(1536), nullable=True)  # OpenAI embedding dimension
-    skills_embedding = Column(Vector(1536), nullable=True)
+    experience_embedding = Column(Vector(settings.VECTOR_DIMENSION), nullable=True)  # Embedding model dimension
+    skills_embedding = Column(Vector(settings.VECTOR_DIMENSION), nullable=True)
     
     # Relationships
     education = relationship("Education", back_populates="candidate", cascade="all, delete-orphan")
@@ -77,7 +81,7 @@ class Skill(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     category = Column(String, nullable=True)  # e.g., "Programming", "Soft Skills"
-    embedding = Column(Vector(1536), nullable=True)  # For semantic skill matching
+    embedding = Column(Vector(settings.VECTOR_DIMENSION), nullable=True)  # For semantic skill matching
     
     candidates = relationship("Candidate", secondary=candidate_skills, back_populates="skills")
 
@@ -0,0 +1,14 @@
+-- Candidate embeddings as base64 of pgvector's binary format (vector_send):
+-- a 2-byte dimension, 2 unused bytes, then big-endian float32 values.
+-- About 8 KB per 1536-dimension vector instead of ~19 KB of JSON text.
+CREATE OR REPLACE FUNCTION candidate_embeddings_packed(candidate_ids integer[])
+RETURNS TABLE (id integer, experience_embedding text, skills_embedding text)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        c.id,
+        translate(encode(vector_send(c.experience_embedding), 'base64'), E'\n', ''),
+        translate(encode(vector_send(c.skills_embedding), 'base64'), E'\n', '')
+    FROM candidates c
+    WHERE c.id = ANY(candidate_ids)
+$$;
@@ -0,0 +1,13 @@
+-- Same as candidate_embeddings_packed with float16 values (halfvec_send),
+-- half the bytes again. Needs pgvector 0.7 or later.
+CREATE OR REPLACE FUNCTION candidate_embeddings_packed_half(candidate_ids integer[])
+RETURNS TABLE (id integer, experience_embedding text, skills_embedding text)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        c.id,
+        translate(encode(halfvec_send(c.experience_embedding::halfvec), 'base64'), E'\n', ''),
+        translate(encode(halfvec_send(c.skills_embedding::halfvec), 'base64'), E'\n', '')
+    FROM candidates c
+    WHERE c.id = ANY(candidate_ids)
+$$;
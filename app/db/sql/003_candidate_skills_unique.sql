@@ -0,0 +1,17 @@
+-- One link per candidate and skill, so links can be bulk upserted with
+-- on_conflict (candidate_id, skill_id). Existing duplicates are removed first.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_candidate_skills_candidate_skill'
+    ) THEN
+        DELETE FROM candidate_skills a
+        USING candidate_skills b
+        WHERE a.ctid > b.ctid
+          AND a.candidate_id = b.candidate_id
+          AND a.skill_id = b.skill_id;
+        ALTER TABLE candidate_skills
+            ADD CONSTRAINT uq_candidate_skills_candidate_skill UNIQUE (candidate_id, skill_id);
+    END IF;
+END
+$$;
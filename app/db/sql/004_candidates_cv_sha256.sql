@@ -0,0 +1,5 @@
+-- SHA-256 of the CV file a candidate was extracted from. Candidate writes
+-- upsert on it, so importing the same file again updates the existing
+-- candidate instead of creating a duplicate.
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS cv_sha256 VARCHAR;
+CREATE UNIQUE INDEX IF NOT EXISTS ix_candidates_cv_sha256 ON candidates (cv_sha256);
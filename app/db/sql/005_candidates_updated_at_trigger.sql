@@ -0,0 +1,38 @@
+-- Stamp candidates.updated_at on every write, including writes through
+-- Supabase that do not set it, and when the work experience or skills a
+-- candidate's embeddings are built from change. The re-embedding cutover
+-- uses it to catch up on candidates changed since its run started; its own
+-- writes set app.reembed so they do not mark the rows they embed.
+CREATE INDEX IF NOT EXISTS ix_candidates_updated_at ON candidates (updated_at);
+
+CREATE OR REPLACE FUNCTION candidates_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app.reembed', true) IS DISTINCT FROM 'on' THEN
+        NEW.updated_at = now();
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_candidates_updated_at ON candidates;
+CREATE TRIGGER trg_candidates_updated_at
+    BEFORE UPDATE ON candidates
+    FOR EACH ROW EXECUTE FUNCTION candidates_touch_updated_at();
+
+CREATE OR REPLACE FUNCTION candidates_touch_parent() RETURNS trigger AS $$
+BEGIN
+    UPDATE candidates SET updated_at = now()
+    WHERE id = (CASE WHEN TG_OP = 'DELETE' THEN OLD.candidate_id ELSE NEW.candidate_id END);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_work_experience_touch_candidate ON work_experience;
+CREATE TRIGGER trg_work_experience_touch_candidate
+    AFTER INSERT OR UPDATE OR DELETE ON work_experience
+    FOR EACH ROW EXECUTE FUNCTION candidates_touch_parent();
+
+DROP TRIGGER IF EXISTS trg_candidate_skills_touch_candidate ON candidate_skills;
+CREATE TRIGGER trg_candidate_skills_touch_candidate
+    AFTER INSERT OR UPDATE OR DELETE ON candidate_skills
+    FOR EACH ROW EXECUTE FUNCTION candidates_touch_parent();
@@ -0,0 +1,13 @@
+-- Position of a skill among its candidate's skills, in extraction order.
+-- link_skills sets it; re-embedding orders by it to rebuild the skills text
+-- exactly as at upload time. Existing links are numbered in physical row
+-- order, the best record of their insertion order left.
+ALTER TABLE candidate_skills ADD COLUMN IF NOT EXISTS position INTEGER;
+
+UPDATE candidate_skills cs
+SET position = numbered.position
+FROM (
+    SELECT ctid, ROW_NUMBER() OVER (PARTITION BY candidate_id ORDER BY ctid) - 1 AS position
+    FROM candidate_skills
+) AS numbered
+WHERE cs.ctid = numbered.ctid AND cs.position IS NULL;
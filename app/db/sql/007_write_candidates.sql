@@ -0,0 +1,64 @@
+-- Write candidates with all their related rows in one transaction (PostgREST
+-- runs each RPC call in its own), so an interrupted import never leaves a
+-- candidate without its experience or skills. A candidate whose cv_sha256 is
+-- already stored is updated in place and its related rows replaced.
+--
+-- payload is an array of
+--   {"candidate": {...}, "education": [...], "work_experience": [...],
+--    "projects": [...], "certifications": [...], "skills": ["name", ...]}
+-- Related entries get their candidate_id here; skills are created if missing
+-- and linked with their position in the list. Returns the written candidates
+-- in payload order.
+CREATE OR REPLACE FUNCTION write_candidates(payload jsonb)
+RETURNS SETOF candidates
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item jsonb;
+    written candidates;
+    related_table text;
+    entries jsonb;
+    column_list text;
+    excluded_list text;
+BEGIN
+    FOR item IN SELECT value FROM jsonb_array_elements(payload) LOOP
+        SELECT string_agg(quote_ident(key), ', '), string_agg('EXCLUDED.' || quote_ident(key), ', ')
+        INTO column_list, excluded_list
+        FROM jsonb_object_keys(item->'candidate') AS key;
+        EXECUTE format(
+            'INSERT INTO candidates (%1$s) SELECT %1$s FROM jsonb_populate_record(NULL::candidates, $1) '
+            || 'ON CONFLICT (cv_sha256) DO UPDATE SET (%1$s) = ROW(%2$s) RETURNING *',
+            column_list, excluded_list
+        ) INTO written USING item->'candidate';
+
+        FOREACH related_table IN ARRAY ARRAY['education', 'work_experience', 'projects', 'certifications'] LOOP
+            EXECUTE format('DELETE FROM %I WHERE candidate_id = $1', related_table) USING written.id;
+            SELECT jsonb_agg(entry || jsonb_build_object('candidate_id', written.id))
+            INTO entries
+            FROM jsonb_array_elements(item->related_table) AS entry;
+            CONTINUE WHEN entries IS NULL;
+            SELECT string_agg(quote_ident(key), ', ') INTO column_list
+            FROM jsonb_object_keys(entries->0) AS key;
+            EXECUTE format(
+                'INSERT INTO %1$I (%2$s) SELECT %2$s FROM jsonb_populate_recordset(NULL::%1$I, $1)',
+                related_table, column_list
+            ) USING entries;
+        END LOOP;
+
+        DELETE FROM candidate_skills WHERE candidate_id = written.id;
+        INSERT INTO skills (name)
+        SELECT DISTINCT skill.name
+        FROM jsonb_array_elements_text(item->'skills') AS skill(name)
+        WHERE btrim(skill.name) <> ''
+        ON CONFLICT (name) DO NOTHING;
+        -- A skill listed twice keeps its first position, as in link_skills
+        INSERT INTO candidate_skills (candidate_id, skill_id, position)
+        SELECT written.id, s.id, MIN(skill.ordinality) - 1
+        FROM jsonb_array_elements_text(item->'skills') WITH ORDINALITY AS skill(name, ordinality)
+        JOIN skills s ON s.name = skill.name
+        GROUP BY s.id;
+
+        RETURN NEXT written;
+    END LOOP;
+END
+$$;
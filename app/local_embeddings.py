@@ -0,0 +1,81 @@
+"""
+Build the network-free local embedding model from stored CV texts.
+
+Usage:
+    python -m app.local_embeddings fit [--output ./data/local_embedding.pkl] [--components 256]
+    python -m app.local_embeddings fit --from-dir /path/to/cvs
+
+Then set EMBEDDING_MODEL=local (or EMBEDDING_FALLBACK_MODEL=local for a search-only
+degraded mode when OpenAI is unavailable). Switching an existing database
+to the local model needs a re-embed (python -m app.reembed) like any other
+model change.
+"""
+import argparse
+import logging
+import time
+from typing import Iterator, List, Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.services.embeddings.factory import get_embedding_provider
+from app.services.embeddings.local import fit_local_model
+
+logger = logging.getLogger(__name__)
+
+
+def iter_database_texts(limit: Optional[int] = None) -> Iterator[str]:
+    """Yield the cv_text of stored candidates, streaming from the database."""
+    from app.db.session import engine
+
+    query = "SELECT cv_text FROM candidates WHERE cv_text IS NOT NULL ORDER BY id"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for (cv_text,) in conn.execute(text(query)):
+            yield cv_text
+
+
+def iter_directory_texts(source: str, limit: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of the CVs in a directory or zip archive."""
+    from app.bulk_import import iter_items, materialize
+    from app.services.cv_processor.processor import get_cv_processor
+
+    processor = get_cv_processor()
+    for count, item in enumerate(iter_items(source)):
+        if limit and count >= limit:
+            return
+        with materialize(item) as path:
+            document = processor.analyze(path)
+        if document.valid:
+            yield document.text
+
+
+def fit(output: str, components: int, source: Optional[str], limit: Optional[int]) -> None:
+    texts = iter_directory_texts(source, limit) if source else iter_database_texts(limit)
+    kept = fit_local_model(texts, output, components)
+
+    # Report the speed the API will see for a typical query
+    provider = get_embedding_provider(f"local:{output}")
+    started = time.perf_counter()
+    provider.embed(["Senior Python developer with Django and PostgreSQL experience"])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Saved {provider.model_id} ({kept} components) to {output}; one query embeds in {elapsed_ms:.2f} ms")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the local embedding model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fit_parser = commands.add_parser("fit", help="Fit the model on CV texts and save it")
+    fit_parser.add_argument("--output", default=settings.LOCAL_EMBEDDING_MODEL_PATH)
+    fit_parser.add_argument("--components", type=int, default=256, help="Dense dimensions before padding")
+    fit_parser.add_argument("--from-dir", dest="source", help="Fit on a directory or .zip of CVs instead of the database")
+    fit_parser.add_argument("--limit", type=int, help="Use at most this many documents")
+
+    args = parser.parse_args(argv)
+    if args.command == "fit":
+        fit(args.output, args.components, args.source, args.limit)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,7 +1,45 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.services.cv_processor.executor import (
+    get_extraction_executor,
+    shutdown_extraction_executor
+)
+from app.services.cv_processor.processor import get_cv_processor
+from app.services.embeddings.factory import get_fallback_embedding_provider
+from app.services.llm.extractor import get_information_extractor
+from app.services.llm.gateway import shutdown_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn and warm the PDF extraction workers before serving requests
+    await asyncio.to_thread(get_extraction_executor().start)
+    # Build the shared processor, extractor and OpenAI client once per worker,
+    # and warm them so the first upload does not pay for it
+    get_cv_processor()
+    extractor = await asyncio.to_thread(get_information_extractor)
+    ready = await asyncio.to_thread(extractor.warm_up, settings.LLM_WARMUP_PROBE)
+    if not ready:
+        logger.warning("Starting without a working OpenAI connection; uploads will fail until it recovers")
+    # Load the fallback embedding model now, rather than when OpenAI first fails
+    try:
+        await asyncio.to_thread(get_fallback_embedding_provider)
+    except FileNotFoundError as e:
+        raise RuntimeError(
+            f"EMBEDDING_FALLBACK_MODEL={settings.EMBEDDING_FALLBACK_MODEL} cannot be loaded ({str(e)}); "
+            "fit it with python -m app.local_embeddings fit or unset EMBEDDING_FALLBACK_MODEL"
+        ) from e
+    yield
+    await asyncio.to_thread(shutdown_extraction_executor)
+    await asyncio.to_thread(shutdown_llm_gateway)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -9,6 +47,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Set up CORS middleware
@@ -20,6 +59,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.SERVER_TIMING_ENABLED:
+    @app.middleware("http")
+    async def add_server_timing(request: Request, call_next):
+        # Stage spans recorded while handling the request end up in this list
+        with metrics.collect_server_timings() as timings:
+            response = await call_next(request)
+        if timings:
+            response.headers["Server-Timing"] = metrics.format_server_timing(timings)
+        return response
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -31,6 +80,14 @@ async def root():
         "redoc_url": "/redoc"
     }
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        return PlainTextResponse(
+            metrics.registry.render(),
+            media_type="text/plain; version=0.0.4"
+        )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
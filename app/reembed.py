@@ -0,0 +1,394 @@
+"""
+Re-embed every candidate after a change of embedding model or embedding text.
+
+Usage:
+    python -m app.reembed prepare --dimension 1536
+    python -m app.reembed run --model text-embedding-3-small
+    python -m app.reembed index
+    python -m app.reembed cutover
+    python -m app.reembed drop-old          # once the new vectors are confirmed
+
+New vectors are written to shadow columns (experience_embedding_next,
+skills_embedding_next) while search keeps using the current ones. ``run``
+pages through candidates by id, embeds a whole page with a few multi-input
+requests, writes it back with one UPDATE ... FROM (VALUES ...) and records
+the last id in a checkpoint file, so an interrupted run resumes where it
+stopped. ``cutover`` catches up on candidates created or updated since the run
+started (updated_at is stamped by the trigger in
+app/db/sql/005_candidates_updated_at_trigger.sql), then swaps the columns and
+their indexes in one transaction; ``rollback`` swaps them back.
+Set EMBEDDING_MODEL to the new model when restarting the API after cutover.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from tqdm import tqdm
+from app.core.config import settings
+from app.db.session import engine
+from app.services.llm.extractor import get_information_extractor
+from app.services.embeddings.factory import get_embedding_provider
+from app.services.embeddings.transport import vector_literal
+from app.services.llm.gateway import BULK, priority, shutdown_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_COLUMNS = ("experience_embedding", "skills_embedding")
+INDEX_NAMES = {
+    "experience_embedding": "idx_candidate_experience_embedding",
+    "skills_embedding": "idx_candidate_skills_embedding",
+}
+DEFAULT_CHECKPOINT = "./data/reembed_checkpoint.json"
+# Updates in transactions that began shortly before the run started are caught up too
+CATCH_UP_MARGIN_SECONDS = 300
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of a re-embedding run, saved after every committed page.
+
+    started_at is the database clock (epoch seconds) when the run started.
+    """
+    model: str
+    last_id: int = 0
+    processed: int = 0
+    started_at: float = 0.0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+def fetch_page(conn: Connection, after_id: int, limit: int) -> List[int]:
+    """Candidate ids after after_id, in id order (keyset pagination)."""
+    rows = conn.execute(
+        text("SELECT id FROM candidates WHERE id > :after ORDER BY id LIMIT :limit"),
+        {"after": after_id, "limit": limit}
+    )
+    return [row[0] for row in rows]
+
+
+def fetch_changed_page(conn: Connection, checkpoint: Checkpoint, after_id: int, limit: int) -> List[int]:
+    """Ids after after_id of candidates the run has not embedded, or that changed since it started."""
+    rows = conn.execute(
+        text(
+            "SELECT id FROM candidates WHERE id > :after "
+            "AND (id > :last_id OR updated_at >= to_timestamp(:since)) "
+            "ORDER BY id LIMIT :limit"
+        ),
+        {
+            "after": after_id,
+            "last_id": checkpoint.last_id,
+            "since": checkpoint.started_at - CATCH_UP_MARGIN_SECONDS,
+            "limit": limit
+        }
+    )
+    return [row[0] for row in rows]
+
+
+def embedding_texts(conn: Connection, ids: List[int]) -> Dict[int, Tuple[str, str]]:
+    """
+    Build the experience and skills texts of each candidate, as at upload time.
+
+    Skills come back in candidate_skills.position order, the order they were
+    extracted in, so the top 20 cut keeps the same skills as at upload time.
+    """
+    extractor = get_information_extractor()
+    experiences: Dict[int, List[dict]] = {candidate_id: [] for candidate_id in ids}
+    skills: Dict[int, List[str]] = {candidate_id: [] for candidate_id in ids}
+
+    rows = conn.execute(
+        text(
+            "SELECT candidate_id, position, company, description, start_date "
+            "FROM work_experience WHERE candidate_id = ANY(:ids)"
+        ),
+        {"ids": ids}
+    )
+    for row in rows.mappings():
+        experiences[row["candidate_id"]].append(dict(row))
+
+    rows = conn.execute(
+        text(
+            "SELECT cs.candidate_id, s.name FROM candidate_skills cs "
+            "JOIN skills s ON s.id = cs.skill_id "
+            "WHERE cs.candidate_id = ANY(:ids) ORDER BY cs.candidate_id, cs.position, cs.skill_id"
+        ),
+        {"ids": ids}
+    )
+    for candidate_id, name in rows:
+        skills[candidate_id].append(name)
+
+    return {
+        candidate_id: (
+            " ".join(extractor.experience_text(experiences[candidate_id]).split()),
+            " ".join(extractor.skills_text(skills[candidate_id]).split()),
+        )
+        for candidate_id in ids
+    }
+
+
+def embed_texts(
+    texts: List[str],
+    model: str,
+    texts_per_request: int,
+    pool: ThreadPoolExecutor
+) -> List[Optional[List[float]]]:
+    """Embed texts with multi-input requests sent concurrently; empty texts get None."""
+    unique = list(dict.fromkeys(t for t in texts if t))
+    batches = [unique[i:i + texts_per_request] for i in range(0, len(unique), texts_per_request)]
+    provider = get_embedding_provider(model)
+    # Each request runs in a copy of this context, so it keeps the bulk priority
+    futures = [pool.submit(contextvars.copy_context().run, provider.embed, batch) for batch in batches]
+    vectors: Dict[str, List[float]] = {}
+    for batch, future in zip(batches, futures):
+        vectors.update(zip(batch, future.result()))
+    return [vectors.get(t) if t else None for t in texts]
+
+
+def write_page(conn: Connection, rows: List[Tuple[int, Optional[str], Optional[str]]]) -> None:
+    """Write a page of vectors to the shadow columns with a single UPDATE."""
+    # Keeps the updated_at trigger from marking the rows as changed
+    conn.execute(text("SET LOCAL app.reembed = 'on'"))
+    values = ", ".join(f"(:id{i}, :e{i}, :s{i})" for i in range(len(rows)))
+    params = {}
+    for i, (candidate_id, experience, skills) in enumerate(rows):
+        params[f"id{i}"] = candidate_id
+        params[f"e{i}"] = experience
+        params[f"s{i}"] = skills
+    conn.execute(
+        text(
+            "UPDATE candidates AS c SET "
+            "experience_embedding_next = CAST(v.experience AS vector), "
+            "skills_embedding_next = CAST(v.skills AS vector) "
+            f"FROM (VALUES {values}) AS v(id, experience, skills) "
+            "WHERE c.id = CAST(v.id AS integer)"
+        ),
+        params
+    )
+
+
+def reembed_ids(
+    conn: Connection,
+    ids: List[int],
+    model: str,
+    dimension: Optional[int],
+    texts_per_request: int,
+    pool: ThreadPoolExecutor
+) -> None:
+    """Embed a set of candidates and write their vectors to the shadow columns."""
+    texts = embedding_texts(conn, ids)
+    flat = [t for candidate_id in ids for t in texts[candidate_id]]
+    vectors = embed_texts(flat, model, texts_per_request, pool)
+    for vector in vectors:
+        if vector is not None and dimension and dimension > 0 and len(vector) != dimension:
+            raise ValueError(
+                f"{model} returned {len(vector)}-dimensional vectors, the shadow columns hold {dimension}"
+            )
+    write_page(conn, [
+        (candidate_id, vector_literal(vectors[2 * i]), vector_literal(vectors[2 * i + 1]))
+        for i, candidate_id in enumerate(ids)
+    ])
+
+
+def shadow_dimension(conn: Connection) -> Optional[int]:
+    """Dimension of the shadow columns (pgvector keeps it as the type modifier), or None if they do not exist."""
+    row = conn.execute(text(
+        "SELECT atttypmod FROM pg_attribute "
+        "WHERE attrelid = 'candidates'::regclass AND attname = 'experience_embedding_next' AND NOT attisdropped"
+    )).fetchone()
+    return row[0] if row else None
+
+
+def prepare(dimension: int) -> None:
+    """Add the shadow columns."""
+    with engine.begin() as conn:
+        for column in EMBEDDING_COLUMNS:
+            conn.execute(text(
+                f"ALTER TABLE candidates ADD COLUMN IF NOT EXISTS {column}_next vector({int(dimension)})"
+            ))
+    logger.info(f"Shadow columns ready with dimension {dimension}")
+
+
+def run(
+    model: str,
+    checkpoint_path: str,
+    page_size: int,
+    texts_per_request: int,
+    concurrency: int,
+    restart: bool = False
+) -> Checkpoint:
+    """Re-embed every candidate into the shadow columns, resuming from the checkpoint."""
+    checkpoint = None if restart else Checkpoint.load(checkpoint_path)
+    if checkpoint is not None and checkpoint.model != model:
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} is for {checkpoint.model}; use --restart to re-embed with {model}"
+        )
+
+    with engine.connect() as conn:
+        dimension = shadow_dimension(conn)
+        if dimension is None:
+            raise ValueError("Shadow columns are missing; run the prepare command first")
+        if checkpoint is None:
+            # The database clock, as updated_at is compared against it at cutover
+            started_at = conn.execute(text("SELECT EXTRACT(EPOCH FROM now())")).scalar()
+            checkpoint = Checkpoint(model=model, started_at=float(started_at))
+        total = conn.execute(
+            text("SELECT COUNT(*) FROM candidates WHERE id > :after"), {"after": checkpoint.last_id}
+        ).scalar()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool, \
+            tqdm(total=total, unit="candidate") as progress:
+        while True:
+            with engine.begin() as conn:
+                ids = fetch_page(conn, checkpoint.last_id, page_size)
+                if not ids:
+                    break
+                reembed_ids(conn, ids, model, dimension, texts_per_request, pool)
+            # Only advance the checkpoint once the page is committed
+            checkpoint.last_id = ids[-1]
+            checkpoint.processed += len(ids)
+            checkpoint.save(checkpoint_path)
+            progress.update(len(ids))
+
+    logger.info(f"Re-embedded {checkpoint.processed} candidates with {model}")
+    return checkpoint
+
+
+def create_indexes() -> None:
+    """Build the vector indexes of the shadow columns without blocking writes."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for column, index in INDEX_NAMES.items():
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index}_next ON candidates "
+                f"USING ivfflat ({column}_next vector_cosine_ops) WITH (lists = 100)"
+            ))
+    logger.info("Shadow column indexes ready")
+
+
+def _swap(conn: Connection, current: str, new: str) -> None:
+    """Rename columns and indexes from the `new` suffix to live and live to `current`."""
+    for column, index in INDEX_NAMES.items():
+        conn.execute(text(f"ALTER TABLE candidates RENAME COLUMN {column} TO {column}{current}"))
+        conn.execute(text(f"ALTER TABLE candidates RENAME COLUMN {column}{new} TO {column}"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}{current}"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS {index}{new} RENAME TO {index}"))
+
+
+def cutover(checkpoint_path: str, texts_per_request: int) -> None:
+    """
+    Make the shadow columns the live ones, atomically.
+
+    Writes are blocked for the duration; candidates created or updated since
+    the run started are re-embedded inside the same transaction before the swap.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path)
+    if checkpoint is None:
+        raise ValueError(f"No checkpoint at {checkpoint_path}; run the re-embedding first")
+
+    with engine.begin() as conn, ThreadPoolExecutor(max_workers=1) as pool:
+        conn.execute(text("LOCK TABLE candidates IN SHARE ROW EXCLUSIVE MODE"))
+        dimension = shadow_dimension(conn)
+        after_id = 0
+        caught_up = 0
+        while True:
+            ids = fetch_changed_page(conn, checkpoint, after_id, 500)
+            if not ids:
+                break
+            reembed_ids(conn, ids, checkpoint.model, dimension, texts_per_request, pool)
+            after_id = ids[-1]
+            caught_up += len(ids)
+        checkpoint.last_id = max(checkpoint.last_id, after_id)
+        checkpoint.processed += caught_up
+        _swap(conn, "_old", "_next")
+
+    checkpoint.save(checkpoint_path)
+    logger.info(f"Caught up on {caught_up} candidates created or updated during the run")
+    logger.info(
+        f"Cut over to {checkpoint.model} embeddings; set EMBEDDING_MODEL={checkpoint.model} and restart the API"
+    )
+
+
+def rollback() -> None:
+    """Swap the previous columns back in; the rolled-back vectors return to the shadow columns."""
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE candidates IN SHARE ROW EXCLUSIVE MODE"))
+        _swap(conn, "_next", "_old")
+    logger.info("Rolled back to the previous embeddings")
+
+
+def drop_old() -> None:
+    """Drop the columns kept from before the cutover."""
+    with engine.begin() as conn:
+        for column in EMBEDDING_COLUMNS:
+            conn.execute(text(f"ALTER TABLE candidates DROP COLUMN IF EXISTS {column}_old"))
+    logger.info("Dropped the previous embedding columns")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-embed candidates into shadow columns and cut over.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prepare_parser = commands.add_parser("prepare", help="Add the shadow embedding columns")
+    prepare_parser.add_argument("--dimension", type=int, default=settings.VECTOR_DIMENSION,
+                                help="Vector dimension of the new model")
+
+    run_parser = commands.add_parser("run", help="Re-embed all candidates, resuming from the checkpoint")
+    run_parser.add_argument("--model", default=settings.EMBEDDING_MODEL, help="Embedding model to use")
+    run_parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    run_parser.add_argument("--page-size", type=int, default=500, help="Candidates per keyset page and UPDATE")
+    run_parser.add_argument("--texts-per-request", type=int, default=256, help="Inputs per embedding request")
+    run_parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight per page")
+    run_parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    commands.add_parser("index", help="Build vector indexes on the shadow columns")
+
+    cutover_parser = commands.add_parser("cutover", help="Swap the shadow columns in")
+    cutover_parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    cutover_parser.add_argument("--texts-per-request", type=int, default=256)
+
+    commands.add_parser("rollback", help="Swap the previous columns back in")
+    commands.add_parser("drop-old", help="Drop the columns kept from before the cutover")
+
+    args = parser.parse_args(argv)
+    try:
+        with priority(BULK):
+            if args.command == "prepare":
+                prepare(args.dimension)
+            elif args.command == "run":
+                run(args.model, args.checkpoint, args.page_size, args.texts_per_request,
+                    args.concurrency, args.restart)
+            elif args.command == "index":
+                create_indexes()
+            elif args.command == "cutover":
+                cutover(args.checkpoint, args.texts_per_request)
+            elif args.command == "rollback":
+                rollback()
+            elif args.command == "drop-old":
+                drop_old()
+    finally:
+        shutdown_llm_gateway()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
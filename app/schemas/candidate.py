@@ -77,6 +77,7 @@ class CandidateCreate(CandidateBase):
     certifications: Optional[List[CertificationCreate]] = None
     projects: Optional[List[ProjectCreate]] = None
     cv_file_id: Optional[str] = None
+    cv_sha256: Optional[str] = None
 
 class CandidateUpdate(BaseModel):
     full_name: Optional[str] = None
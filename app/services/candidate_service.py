@@ -12,7 +12,9 @@ from app.schemas.candidate import (
     ProjectCreate,
     Skill
 )
+from app.crud.skill import link_skills
 from app.services.embedding_service import generate_embeddings
+from app.services.embeddings.transport import vector_literal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -155,30 +157,8 @@ class CandidateService:
                 # Remove existing skills
                 self.supabase.table('candidate_skills').delete().eq('candidate_id', candidate_id).execute()
             
-            # Get or create skills
-            skill_ids = []
-            for skill_name in skills:
-                # Try to get existing skill
-                result = self.supabase.table('skills')\
-                    .select('id')\
-                    .eq('name', skill_name)\
-                    .single()\
-                    .execute()
-                
-                if result.data:
-                    skill_ids.append(result.data['id'])
-                else:
-                    # Create new skill
-                    result = self.supabase.table('skills')\
-                        .insert({'name': skill_name})\
-                        .execute()
-                    skill_ids.append(result.data[0]['id'])
-            
-            # Associate skills with candidate
-            for skill_id in skill_ids:
-                self.supabase.table('candidate_skills')\
-                    .insert({'candidate_id': candidate_id, 'skill_id': skill_id})\
-                    .execute()
+            # Get or create skills and associate them in bulk
+            link_skills(((candidate_id, skill_name) for skill_name in skills), self.supabase)
                     
         except Exception as e:
             logger.error(f"Error handling skills for candidate {candidate_id}: {str(e)}")
@@ -234,11 +214,11 @@ class CandidateService:
             # Generate embeddings
             experience_embedding, skills_embedding = generate_embeddings(cv_text)
             
-            # Update candidate with embeddings
+            # Update candidate with embeddings, as compact pgvector literals
             self.supabase.table('candidates')\
                 .update({
-                    'experience_embedding': experience_embedding,
-                    'skills_embedding': skills_embedding
+                    'experience_embedding': vector_literal(experience_embedding),
+                    'skills_embedding': vector_literal(skills_embedding)
                 })\
                 .eq('id', candidate_id)\
                 .execute()
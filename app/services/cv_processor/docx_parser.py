@@ -0,0 +1,187 @@
+import io
+import zipfile
+from typing import IO, Dict, Iterator, Set, Union
+from xml.etree import ElementTree
+
+from app.services.cv_processor.sections import TextLine
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P = f"{_W}p"
+_R = f"{_W}r"
+_T = f"{_W}t"
+_TAB = f"{_W}tab"
+_BR = f"{_W}br"
+_CR = f"{_W}cr"
+_PPR = f"{_W}pPr"
+_RPR = f"{_W}rPr"
+_PSTYLE = f"{_W}pStyle"
+_OUTLINE_LVL = f"{_W}outlineLvl"
+_BOLD = f"{_W}b"
+_SIZE = f"{_W}sz"
+_STYLE = f"{_W}style"
+_NAME = f"{_W}name"
+_VAL = f"{_W}val"
+_STYLE_ID = f"{_W}styleId"
+_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+_FALSE_VALUES = {"0", "false", "off"}
+_HEADING_STYLE_PREFIXES = ("heading", "title", "titre", "subtitle", "sous-titre")
+
+_CORE_PROPERTIES = {
+    "{http://purl.org/dc/elements/1.1/}title": "title",
+    "{http://purl.org/dc/elements/1.1/}creator": "author",
+    "{http://purl.org/dc/elements/1.1/}subject": "subject",
+    "{http://purl.org/dc/terms/}created": "creationDate",
+    "{http://purl.org/dc/terms/}modified": "modDate",
+}
+
+DocxSource = Union[str, bytes, IO[bytes]]
+
+
+def _open_zip(source: DocxSource) -> zipfile.ZipFile:
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source)
+
+
+def _is_on(element) -> bool:
+    """Whether a toggle property such as <w:b/> is switched on."""
+    return element is not None and element.get(_VAL, "true").lower() not in _FALSE_VALUES
+
+
+def _heading_style_ids(archive: zipfile.ZipFile) -> Set[str]:
+    """
+    Return the IDs of paragraph styles that mark headings.
+
+    Style IDs are localized by Word (e.g. "Titre1"), so styles are matched on
+    their name or outline level rather than on the ID alone.
+    """
+    try:
+        styles = ElementTree.fromstring(archive.read("word/styles.xml"))
+    except KeyError:
+        return set()
+
+    style_ids = set()
+    for style in styles.iter(_STYLE):
+        style_id = style.get(_STYLE_ID, "")
+        name = style.find(_NAME)
+        name = name.get(_VAL, "") if name is not None else ""
+        ppr = style.find(_PPR)
+        if (
+            name.lower().startswith(_HEADING_STYLE_PREFIXES)
+            or style_id.lower().startswith(_HEADING_STYLE_PREFIXES)
+            or (ppr is not None and ppr.find(_OUTLINE_LVL) is not None)
+        ):
+            style_ids.add(style_id)
+    return style_ids
+
+
+def _paragraph_line(paragraph, heading_styles: Set[str]) -> TextLine:
+    """Turn a closed <w:p> element into a TextLine with its layout hints."""
+    ppr = paragraph.find(_PPR)
+    heading_style = False
+    if ppr is not None:
+        style = ppr.find(_PSTYLE)
+        heading_style = (
+            (style is not None and style.get(_VAL) in heading_styles)
+            or ppr.find(_OUTLINE_LVL) is not None
+        )
+
+    parts = []
+    size = 0.0
+    bold = True
+    has_text = False
+    for run in paragraph.iter(_R):
+        run_text = []
+        for child in run:
+            if child.tag == _T:
+                run_text.append(child.text or "")
+            elif child.tag in (_TAB, _BR, _CR):
+                run_text.append(" ")
+        text = "".join(run_text)
+        parts.append(text)
+        if not text.strip():
+            continue
+        has_text = True
+        rpr = run.find(_RPR)
+        if rpr is None or not _is_on(rpr.find(_BOLD)):
+            bold = False
+        if rpr is not None and rpr.find(_SIZE) is not None:
+            # Sizes are stored in half-points
+            try:
+                size = max(size, int(rpr.find(_SIZE).get(_VAL)) / 2)
+            except (TypeError, ValueError):
+                pass
+
+    return TextLine(
+        text="".join(parts),
+        size=size,
+        bold=has_text and bold,
+        heading_style=heading_style
+    )
+
+
+def iter_docx_lines(source: DocxSource) -> Iterator[TextLine]:
+    """
+    Stream the paragraphs of a DOCX file as TextLines, in document order.
+
+    ``word/document.xml`` is read incrementally straight out of the zip and
+    every paragraph is discarded once it has been turned into a line, so
+    memory stays flat no matter how large the document is. Paragraphs in
+    tables, text boxes and content controls are included; nested paragraphs
+    (text boxes) come out before the paragraph that anchors them.
+
+    Args:
+        source: Path, bytes or binary file object of the DOCX file
+
+    Yields:
+        TextLine: Raw paragraph text with its heading style, weight and size
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a zip archive
+        KeyError: If the archive has no word/document.xml
+        ElementTree.ParseError: If the document XML is malformed
+    """
+    with _open_zip(source) as archive:
+        heading_styles = _heading_style_ids(archive)
+        with archive.open("word/document.xml") as stream:
+            depth = 0
+            body = None
+            # Text boxes are stored twice (DrawingML and a VML fallback); only read the first
+            in_fallback = 0
+            for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2:
+                        body = element
+                    elif element.tag == _FALLBACK:
+                        in_fallback += 1
+                    continue
+
+                depth -= 1
+                if element.tag == _FALLBACK:
+                    in_fallback -= 1
+                elif element.tag == _P:
+                    if not in_fallback:
+                        yield _paragraph_line(element, heading_styles)
+                    element.clear()
+                if depth == 2:
+                    # A top-level paragraph or table is done: drop it from the body
+                    body.clear()
+
+
+def read_docx_metadata(source: DocxSource) -> Dict[str, str]:
+    """Read the title, author and dates from docProps/core.xml, using PDF metadata keys."""
+    with _open_zip(source) as archive:
+        try:
+            core = ElementTree.fromstring(archive.read("docProps/core.xml"))
+        except KeyError:
+            return {}
+    return {
+        key: element.text.strip()
+        for tag, key in _CORE_PROPERTIES.items()
+        for element in core.iter(tag)
+        if element.text and element.text.strip()
+    }
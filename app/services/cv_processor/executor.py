@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+from app.core import metrics
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.cv_processor.processor import CVDocument
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than the configured timeout to parse."""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("Document parsing exceeded the configured timeout")
+
+
+def _warm_up_worker() -> int:
+    """Import the PDF stack in a worker process so the first real job is fast."""
+    import fitz  # noqa: F401
+    from app.services.cv_processor.processor import CVProcessor  # noqa: F401
+    return os.getpid()
+
+
+def _analyze_worker(
+    file_path_or_bytes: Union[str, bytes],
+    timeout: Optional[float]
+) -> Tuple["CVDocument", List[metrics.MetricEvent]]:
+    """
+    Validate and extract a document inside a worker process.
+
+    Each worker is the main thread of its own process, so a SIGALRM timer
+    gives us a hard per-document timeout without affecting other workers.
+    Metrics recorded by the processor are captured and returned so the
+    parent process can record them.
+    """
+    from app.services.cv_processor.processor import CVProcessor
+
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with metrics.capture() as events:
+            document = CVProcessor().analyze(file_path_or_bytes)
+        return document, events
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ExtractionExecutor:
+    """
+    Process pool for CPU-bound document parsing.
+
+    PyMuPDF holds the GIL while it parses, so running it in the API process
+    stalls the event loop. This pool keeps a set of warm worker processes and
+    lets both async endpoints and batch jobs parse on every available core.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        start_method: Optional[str] = None
+    ):
+        self.max_workers = max_workers or settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.timeout = timeout if timeout is not None else settings.EXTRACTION_TIMEOUT
+        self.start_method = start_method or settings.EXTRACTION_START_METHOD
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Return the underlying pool, creating it on first use."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+                logger.info(
+                    f"Started extraction pool with {self.max_workers} workers "
+                    f"({self.start_method})"
+                )
+            return self._pool
+
+    def start(self, warm: bool = True) -> None:
+        """
+        Start the pool and optionally spin up every worker ahead of time.
+
+        Submitting one warm-up job per worker forces all processes to be
+        spawned and to import PyMuPDF before the first upload arrives.
+        """
+        pool = self.pool
+        if warm:
+            futures = [pool.submit(_warm_up_worker) for _ in range(self.max_workers)]
+            pids = {future.result() for future in futures}
+            logger.info(f"Warmed {len(pids)} extraction workers")
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _reset_broken_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a pool whose worker died so the next call starts a fresh one."""
+        with self._lock:
+            if self._pool is pool:
+                logger.warning("Extraction pool is broken, restarting it")
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _result_timeout(self) -> Optional[float]:
+        # Give the in-worker alarm a chance to fire first so the worker survives
+        return self.timeout + 5 if self.timeout else None
+
+    def analyze(self, file_path_or_bytes: Union[str, bytes]) -> "CVDocument":
+        """Validate and extract a document in a worker process, blocking the calling thread."""
+        pool = self.pool
+        try:
+            document, events = pool.submit(
+                _analyze_worker, file_path_or_bytes, self.timeout
+            ).result(timeout=self._result_timeout())
+        except FutureTimeoutError:
+            raise ExtractionTimeout("Document parsing exceeded the configured timeout")
+        except BrokenProcessPool:
+            self._reset_broken_pool(pool)
+            raise
+        metrics.replay(events)
+        return document
+
+    async def analyze_async(self, file_path_or_bytes: Union[str, bytes]) -> "CVDocument":
+        """Validate and extract a document in a worker process without blocking the event loop."""
+        pool = self.pool
+        future = pool.submit(_analyze_worker, file_path_or_bytes, self.timeout)
+        try:
+            document, events = await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=self._result_timeout()
+            )
+        except asyncio.TimeoutError:
+            raise ExtractionTimeout("Document parsing exceeded the configured timeout")
+        except BrokenProcessPool:
+            self._reset_broken_pool(pool)
+            raise
+        metrics.replay(events)
+        return document
+
+    def extract_document(self, file_path_or_bytes: Union[str, bytes]) -> "CVDocument":
+        """Extract a structured document in a worker process, raising if it is unreadable."""
+        document = self.analyze(file_path_or_bytes)
+        if not document.valid:
+            raise ValueError(document.error)
+        return document
+
+    async def extract_document_async(self, file_path_or_bytes: Union[str, bytes]) -> "CVDocument":
+        """Extract a structured document without blocking the event loop, raising if it is unreadable."""
+        document = await self.analyze_async(file_path_or_bytes)
+        if not document.valid:
+            raise ValueError(document.error)
+        return document
+
+    def extract_text(self, file_path_or_bytes: Union[str, bytes]) -> str:
+        """Extract text in a worker process, blocking the calling thread."""
+        return self.extract_document(file_path_or_bytes).text
+
+    async def extract_text_async(self, file_path_or_bytes: Union[str, bytes]) -> str:
+        """Extract text in a worker process without blocking the event loop."""
+        return (await self.extract_document_async(file_path_or_bytes)).text
+
+
+_executor: Optional[ExtractionExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """Get the process-wide extraction executor."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ExtractionExecutor()
+        return _executor
+
+
+def shutdown_extraction_executor() -> None:
+    """Shut down the process-wide extraction executor if it was started."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -1,15 +1,69 @@
 import fitz  # PyMuPDF
 import logging
-from typing import Optional, Union
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Union
 import os
 import io
 from app.core.config import settings
+from app.core.metrics import span
+from app.services.cv_processor.executor import ExtractionTimeout, get_extraction_executor
+from app.services.cv_processor.docx_parser import DOCX_MIMETYPE, iter_docx_lines, read_docx_metadata
+from app.services.cv_processor.sections import TextLine, segment_sections
 
 logger = logging.getLogger(__name__)
 
+# Whitespace runs collapse to a single space and NUL characters are dropped, in one pass
+_NORMALIZE_RE = re.compile(r'\x00+|\s+')
+
+def _normalize_match(match: re.Match) -> str:
+    return '' if match.group(0)[0] == '\x00' else ' '
+
+# Text extraction flags without image blocks, whose pixel data we never use
+_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+_BOLD_FLAG = 16
+
+# Supported CV file extensions and their MIME types
+CV_MIMETYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': DOCX_MIMETYPE,
+}
+
+# Pages with less text than this are checked for images when detecting scans
+_MIN_PAGE_TEXT_CHARS = 20
+# Documents with less text than this overall have no usable text layer
+_MIN_DOCUMENT_TEXT_CHARS = 50
+
+@dataclass
+class CVDocument:
+    """
+    Everything learned from a single pass over a CV file.
+
+    Invalid files are returned with valid=False and the error message
+    instead of raising, so callers can validate and extract in one go.
+    """
+    text: str = ""
+    sections: Dict[str, str] = field(default_factory=dict)
+    pages: List[str] = field(default_factory=list)
+    page_count: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    has_text_layer: bool = True
+    has_images: bool = False
+    valid: bool = True
+    error: Optional[str] = None
+
+    @property
+    def is_scanned(self) -> bool:
+        """True when the document is made of images with no usable text layer."""
+        return self.valid and not self.has_text_layer and self.has_images
+
 class CVProcessor:
-    def __init__(self):
-        self.supported_extensions = {'.pdf'}
+    def __init__(self, max_pages: Optional[int] = None, max_chars: Optional[int] = None):
+        self.supported_extensions = set(CV_MIMETYPES)
+        # Reading budget per document; 0 disables a limit
+        self.max_pages = settings.PDF_MAX_PAGES if max_pages is None else max_pages
+        self.max_chars = settings.PDF_MAX_CHARS if max_chars is None else max_chars
     
     def extract_text(self, file_path_or_bytes: Union[str, bytes]) -> str:
         """
@@ -21,58 +75,253 @@ class CVProcessor:
         Returns:
             str: Extracted text from the PDF
             
+        Raises:
+            ValueError: If file format is not supported
+            FileNotFoundError: If file does not exist (when using file path)
+            Exception: For other processing errors
+        """
+        return self.extract_document(file_path_or_bytes).text
+
+    def analyze(self, file_path_or_bytes: Union[str, bytes]) -> CVDocument:
+        """
+        Validate and extract a PDF or DOCX file in a single pass.
+
+        The document is opened once and yields its validity, page count,
+        metadata, per-page text, sections and whether it is a scan without
+        a text layer. Unlike extract_document, unreadable files do not raise.
+        
+        Args:
+            file_path_or_bytes: Either a path to the PDF file or bytes content of the PDF
+            
+        Returns:
+            CVDocument: The extracted document, with valid=False and error set on failure
+        """
+        try:
+            return self.extract_document(file_path_or_bytes)
+        except ExtractionTimeout:
+            raise
+        except Exception as e:
+            return CVDocument(valid=False, error=str(e))
+
+    def extract_document(self, file_path_or_bytes: Union[str, bytes]) -> CVDocument:
+        """
+        Extract text and layout-based sections from a PDF or DOCX file or bytes.
+        
+        Args:
+            file_path_or_bytes: Either a path to the PDF file or bytes content of the PDF
+            
+        Returns:
+            CVDocument: Full text plus contact/experience/education/skills/... sections
+            
         Raises:
             ValueError: If file format is not supported
             FileNotFoundError: If file does not exist (when using file path)
             Exception: For other processing errors
         """
         if isinstance(file_path_or_bytes, str):
-            return self._extract_text_from_file(file_path_or_bytes)
+            return self._extract_document_from_file(file_path_or_bytes)
         elif isinstance(file_path_or_bytes, bytes):
-            return self._extract_text_from_bytes(file_path_or_bytes)
+            return self._extract_document_from_bytes(file_path_or_bytes)
         else:
             raise ValueError("Input must be either a file path (str) or bytes")
     
-    def _extract_text_from_file(self, file_path: str) -> str:
-        """Extract text from a PDF file path."""
+    async def extract_text_async(self, file_path_or_bytes: Union[str, bytes]) -> str:
+        """
+        Extract text from a PDF file or bytes without blocking the event loop.
+
+        Parsing runs in the shared extraction process pool, so concurrent
+        requests keep being served while a large document is processed.
+
+        Args:
+            file_path_or_bytes: Either a path to the PDF file or bytes content of the PDF
+
+        Returns:
+            str: Extracted text from the PDF
+
+        Raises:
+            ExtractionTimeout: If parsing exceeds settings.EXTRACTION_TIMEOUT
+        """
+        return (await self.extract_document_async(file_path_or_bytes)).text
+
+    async def extract_document_async(self, file_path_or_bytes: Union[str, bytes]) -> CVDocument:
+        """Extract a structured document in the shared extraction process pool."""
+        if not isinstance(file_path_or_bytes, (str, bytes)):
+            raise ValueError("Input must be either a file path (str) or bytes")
+        return await get_extraction_executor().extract_document_async(file_path_or_bytes)
+
+    async def analyze_async(self, file_path_or_bytes: Union[str, bytes]) -> CVDocument:
+        """Validate and extract a document in the shared extraction process pool."""
+        if not isinstance(file_path_or_bytes, (str, bytes)):
+            raise ValueError("Input must be either a file path (str) or bytes")
+        return await get_extraction_executor().analyze_async(file_path_or_bytes)
+
+    def _extract_document_from_file(self, file_path: str) -> CVDocument:
+        """Extract a structured document from a PDF or DOCX file path."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
             
         file_ext = os.path.splitext(file_path)[1].lower()
         if file_ext not in self.supported_extensions:
             raise ValueError(f"Unsupported file format: {file_ext}")
+
+        if file_ext == '.docx':
+            with span("docx.parse") as s:
+                s.add_bytes(os.path.getsize(file_path))
+                return self._extract_document_from_docx(file_path)
         
         try:
             # Open the PDF
-            doc = fitz.open(file_path)
-            text = self._extract_text_from_doc(doc)
-            doc.close()
-            return text
+            with span("pdf.parse") as s:
+                s.add_bytes(os.path.getsize(file_path))
+                doc = fitz.open(file_path)
+                document = self._extract_document_from_doc(doc)
+                doc.close()
+            return document
             
         except Exception as e:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise
     
-    def _extract_text_from_bytes(self, pdf_bytes: bytes) -> str:
-        """Extract text from PDF bytes."""
+    def _extract_document_from_bytes(self, pdf_bytes: bytes) -> CVDocument:
+        """Extract a structured document from PDF or DOCX bytes."""
+        if pdf_bytes[:4] == b'PK\x03\x04':
+            # A zip archive, i.e. a DOCX file
+            with span("docx.parse") as s:
+                s.add_bytes(len(pdf_bytes))
+                return self._extract_document_from_docx(pdf_bytes)
+
         try:
             # Open the PDF from bytes
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            text = self._extract_text_from_doc(doc)
-            doc.close()
-            return text
+            with span("pdf.parse") as s:
+                s.add_bytes(len(pdf_bytes))
+                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+                document = self._extract_document_from_doc(doc)
+                doc.close()
+            return document
             
         except Exception as e:
             logger.error(f"Error processing PDF bytes: {str(e)}")
             raise
     
-    def _extract_text_from_doc(self, doc: fitz.Document) -> str:
-        """Extract and clean text from a PyMuPDF document."""
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        
-        return self._clean_text(text)
+    def _extract_document_from_doc(self, doc: fitz.Document) -> CVDocument:
+        """Build a CVDocument from a single pass over a PyMuPDF document."""
+        lines: List[TextLine] = []
+        pages: List[str] = []
+        has_images = False
+        for page_number, page_lines in enumerate(self.iter_page_lines(doc)):
+            page_text = '\n'.join(line.text for line in page_lines)
+            # Only nearly empty pages need the (cheap) image lookup
+            if len(page_text) < _MIN_PAGE_TEXT_CHARS and not has_images:
+                has_images = bool(doc[page_number].get_images(full=False))
+            pages.append(page_text)
+            lines.extend(page_lines)
+
+        text = '\n\n'.join(page_text for page_text in pages if page_text)
+        return CVDocument(
+            text=text,
+            sections=segment_sections(lines),
+            pages=pages,
+            page_count=doc.page_count,
+            metadata={key: value for key, value in (doc.metadata or {}).items() if value},
+            has_text_layer=len(text) >= _MIN_DOCUMENT_TEXT_CHARS,
+            has_images=has_images
+        )
+
+    def _extract_document_from_docx(self, source: Union[str, bytes]) -> CVDocument:
+        """
+        Build a CVDocument from a DOCX file, streaming its paragraphs.
+
+        DOCX files have no fixed pages, so the whole text is reported as a
+        single page; the character budget still applies.
+        """
+        lines: List[TextLine] = []
+        chars = 0
+        try:
+            for line in iter_docx_lines(source):
+                line.text = self._clean_text(line.text)
+                if not line.text:
+                    continue
+                if self.max_chars and chars + len(line.text) > self.max_chars:
+                    remaining = self.max_chars - chars
+                    if remaining > 0:
+                        lines.append(TextLine(text=line.text[:remaining]))
+                    logger.info(f"Stopped reading DOCX: {self.max_chars} character limit")
+                    break
+                # Account for the separator added when lines are joined
+                chars += len(line.text) + 1
+                lines.append(line)
+            metadata = read_docx_metadata(source)
+        except Exception as e:
+            logger.error(f"Error processing DOCX: {str(e)}")
+            raise
+
+        text = '\n'.join(line.text for line in lines)
+        return CVDocument(
+            text=text,
+            sections=segment_sections(lines),
+            pages=[text],
+            page_count=1,
+            metadata=metadata,
+            has_text_layer=len(text) >= _MIN_DOCUMENT_TEXT_CHARS
+        )
+
+    def iter_page_text(self, doc: fitz.Document) -> Iterator[str]:
+        """
+        Yield cleaned text page by page, within the page and character budget.
+
+        Args:
+            doc: An open PyMuPDF document
+
+        Yields:
+            str: Cleaned, non-empty text of each page
+        """
+        for lines in self.iter_page_lines(doc):
+            if lines:
+                yield '\n'.join(line.text for line in lines)
+
+    def iter_page_lines(self, doc: fitz.Document) -> Iterator[List[TextLine]]:
+        """
+        Yield the cleaned text lines of each page with their font size and weight.
+
+        Reading stops as soon as the page or character budget is spent, so
+        long scanned portfolios do not cost more than the pages we keep.
+
+        Args:
+            doc: An open PyMuPDF document
+
+        Yields:
+            List[TextLine]: Non-empty lines of each page, in reading order
+        """
+        chars = 0
+        for page_number, page in enumerate(doc):
+            if self.max_pages and page_number >= self.max_pages:
+                logger.info(f"Stopped reading after {self.max_pages} of {doc.page_count} pages")
+                return
+
+            lines = []
+            for block in page.get_text("dict", flags=_DICT_FLAGS)["blocks"]:
+                if block.get("type") != 0:
+                    continue
+                for line in block["lines"]:
+                    spans = [text_span for text_span in line["spans"] if text_span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = self._clean_text(''.join(text_span["text"] for text_span in line["spans"]))
+                    if self.max_chars and chars + len(text) > self.max_chars:
+                        remaining = self.max_chars - chars
+                        if remaining > 0:
+                            lines.append(TextLine(text=text[:remaining]))
+                        logger.info(f"Stopped reading at page {page_number + 1}: {self.max_chars} character limit")
+                        yield lines
+                        return
+                    # Account for the separator added when lines are joined
+                    chars += len(text) + 1
+                    lines.append(TextLine(
+                        text=text,
+                        size=max(text_span["size"] for text_span in spans),
+                        bold=all(text_span["flags"] & _BOLD_FLAG for text_span in spans)
+                    ))
+            yield lines
     
     def _clean_text(self, text: str) -> str:
         """
@@ -84,24 +333,16 @@ class CVProcessor:
         Returns:
             str: Cleaned text
         """
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        # Remove special characters that might interfere with processing
-        text = text.replace('\x00', '')
-        
-        # Normalize line endings
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
-        
-        # Remove multiple consecutive newlines
-        while '\n\n\n' in text:
-            text = text.replace('\n\n\n', '\n\n')
-        
-        return text.strip()
+        # Collapse whitespace (line breaks included) and drop NUL characters
+        return _NORMALIZE_RE.sub(_normalize_match, text).strip()
     
     def validate_pdf(self, file_path_or_bytes: Union[str, bytes]) -> bool:
         """
         Validate if a PDF file is readable and not corrupted.
+
+        This only checks the first page. Callers that go on to extract the
+        document should call analyze() instead, which validates and extracts
+        in a single pass.
         
         Args:
             file_path_or_bytes: Either a path to the PDF file or bytes content of the PDF
@@ -122,4 +363,17 @@ class CVProcessor:
             return True
         except Exception as e:
             logger.error(f"PDF validation failed: {str(e)}")
-            return False 
\ No newline at end of file
+            return False 
+
+
+_processor: Optional[CVProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_cv_processor() -> CVProcessor:
+    """Get the process-wide CV processor, configured from settings."""
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            _processor = CVProcessor()
+        return _processor
@@ -0,0 +1,133 @@
+import re
+import statistics
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+# Section names, in the order they are usually sent to the LLM
+SECTIONS = ("contact", "summary", "experience", "education", "skills", "projects", "certifications", "other")
+
+# Heading text (lower-cased, without punctuation) -> section name
+_HEADING_KEYWORDS = {
+    "contact": (
+        "contact", "contact information", "contact details", "personal information",
+        "personal details", "thông tin cá nhân",
+    ),
+    "summary": (
+        "profile", "summary", "professional summary", "about me", "objective",
+        "career objective", "profil", "mục tiêu nghề nghiệp",
+    ),
+    "experience": (
+        "experience", "experiences", "work experience", "professional experience",
+        "employment", "employment history", "work history", "career history",
+        "expérience", "expériences", "expérience professionnelle", "expériences professionnelles",
+        "kinh nghiệm", "kinh nghiệm làm việc",
+    ),
+    "education": (
+        "education", "academic background", "academic qualifications", "qualifications",
+        "formation", "formations", "études", "học vấn", "trình độ học vấn",
+    ),
+    "skills": (
+        "skills", "technical skills", "key skills", "core competencies", "competencies",
+        "technologies", "tech stack", "tools", "languages", "compétences", "langues",
+        "kỹ năng", "ngoại ngữ",
+    ),
+    "projects": (
+        "projects", "personal projects", "key projects", "selected projects",
+        "projets", "dự án",
+    ),
+    "certifications": (
+        "certifications", "certificates", "licenses", "licenses and certifications",
+        "certificats", "chứng chỉ",
+    ),
+    "other": (
+        "interests", "hobbies", "references", "activities", "volunteering", "volunteer experience",
+        "awards", "honors", "publications", "centres d'intérêt", "loisirs", "sở thích",
+        "hoạt động",
+    ),
+}
+_HEADING_LOOKUP = {
+    keyword: section
+    for section, keywords in _HEADING_KEYWORDS.items()
+    for keyword in keywords
+}
+_HEADING_STRIP_RE = re.compile(r"[\s:•\-–—|#*_]+")
+# Joins headings like "Skills & Languages" or "Licenses / Certifications"
+_HEADING_JOIN_RE = re.compile(r"\s*(?:&|/|,|\+|\band\b|\bet\b)\s*")
+
+MAX_HEADING_WORDS = 5
+
+
+@dataclass
+class TextLine:
+    """A line of text with the layout hints used to spot headings."""
+    text: str
+    size: float = 0.0
+    bold: bool = False
+    heading_style: bool = False  # e.g. a DOCX paragraph styled as a heading
+
+
+def _heading_key(text: str) -> str:
+    return _HEADING_STRIP_RE.sub(" ", text).strip().lower()
+
+
+def classify_heading(line: TextLine, body_size: float) -> Optional[str]:
+    """
+    Return the section a line introduces, or None if it is not a heading.
+
+    The whole line, without decoration or a trailing colon, must be a known
+    heading; a keyword inside a longer line ("FPT Technologies") is not one.
+    A visually emphasized line (bold, larger than body text, all caps or
+    styled as a heading) may also join known headings, as in "Skills &
+    Languages", and counts as the first one's section.
+    """
+    key = _heading_key(line.text)
+    if not key or len(key.split()) > MAX_HEADING_WORDS:
+        return None
+
+    section = _HEADING_LOOKUP.get(key)
+    if section:
+        return section
+
+    emphasized = (
+        line.heading_style
+        or line.bold
+        or (body_size and line.size > body_size * 1.15)
+        or (line.text.isupper() and len(key) > 3)
+    )
+    if not emphasized:
+        return None
+    parts = [part for part in _HEADING_JOIN_RE.split(key) if part]
+    if len(parts) > 1 and all(part in _HEADING_LOOKUP for part in parts):
+        return _HEADING_LOOKUP[parts[0]]
+    return None
+
+
+def segment_sections(lines: Iterable[TextLine]) -> Dict[str, str]:
+    """
+    Group the lines of a CV into sections.
+
+    Text before the first recognised heading is treated as contact
+    information. Headings themselves are not included in section text, and
+    the lines of a section are joined with line breaks.
+
+    Returns:
+        Dict[str, str]: Section name -> text, only for non-empty sections
+    """
+    lines = list(lines)
+    sizes = [line.size for line in lines if line.size]
+    body_size = statistics.median(sizes) if sizes else 0.0
+
+    parts: Dict[str, List[str]] = {}
+    current = "contact"
+    for line in lines:
+        section = classify_heading(line, body_size)
+        if section:
+            current = section
+            continue
+        parts.setdefault(current, []).append(line.text)
+
+    return {
+        section: "\n".join(parts[section])
+        for section in SECTIONS
+        if section in parts and any(parts[section])
+    }
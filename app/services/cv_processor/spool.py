@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Room per file for the multipart framing around it (boundary, part headers)
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload is refused; the message can be shown to the client."""
+
+
+class UploadTooLarge(UploadRejected):
+    """Raised as soon as an upload grows past the allowed size."""
+
+
+@dataclass
+class SpooledUpload:
+    """An uploaded file written once to disk under the upload folder."""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+    def cleanup(self) -> None:
+        """Remove the spooled file from disk."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove spooled upload {self.path}: {str(e)}")
+
+
+@dataclass
+class SpooledRequest:
+    """The files of a multipart request, spooled to disk."""
+    files: List[SpooledUpload] = field(default_factory=list)
+    # (filename, reason) of the files refused with keep_going
+    rejected: List[Tuple[str, str]] = field(default_factory=list)
+
+    def cleanup(self) -> None:
+        for spool in self.files:
+            spool.cleanup()
+
+
+class _SpoolFile:
+    """A file part being written to the spool directory and hashed on the way through."""
+
+    def __init__(self, filename: str, spool_dir: str):
+        self.filename = filename
+        self.size = 0
+        self._digest = hashlib.sha256()
+        suffix = os.path.splitext(filename)[1].lower()
+        self._file = tempfile.NamedTemporaryFile(dir=spool_dir, suffix=suffix, delete=False)
+
+    def write(self, data: bytes) -> None:
+        self._digest.update(data)
+        self._file.write(data)
+
+    def close(self) -> SpooledUpload:
+        self._file.close()
+        return SpooledUpload(
+            path=self._file.name,
+            filename=self.filename,
+            size=self.size,
+            sha256=self._digest.hexdigest()
+        )
+
+    def discard(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self._file.name)
+        except FileNotFoundError:
+            pass
+
+
+class _MultipartSpooler:
+    """Callbacks of the multipart parser, writing each file part straight to its spool file."""
+
+    def __init__(
+        self,
+        field_name: str,
+        max_files: int,
+        max_size: int,
+        check: Optional[Callable[[str], None]],
+        keep_going: bool
+    ):
+        self.field_name = field_name
+        self.max_files = max_files
+        self.max_size = max_size
+        self.check = check
+        self.keep_going = keep_going
+        self.spool_dir = os.path.join(settings.UPLOAD_FOLDER, "tmp")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.result = SpooledRequest()
+        self.part: Optional[_SpoolFile] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    @property
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        if options.get(b"name", b"").decode("latin-1") != self.field_name or filename is None:
+            # Other form fields are not used by the upload endpoints
+            return
+        filename = filename.decode("utf-8", "replace")
+        if len(self.result.files) + len(self.result.rejected) >= self.max_files:
+            raise UploadRejected(f"At most {self.max_files} files can be uploaded at once")
+        try:
+            if self.check is not None:
+                self.check(filename)
+        except UploadRejected as e:
+            self._reject(filename, e)
+            return
+        self.part = _SpoolFile(filename, self.spool_dir)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self.part
+        if part is None:
+            return
+        part.size += end - start
+        if part.size > self.max_size:
+            # The rest of this part is skipped as it arrives
+            self.part = None
+            part.discard()
+            self._reject(part.filename, UploadTooLarge("File size exceeds maximum allowed size"))
+            return
+        part.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self.part is not None:
+            self.result.files.append(self.part.close())
+            self.part = None
+
+    def _reject(self, filename: str, error: UploadRejected) -> None:
+        if not self.keep_going:
+            raise error
+        self.result.rejected.append((filename, str(error)))
+
+    def abort(self) -> None:
+        if self.part is not None:
+            self.part.discard()
+            self.part = None
+        self.result.cleanup()
+
+
+async def spool_request(
+    request: Request,
+    field_name: str,
+    max_files: int = 1,
+    max_size: Optional[int] = None,
+    check: Optional[Callable[[str], None]] = None,
+    keep_going: bool = False
+) -> SpooledRequest:
+    """
+    Stream the files of a multipart/form-data request to temporary files under settings.UPLOAD_FOLDER.
+
+    The body is parsed as it arrives and each file is written straight to
+    its own temporary file and hashed on the way through, so an upload is
+    written to disk once and memory use stays constant regardless of file
+    size. A request whose Content-Length is already over the limits is
+    rejected before any of its body is read, and reading stops as soon as a
+    file grows past max_size.
+
+    Args:
+        request: The incoming request; its body must not have been read
+        field_name: Form field holding the files; other fields are ignored
+        max_files: Maximum number of files in the request
+        max_size: Maximum size of each file in bytes (defaults to settings.MAX_UPLOAD_SIZE)
+        check: Called with each filename before its data is written; raises UploadRejected to refuse it
+        keep_going: Skip refused files and list them in SpooledRequest.rejected instead of raising
+
+    Returns:
+        SpooledRequest: The spooled files, which the caller must clean up
+
+    Raises:
+        UploadTooLarge: If a file or the whole body exceeds the limits
+        UploadRejected: If the request is not a complete multipart upload, has
+            too many files or, without keep_going, a file is refused
+    """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    max_body = max_files * (max_size + MULTIPART_OVERHEAD)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejected("Expected a multipart/form-data upload")
+    # Reject early when the client already told us how big the body is
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body:
+        raise UploadTooLarge("File size exceeds maximum allowed size")
+
+    spooler = _MultipartSpooler(field_name, max_files, max_size, check, keep_going)
+    parser = MultipartParser(params[b"boundary"], spooler.callbacks)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise UploadTooLarge("File size exceeds maximum allowed size")
+            parser.write(chunk)
+        parser.finalize()
+        if spooler.part is not None:
+            raise UploadRejected("Upload ended before the file was complete")
+    except BaseException:
+        spooler.abort()
+        raise
+    return spooler.result
@@ -1,27 +1,24 @@
-from typing import Tuple, List
-from openai import OpenAI
+from typing import Dict, Tuple, List, Optional
 from app.core.config import settings
+from app.services.llm.embedding_cache import embed_cached
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-def generate_embeddings(text: str) -> Tuple[List[float], List[float]]:
+def generate_embeddings(text: str, sections: Optional[Dict[str, str]] = None) -> Tuple[List[float], List[float]]:
     """
     Generate experience and skills embeddings for a candidate's CV text.
+    When sections from CVProcessor.extract_document are given, the experience
+    and skills sections are embedded directly instead of guessed from keywords.
     Returns a tuple of (experience_embedding, skills_embedding).
     """
     try:
-        # Split the text into experience and skills sections
-        # This is a simple implementation - you might want to use more sophisticated text analysis
-        experience_text = _extract_experience_text(text)
-        skills_text = _extract_skills_text(text)
+        sections = sections or {}
+        experience_text = sections.get("experience") or _extract_experience_text(text)
+        skills_text = sections.get("skills") or _extract_skills_text(text)
         
-        # Generate embeddings for both sections
-        experience_embedding = _get_embedding(experience_text)
-        skills_embedding = _get_embedding(skills_text)
+        # Generate embeddings for both sections in one request
+        experience_embedding, skills_embedding = _get_embeddings([experience_text, skills_text])
         
         return experience_embedding, skills_embedding
         
@@ -29,19 +26,24 @@ def generate_embeddings(text: str) -> Tuple[List[float], List[float]]:
         logger.error(f"Error generating embeddings: {str(e)}")
         raise
 
+def query_prompts(query: str) -> Tuple[str, str]:
+    """
+    The texts embedded for a search query, as (experience_prompt, skills_prompt).
+    """
+    # For queries, we use the same text for both embeddings but with different prompts
+    return (
+        f"Find candidates with experience in: {query}",
+        f"Find candidates with skills in: {query}"
+    )
+
 def generate_query_embeddings(query: str) -> Tuple[List[float], List[float]]:
     """
     Generate embeddings for a search query, optimized for both experience and skills matching.
     Returns a tuple of (experience_embedding, skills_embedding).
     """
     try:
-        # For queries, we use the same text for both embeddings but with different prompts
-        experience_prompt = f"Find candidates with experience in: {query}"
-        skills_prompt = f"Find candidates with skills in: {query}"
-        
-        # Generate embeddings for both aspects
-        experience_embedding = _get_embedding(experience_prompt)
-        skills_embedding = _get_embedding(skills_prompt)
+        # Generate embeddings for both aspects in one request
+        experience_embedding, skills_embedding = _get_embeddings(list(query_prompts(query)))
         
         return experience_embedding, skills_embedding
         
@@ -51,12 +53,13 @@ def generate_query_embeddings(query: str) -> Tuple[List[float], List[float]]:
 
 def _get_embedding(text: str) -> List[float]:
     """Get embeddings for a text using OpenAI's API"""
+    return _get_embeddings([text])[0]
+
+def _get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Get embeddings for several texts, sending the uncached ones in a single OpenAI request."""
     try:
-        response = client.embeddings.create(
-            input=text,
-            model="text-embedding-ada-002"
-        )
-        return response.data[0].embedding
+        # Queries must use the same model as the stored candidate vectors
+        return embed_cached(texts, settings.EMBEDDING_MODEL)
     except Exception as e:
         logger.error(f"Error getting embedding from OpenAI: {str(e)}")
         raise
@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into vectors for candidate storage and search."""
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """
+        Identifier of the exact model producing the vectors.
+
+        Used in embedding cache keys, so it must change whenever the vectors
+        for the same text would change.
+        """
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Non-empty texts to embed
+
+        Returns:
+            List[List[float]]: One vector per text, in order
+        """
@@ -0,0 +1,32 @@
+from functools import lru_cache
+from typing import Optional
+from app.core.config import settings
+from app.services.embeddings.base import EmbeddingProvider
+
+LOCAL_PREFIX = "local"
+
+
+@lru_cache(maxsize=None)
+def get_embedding_provider(model: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Get the embedding provider for a model name, settings.EMBEDDING_MODEL by default.
+
+    "local" selects the scikit-learn model at settings.LOCAL_EMBEDDING_MODEL_PATH
+    and "local:/path/to/model.pkl" a specific file; any other name is an
+    OpenAI embedding model. Providers are imported lazily so the local one
+    works without network access and the OpenAI one without scikit-learn.
+    """
+    model = model or settings.EMBEDDING_MODEL
+    if model == LOCAL_PREFIX or model.startswith(f"{LOCAL_PREFIX}:"):
+        from app.services.embeddings.local import LocalEmbeddingProvider
+        path = model.partition(":")[2] or settings.LOCAL_EMBEDDING_MODEL_PATH
+        return LocalEmbeddingProvider(path)
+    from app.services.embeddings.openai_provider import OpenAIEmbeddingProvider
+    return OpenAIEmbeddingProvider(model)
+
+
+def get_fallback_embedding_provider() -> Optional[EmbeddingProvider]:
+    """The provider used when the primary one fails, if settings.EMBEDDING_FALLBACK_MODEL is set."""
+    if not settings.EMBEDDING_FALLBACK_MODEL:
+        return None
+    return get_embedding_provider(settings.EMBEDDING_FALLBACK_MODEL)
@@ -0,0 +1,108 @@
+"""
+Network-free embeddings from a scikit-learn model fit on our own CV corpus.
+
+The model is a hashing vectorizer (word unigrams and bigrams, no vocabulary
+to store), TF-IDF weighting, TruncatedSVD down to a few hundred dense
+components (latent semantic analysis) and L2 normalization. Its vectors are
+zero-padded to settings.VECTOR_DIMENSION so they fit the existing vector
+columns; padding does not change cosine similarity.
+
+Loading unpickles the model file, so only load files built with fit_local_model.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from typing import Any, Iterable, List, Optional
+from app.core.config import settings
+from app.services.embeddings.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+HASH_FEATURES = 2 ** 20
+
+
+def build_pipeline(components: int) -> Any:
+    """The untrained local embedding pipeline."""
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import Normalizer
+
+    return make_pipeline(
+        HashingVectorizer(
+            n_features=HASH_FEATURES,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm=None,
+            strip_accents="unicode"
+        ),
+        TfidfTransformer(sublinear_tf=True),
+        TruncatedSVD(n_components=components, algorithm="randomized", random_state=0),
+        Normalizer(copy=False)
+    )
+
+
+def fit_local_model(texts: Iterable[str], path: str, components: int = 256) -> int:
+    """
+    Fit the local embedding model on a corpus and save it.
+
+    Args:
+        texts: Corpus, typically the cv_text of stored candidates
+        path: Where to write the pickled model
+        components: Dense dimensions before padding
+
+    Returns:
+        int: Number of components actually kept (fewer on small corpora)
+
+    Raises:
+        ValueError: If the corpus is too small or components exceed VECTOR_DIMENSION
+    """
+    corpus = [text for text in texts if text and text.strip()]
+    if len(corpus) < 2:
+        raise ValueError("At least two non-empty documents are needed to fit the local embedding model")
+    if components > settings.VECTOR_DIMENSION:
+        raise ValueError(f"components must not exceed VECTOR_DIMENSION ({settings.VECTOR_DIMENSION})")
+
+    components = min(components, len(corpus) - 1)
+    pipeline = build_pipeline(components)
+    pipeline.fit(corpus)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(pipeline, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    logger.info(f"Fit local embedding model with {components} components on {len(corpus)} documents")
+    return components
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """Embeddings computed in-process by the model fit with fit_local_model."""
+
+    def __init__(self, path: str, dimension: Optional[int] = None):
+        self.path = path
+        self.dimension = dimension or settings.VECTOR_DIMENSION
+        with open(path, "rb") as f:
+            data = f.read()
+        # Refitting changes the vectors, so the model's content is part of its id
+        self._model_id = f"local-{hashlib.sha256(data).hexdigest()[:16]}"
+        self._pipeline = pickle.loads(data)
+        # scikit-learn transformers are not documented as thread-safe
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        with self._lock:
+            vectors = self._pipeline.transform(texts)
+        padded = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        padded[:, :vectors.shape[1]] = vectors
+        return padded.tolist()
@@ -0,0 +1,17 @@
+from typing import List
+from app.services.embeddings.base import EmbeddingProvider
+from app.services.llm.gateway import get_llm_gateway
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API, through the shared rate-limited gateway."""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def model_id(self) -> str:
+        return self.model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return get_llm_gateway().embed(texts, self.model)
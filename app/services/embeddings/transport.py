@@ -0,0 +1,108 @@
+"""
+Compact encodings for moving embedding vectors to and from the database.
+
+Reads go through the candidate_embeddings_packed SQL functions
+(app/db/sql), which return each vector as base64 of pgvector's binary
+format instead of JSON text. A whole result set is decoded into one
+preallocated float32 matrix with a single strided NumPy copy.
+
+PostgREST only accepts JSON bodies, so writes use the shortest text
+literal that keeps float32 precision.
+"""
+import base64
+import json
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+FLOAT32 = "float32"
+FLOAT16 = "float16"
+JSON = "json"
+
+# Functions returning packed vectors, per transport
+PACKED_FUNCTIONS = {
+    FLOAT32: "candidate_embeddings_packed",
+    FLOAT16: "candidate_embeddings_packed_half",
+}
+
+# vector_send/halfvec_send header: uint16 dimension, uint16 unused
+_HEADER_BYTES = 4
+
+
+def vector_literal(vector: Optional[Sequence[float]]) -> Optional[str]:
+    """Format a vector as a pgvector text literal, with float32 precision."""
+    if vector is None:
+        return None
+    # str() of a float32 is the shortest text that reads back as the same float32
+    return "[" + ",".join(str(value) for value in np.asarray(vector, dtype=np.float32)) + "]"
+
+
+def decode_packed(
+    values: Sequence[Optional[str]],
+    half: bool = False,
+    out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode base64 vector_send/halfvec_send values into a float32 matrix.
+
+    Args:
+        values: One base64 string per row, None for a missing vector
+        half: Values are halfvec (float16) rather than vector (float32)
+        out: Preallocated (len(values), dimension) float32 matrix to fill
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The matrix, with zero rows for missing
+            or malformed vectors, and a boolean mask of the rows that are present
+    """
+    raw = [base64.b64decode(value) if value else None for value in values]
+    first = next((data for data in raw if data), None)
+    if first is None:
+        matrix = out if out is not None else np.zeros((len(values), 0), dtype=np.float32)
+        return matrix, np.zeros(len(values), dtype=bool)
+
+    itemsize = 2 if half else 4
+    dimension = int.from_bytes(first[:2], "big")
+    row_bytes = _HEADER_BYTES + dimension * itemsize
+    present = np.fromiter(
+        (data is not None and len(data) == row_bytes for data in raw), dtype=bool, count=len(raw)
+    )
+
+    matrix = out if out is not None else np.empty((len(values), dimension), dtype=np.float32)
+    matrix[~present] = 0.0
+    rows = int(present.sum())
+    if rows:
+        buffer = b"".join(data for data, ok in zip(raw, present) if ok)
+        # View every row's values in place, skipping the headers, then convert in one go
+        packed = np.ndarray(
+            (rows, dimension),
+            dtype=np.dtype(">f2" if half else ">f4"),
+            buffer=buffer,
+            offset=_HEADER_BYTES,
+            strides=(row_bytes, itemsize)
+        )
+        matrix[present] = packed
+    return matrix, present
+
+
+def decode_json(values: Sequence[Optional[object]], dimension: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode JSON-text (or already parsed) vectors into a float32 matrix, like decode_packed."""
+    matrix = np.zeros((len(values), dimension), dtype=np.float32)
+    present = np.zeros(len(values), dtype=bool)
+    for index, value in enumerate(values):
+        try:
+            vector = json.loads(value) if isinstance(value, str) else value
+        except ValueError:
+            continue
+        if vector is not None and len(vector) == dimension:
+            matrix[index] = vector
+            present[index] = True
+    return matrix, present
+
+
+def cosine_similarities(matrix: np.ndarray, query: Sequence[float]) -> np.ndarray:
+    """Cosine similarity of every row of matrix with query; 0 for zero vectors."""
+    query = np.asarray(query, dtype=np.float32)
+    if matrix.shape[1] != query.shape[0]:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    dots = matrix @ query
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
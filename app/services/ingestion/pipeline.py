@@ -0,0 +1,126 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+from app.core.metrics import span
+from app.crud import candidate as candidate_crud
+from app.schemas.candidate import CandidateCreate
+from app.services.cv_processor.executor import ExtractionExecutor, get_extraction_executor
+from app.services.cv_processor.processor import CV_MIMETYPES
+from app.services.llm.extractor import InformationExtractor, get_information_extractor
+from app.services.storage.base import CVStorage, sha256_file
+from app.services.storage.factory import get_cv_storage
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("store", "extract", "llm", "embed", "db")
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of running one CV through the ingestion pipeline."""
+    candidate: Dict[str, Any]
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class IngestionError(Exception):
+    """Raised when a pipeline stage fails; records which stage and how long it ran."""
+
+    def __init__(self, stage: str, error: Exception, timings: Dict[str, float]):
+        super().__init__(f"{stage} failed: {str(error)}")
+        self.stage = stage
+        self.error = error
+        self.timings = timings
+
+
+class CVIngestionPipeline:
+    """
+    Synchronous CV ingestion pipeline: storage, parse, LLM extraction, embeddings, DB write.
+
+    Text extraction runs in the shared process pool, so many threads can drive
+    this pipeline at once while PDF parsing still uses every core.
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[InformationExtractor] = None,
+        executor: Optional[ExtractionExecutor] = None,
+        storage: Optional[CVStorage] = None,
+        bypass_llm_cache: bool = False
+    ):
+        self.extractor = extractor or get_information_extractor()
+        self.executor = executor or get_extraction_executor()
+        self.storage = storage or get_cv_storage()
+        self.bypass_llm_cache = bypass_llm_cache
+
+    @contextmanager
+    def _stage(self, name: str, timings: Dict[str, float]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            with span(f"ingest.{name}"):
+                yield
+        except Exception as e:
+            timings[name] = time.perf_counter() - start
+            raise IngestionError(name, e, timings) from e
+        timings[name] = time.perf_counter() - start
+
+    def ingest_file(self, file_path: str, filename: Optional[str] = None) -> IngestionResult:
+        """
+        Run a CV file through the full pipeline and create the candidate.
+
+        Args:
+            file_path: Path to the CV file
+            filename: Original file name, used when storing the file
+
+        Returns:
+            IngestionResult: The created candidate row and per-stage timings
+
+        Raises:
+            IngestionError: If any stage fails
+        """
+        timings: Dict[str, float] = {}
+        filename = filename or os.path.basename(file_path)
+        mimetype = CV_MIMETYPES.get(os.path.splitext(filename)[1].lower(), 'application/pdf')
+
+        # The content hash both names the stored file and identifies the candidate on re-import
+        sha256 = sha256_file(file_path)
+        file_id = None
+        if not self.storage.deferred:
+            with self._stage("store", timings):
+                file_id = self.storage.save(file_path, filename, sha256, mimetype)
+
+        with self._stage("extract", timings):
+            document = self.executor.analyze(file_path)
+            if not document.valid:
+                raise ValueError(f"Invalid or corrupted CV file: {document.error}")
+            if document.is_scanned:
+                raise ValueError("Scanned image without a text layer")
+            cv_text = document.text
+
+        with self._stage("llm", timings):
+            candidate_data = self.extractor.extract_information(
+                cv_text, document.sections, bypass_cache=self.bypass_llm_cache
+            )
+            candidate_data_dict = self.extractor.sanitize_dates(candidate_data.model_dump())
+            candidate_data_dict['cv_file_id'] = file_id
+            candidate_data_dict['cv_sha256'] = sha256
+            candidate_data = CandidateCreate(**candidate_data_dict)
+
+        with self._stage("embed", timings):
+            embeddings = self.extractor.generate_embeddings(candidate_data, cv_text)
+
+        with self._stage("db", timings):
+            candidate = candidate_crud.create_candidate(
+                candidate_data=candidate_data,
+                embeddings=embeddings
+            )
+
+        if self.storage.deferred:
+            with self._stage("store", timings):
+                file_id = self.storage.save(file_path, filename, sha256, mimetype)
+                candidate_crud.update_cv_file_id(candidate['id'], file_id)
+                candidate['cv_file_id'] = file_id
+
+        return IngestionResult(candidate=candidate, timings=timings)
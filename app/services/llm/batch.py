@@ -0,0 +1,497 @@
+"""
+Offline batch extraction through JSONL request and result files.
+
+Instead of calling the chat endpoint per chunk, ``BatchWriter`` serializes
+every chunk request of a set of CVs into request files in the OpenAI Batch
+API format, alongside a documents file that records how the chunks map
+back to CVs. Once the results file is available (from the Batch API, or
+from ``LocalBatchProcessor`` offline), ``BatchIngestor`` runs the usual
+parse, sanitize and combine steps and writes the candidates in bulk.
+"""
+import contextvars
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.crud import candidate as candidate_crud
+from app.schemas.candidate import CandidateCreate
+from app.services.llm.extractor import ExtractionPlan, InformationExtractor, get_information_extractor
+from app.services.llm.prefill import Prefill
+from app.services.llm.schema import EXTRACTION_FUNCTION_NAME
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# The Batch API accepts up to 50,000 requests per input file
+MAX_REQUESTS_PER_FILE = 50000
+
+DOCUMENTS_FILE = "documents.jsonl"
+INGESTED_FILE = "ingested.jsonl"
+REQUESTS_PATTERN = "requests-*.jsonl"
+RESULTS_PATTERN = "results-*.jsonl"
+
+
+@dataclass
+class BatchDocument:
+    """How the chunk requests of one CV map back to it."""
+    doc_id: str
+    key: str
+    chunks: int
+    lite: bool = False
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    cv_file_id: Optional[str] = None
+    # SHA-256 of the CV file: the same content is prepared and ingested once
+    sha256: Optional[str] = None
+    # Cache key per chunk, so fresh results can be added to the response cache
+    cache_keys: List[Optional[str]] = field(default_factory=list)
+    # Chunk index -> result already in the response cache, not sent in the batch
+    cached: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def document_id(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+def custom_id(doc_id: str, index: int) -> str:
+    return f"{doc_id}-{index}"
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable line {line_number} of {path}")
+
+
+class BatchWriter:
+    """
+    Write the chunk requests of many CVs to Batch API request files.
+
+    Thread-safe, so documents can be parsed in parallel and added as they finish.
+    Documents already in the directory, by key or by content hash, are
+    skipped, so prepare can be re-run on the same source.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        extractor: Optional[InformationExtractor] = None,
+        max_requests_per_file: int = MAX_REQUESTS_PER_FILE
+    ):
+        self.directory = directory
+        self.extractor = extractor or get_information_extractor()
+        self.max_requests_per_file = max_requests_per_file
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._known_ids = set()
+        self._known_hashes = set()
+        documents_path = os.path.join(directory, DOCUMENTS_FILE)
+        if os.path.exists(documents_path):
+            for entry in _iter_jsonl(documents_path):
+                self._known_ids.add(entry["doc_id"])
+                if entry.get("sha256"):
+                    self._known_hashes.add(entry["sha256"])
+        self._documents = open(os.path.join(directory, DOCUMENTS_FILE), "a", encoding="utf-8")
+        self._part = len(glob.glob(os.path.join(directory, REQUESTS_PATTERN)))
+        self._requests = None
+        self._requests_in_file = 0
+        self.documents_written = 0
+        self.documents_skipped = 0
+        self.requests_written = 0
+
+    def _is_known(self, doc_id: str, sha256: Optional[str]) -> bool:
+        return doc_id in self._known_ids or (sha256 is not None and sha256 in self._known_hashes)
+
+    def known(self, key: str, sha256: Optional[str] = None) -> bool:
+        """Whether a document with this key or content was already added; if so it counts as skipped."""
+        with self._lock:
+            if self._is_known(document_id(key), sha256):
+                self.documents_skipped += 1
+                return True
+            return False
+
+    def _request_file(self):
+        if self._requests is None or self._requests_in_file >= self.max_requests_per_file:
+            if self._requests is not None:
+                self._requests.close()
+            self._part += 1
+            path = os.path.join(self.directory, f"requests-{self._part:04d}.jsonl")
+            self._requests = open(path, "w", encoding="utf-8")
+            self._requests_in_file = 0
+        return self._requests
+
+    def add(
+        self,
+        key: str,
+        cv_text: str,
+        sections: Optional[Dict[str, str]] = None,
+        cv_file_id: Optional[str] = None,
+        sha256: Optional[str] = None
+    ) -> int:
+        """
+        Queue the chunk requests of one CV.
+
+        Chunks whose result is already in the response cache are stored with
+        the document instead of being sent again. A CV already added, by key
+        or by sha256, is skipped.
+
+        Returns:
+            int: Number of requests written for this CV
+        """
+        if self.known(key, sha256):
+            return 0
+        plan = self.extractor.plan_extraction(cv_text, sections)
+        doc = BatchDocument(
+            doc_id=document_id(key),
+            key=key,
+            chunks=len(plan.chunks),
+            lite=plan.lite,
+            email=plan.prefill.email,
+            phone=plan.prefill.phone,
+            cv_file_id=cv_file_id,
+            sha256=sha256
+        )
+        lines = []
+        for index, chunk in enumerate(plan.chunks):
+            cache_key = self.extractor.cache_key(chunk, plan.lite)
+            doc.cache_keys.append(cache_key)
+            cached = self.extractor.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                doc.cached[str(index)] = cached
+                continue
+            lines.append(json.dumps({
+                "custom_id": custom_id(doc.doc_id, index),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self.extractor.chat_request(chunk, plan.lite)
+            }, ensure_ascii=False))
+
+        with self._lock:
+            # Another thread may have added the same content meanwhile
+            if self._is_known(doc.doc_id, sha256):
+                self.documents_skipped += 1
+                return 0
+            self._known_ids.add(doc.doc_id)
+            if sha256 is not None:
+                self._known_hashes.add(sha256)
+            # The manifest entry goes first: requests without one could never be
+            # matched to a CV, while a CV whose requests were lost only fails at
+            # ingest with "No result for chunk"
+            self._documents.write(json.dumps(asdict(doc), ensure_ascii=False, default=str) + "\n")
+            self._documents.flush()
+            for line in lines:
+                self._request_file().write(line + "\n")
+                self._requests_in_file += 1
+            if lines:
+                self._requests.flush()
+            self.documents_written += 1
+            self.requests_written += len(lines)
+        return len(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._requests is not None:
+                self._requests.close()
+                self._requests = None
+            self._documents.close()
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class LocalBatchProcessor:
+    """
+    Offline stand-in for the Batch API that answers requests with canned responses.
+
+    Responses are looked up by custom_id, then by the SHA-256 of the chunk
+    text (the user message), then fall back to a default. Each response is
+    the function call arguments the model would have produced.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, Dict[str, Any]]] = None,
+        default: Optional[Dict[str, Any]] = None
+    ):
+        self.responses = responses or {}
+        self.default = default
+
+    @classmethod
+    def from_file(cls, path: str, default: Optional[Dict[str, Any]] = None) -> "LocalBatchProcessor":
+        """
+        Load canned responses from a JSONL file.
+
+        Each line is {"custom_id": ..., "arguments": {...}} or
+        {"chunk_sha256": ..., "arguments": {...}}.
+        """
+        responses = {}
+        for entry in _iter_jsonl(path):
+            key = entry.get("custom_id") or entry.get("chunk_sha256")
+            if key:
+                responses[key] = entry["arguments"]
+        return cls(responses, default)
+
+    def _arguments_for(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if request["custom_id"] in self.responses:
+            return self.responses[request["custom_id"]]
+        chunk = request["body"]["messages"][-1]["content"]
+        chunk_sha256 = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        return self.responses.get(chunk_sha256, self.default)
+
+    def process(self, requests_path: str, results_path: str) -> int:
+        """
+        Answer every request of a request file and write a Batch API results file.
+
+        Returns:
+            int: Number of requests answered
+        """
+        count = 0
+        with open(results_path, "w", encoding="utf-8") as out:
+            for request in _iter_jsonl(requests_path):
+                arguments = self._arguments_for(request)
+                if arguments is None:
+                    result = {
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": "not_found", "message": "No canned response"}
+                    }
+                else:
+                    result = {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {
+                                "object": "chat.completion",
+                                "model": request["body"]["model"],
+                                "choices": [{
+                                    "index": 0,
+                                    "finish_reason": "stop",
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": None,
+                                        "tool_calls": [{
+                                            "id": f"call_{count}",
+                                            "type": "function",
+                                            "function": {
+                                                "name": EXTRACTION_FUNCTION_NAME,
+                                                "arguments": json.dumps(arguments, ensure_ascii=False)
+                                            }
+                                        }]
+                                    }
+                                }],
+                                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                            }
+                        },
+                        "error": None
+                    }
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+
+@dataclass
+class BatchIngestStats:
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class BatchIngestor:
+    """Turn Batch API results back into candidates and write them in bulk."""
+
+    def __init__(
+        self,
+        directory: str,
+        extractor: Optional[InformationExtractor] = None,
+        batch_size: int = 50,
+        embedding_workers: int = 8
+    ):
+        self.directory = directory
+        self.extractor = extractor or get_information_extractor()
+        self.batch_size = batch_size
+        self.embedding_workers = embedding_workers
+
+    def _load_results(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for path in paths:
+            for entry in _iter_jsonl(path):
+                results[entry["custom_id"]] = entry
+        return results
+
+    def _load_ingested(self) -> set:
+        """Doc ids and content hashes of the documents ingested by previous runs."""
+        path = os.path.join(self.directory, INGESTED_FILE)
+        if not os.path.exists(path):
+            return set()
+        ingested = set()
+        for entry in _iter_jsonl(path):
+            ingested.add(entry["doc_id"])
+            if entry.get("sha256"):
+                ingested.add(entry["sha256"])
+        return ingested
+
+    def _build_candidate(self, doc: BatchDocument, results: Dict[str, Dict[str, Any]]) -> CandidateCreate:
+        chunk_results = []
+        for index in range(doc.chunks):
+            if str(index) in doc.cached:
+                chunk_results.append(doc.cached[str(index)])
+                continue
+            entry = results.get(custom_id(doc.doc_id, index))
+            if entry is None:
+                raise ValueError(f"No result for chunk {index}")
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                error = entry.get("error") or response.get("body", {}).get("error")
+                raise ValueError(f"Chunk {index} failed: {error}")
+            data = self.extractor.parse_completion(response["body"])
+            cache_key = doc.cache_keys[index] if index < len(doc.cache_keys) else None
+            if cache_key and self.extractor.response_cache is not None:
+                self.extractor.response_cache.set(cache_key, data)
+            chunk_results.append(data)
+
+        plan = ExtractionPlan(
+            chunks=[],
+            lite=doc.lite,
+            prefill=Prefill(email=doc.email, phone=doc.phone)
+        )
+        candidate_data = self.extractor.finalize(chunk_results, plan)
+        candidate_data_dict = self.extractor.sanitize_dates(candidate_data.model_dump())
+        candidate_data_dict['cv_file_id'] = doc.cv_file_id
+        candidate_data_dict['cv_sha256'] = doc.sha256
+        return CandidateCreate(**candidate_data_dict)
+
+    def _flush(
+        self,
+        pending: List[Tuple[BatchDocument, CandidateCreate]],
+        ingested_file,
+        stats: BatchIngestStats
+    ) -> None:
+        with ThreadPoolExecutor(max_workers=self.embedding_workers) as pool:
+            # Copy the context per call so the workers keep the caller's LLM priority
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.extractor.generate_embeddings, candidate_data, "")
+                for _, candidate_data in pending
+            ]
+            embedded = []
+            for (doc, candidate_data), future in zip(pending, futures):
+                try:
+                    embedded.append((doc, candidate_data, future.result()))
+                except Exception as e:
+                    # Not recorded as ingested, so the next ingest retries it
+                    stats.failed += 1
+                    stats.errors[doc.key] = f"Embedding failed: {str(e)}"
+        if not embedded:
+            return
+        try:
+            candidates = candidate_crud.create_candidates_bulk([
+                (candidate_data, embedding) for _, candidate_data, embedding in embedded
+            ])
+        except Exception as e:
+            logger.error(f"Bulk insert of {len(embedded)} candidates failed: {str(e)}")
+            for doc, _, _ in embedded:
+                stats.failed += 1
+                stats.errors[doc.key] = str(e)
+            return
+        for (doc, _, _), candidate in zip(embedded, candidates):
+            ingested_file.write(json.dumps({
+                "doc_id": doc.doc_id, "key": doc.key, "sha256": doc.sha256, "candidate_id": candidate.get("id")
+            }) + "\n")
+            stats.succeeded += 1
+        ingested_file.flush()
+        os.fsync(ingested_file.fileno())
+
+    def ingest(self, results_paths: Optional[List[str]] = None) -> BatchIngestStats:
+        """
+        Create the candidates of every document whose results are available.
+
+        Documents already ingested, by this run or a previous one, are
+        skipped by doc id and content hash, so an interrupted ingest can be
+        resumed and duplicate documents create one candidate. Each bulk
+        insert is one transaction, and candidates written by a batch whose
+        ingested.jsonl entry was lost are updated in place on retry (see
+        create_candidates_bulk).
+
+        Args:
+            results_paths: Results files; defaults to every results-*.jsonl in the directory
+        """
+        if results_paths is None:
+            results_paths = sorted(glob.glob(os.path.join(self.directory, RESULTS_PATTERN)))
+        results = self._load_results(results_paths)
+        ingested = self._load_ingested()
+        stats = BatchIngestStats()
+
+        pending: List[Tuple[BatchDocument, CandidateCreate]] = []
+        with open(os.path.join(self.directory, INGESTED_FILE), "a", encoding="utf-8") as ingested_file:
+            for entry in _iter_jsonl(os.path.join(self.directory, DOCUMENTS_FILE)):
+                doc = BatchDocument(**entry)
+                if doc.doc_id in ingested or (doc.sha256 and doc.sha256 in ingested):
+                    stats.skipped += 1
+                    continue
+                try:
+                    pending.append((doc, self._build_candidate(doc, results)))
+                except Exception as e:
+                    logger.warning(f"Could not build candidate for {doc.key}: {str(e)}")
+                    stats.failed += 1
+                    stats.errors[doc.key] = str(e)
+                    continue
+                # Queued documents count as ingested, so duplicates later in the file are skipped
+                ingested.add(doc.doc_id)
+                if doc.sha256:
+                    ingested.add(doc.sha256)
+                if len(pending) >= self.batch_size:
+                    self._flush(pending, ingested_file, stats)
+                    pending = []
+            if pending:
+                self._flush(pending, ingested_file, stats)
+        return stats
+
+
+def submit_batch(requests_path: str) -> str:
+    """Upload a request file and start a Batch API job. Returns the batch ID."""
+    from openai import OpenAI
+    from app.core.config import settings
+
+    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    with open(requests_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+    return batch.id
+
+
+def download_batch_results(batch_id: str, results_path: str) -> str:
+    """
+    Download the results of a finished Batch API job.
+
+    Returns:
+        str: The batch status; results are only written when it is "completed"
+    """
+    from openai import OpenAI
+    from app.core.config import settings
+
+    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    batch = client.batches.retrieve(batch_id)
+    if batch.status == "completed":
+        with open(results_path, "wb") as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(client.files.content(file_id).read())
+    return batch.status
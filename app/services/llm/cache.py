@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of parsed LLM extraction results, stored in SQLite.
+
+    Entries are keyed by everything that influences the answer (model,
+    temperature, system prompt version and chunk text), so re-processing a
+    CV we already parsed costs no LLM call. The total size of the stored
+    values is capped; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt_version: str, chunk: str) -> str:
+        """Hash the inputs of an extraction call into a cache key."""
+        payload = json.dumps([model, temperature, prompt_version, chunk], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            logger.warning(f"Dropping unreadable LLM cache entry {key}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result, evicting least recently used entries past the size cap."""
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(data.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= row[0]
+
+    def _evict(self) -> None:
+        """Delete the oldest entries until the cache is back under its cap. Caller holds the lock."""
+        evicted = 0
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            self._conn.execute("BEGIN")
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                evicted += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+            self._conn.execute("COMMIT")
+        logger.info(f"Evicted {evicted} LLM cache entries")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide LLM response cache, or None when caching is disabled."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache(
+        os.path.join(settings.LLM_CACHE_DIR, "responses.sqlite3"),
+        settings.LLM_CACHE_MAX_BYTES
+    )
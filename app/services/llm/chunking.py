@@ -0,0 +1,128 @@
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken ships with the OpenAI integrations
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Boundaries tried in order when a block is over budget: paragraphs, lines, sentences, words
+_SPLIT_PATTERNS = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?;])\s+"),
+    re.compile(r"\s+"),
+)
+_BLOCK_SEPARATOR = "\n\n"
+
+
+@lru_cache()
+def _get_encoding(model: Optional[str]):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text with the model's tokenizer.
+
+    Without tiktoken this falls back to about 4 UTF-8 bytes per token, which
+    over-counts accented text rather than under-counting it.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text.encode("utf-8")) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _hard_split(text: str, budget: int, model: Optional[str]) -> List[str]:
+    """Cut a text with no usable boundaries into budget-sized pieces."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = budget * 4
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + budget]) for i in range(0, len(tokens), budget)]
+
+
+def split_to_budget(text: str, budget: int, model: Optional[str] = None, _level: int = 0) -> List[str]:
+    """
+    Split a text into pieces of at most budget tokens, on the coarsest boundary possible.
+
+    Args:
+        text: Text to split
+        budget: Maximum tokens per piece
+        model: Model whose tokenizer is used for counting
+
+    Returns:
+        List[str]: Pieces in their original order
+    """
+    if count_tokens(text, model) <= budget:
+        return [text]
+    if _level >= len(_SPLIT_PATTERNS):
+        return _hard_split(text, budget, model)
+
+    pattern = _SPLIT_PATTERNS[_level]
+    separator = "\n" if _level < 2 else " "
+    parts = [part for part in pattern.split(text) if part.strip()]
+    if len(parts) <= 1:
+        return split_to_budget(text, budget, model, _level + 1)
+
+    pieces: List[str] = []
+    for part in parts:
+        pieces.extend(split_to_budget(part, budget, model, _level + 1))
+    return pack_chunks(pieces, budget, model, separator=separator)
+
+
+def pack_chunks(
+    blocks: Iterable[str],
+    budget: int,
+    model: Optional[str] = None,
+    separator: str = _BLOCK_SEPARATOR
+) -> List[str]:
+    """
+    Greedily pack blocks, in order, into as few chunks of at most budget tokens as possible.
+
+    Blocks larger than the budget are split first, so section boundaries are
+    only crossed when a single section does not fit in one chunk.
+
+    Args:
+        blocks: Text blocks (e.g. CV sections) in reading order
+        budget: Maximum tokens per chunk
+        model: Model whose tokenizer is used for counting
+        separator: Text placed between blocks in a chunk
+
+    Returns:
+        List[str]: The chunks
+    """
+    separator_tokens = count_tokens(separator, model)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for block in blocks:
+        block_tokens = count_tokens(block, model)
+        if block_tokens > budget:
+            pieces = split_to_budget(block, budget, model)
+        else:
+            pieces = [block]
+        for piece in pieces:
+            piece_tokens = block_tokens if len(pieces) == 1 else count_tokens(piece, model)
+            added = piece_tokens + (separator_tokens if current else 0)
+            if current and current_tokens + added > budget:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+                added = piece_tokens
+            current.append(piece)
+            current_tokens += added
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
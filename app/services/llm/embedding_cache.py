@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Sequence
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.services.embeddings.factory import get_embedding_provider
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-entry bookkeeping (key string, dict slot, bytes header) counted against the cap
+_ENTRY_OVERHEAD = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace, so texts differing only in layout share an embedding."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Process-wide cache of embedding vectors.
+
+    Vectors are stored as packed float32 bytes, about a quarter of the size
+    of a list of Python floats, in a least recently used map capped by
+    memory size. With a path, vectors are also written through to SQLite and
+    read back on a memory miss, so they survive restarts. The on-disk copy
+    is capped at disk_max_bytes by dropping the oldest writes.
+    """
+
+    def __init__(self, max_bytes: int, path: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._disk_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Hash a model and normalized text into a cache key."""
+        payload = f"{model}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pack(vector: Sequence[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(data: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(data)
+        return vector.tolist()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Put an entry in the memory map and evict past the cap. Caller holds the lock."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous) + _ENTRY_OVERHEAD
+        self._entries[key] = data
+        self._bytes += len(data) + _ENTRY_OVERHEAD
+        while self.max_bytes and self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted) + _ENTRY_OVERHEAD
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached vector for a text, or None on a miss."""
+        key = self.make_key(model, text)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    data = row[0]
+                    self._remember(key, data)
+        return self._unpack(data) if data is not None else None
+
+    def set(self, model: str, text: str, vector: Sequence[float]) -> None:
+        """Store a vector, writing it through to disk when persistence is on."""
+        key = self.make_key(model, text)
+        data = self._pack(vector)
+        with self._lock:
+            self._remember(key, data)
+            if self._conn is not None:
+                try:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)", (key, data)
+                    )
+                    self._disk_bytes += len(data) * cursor.rowcount
+                    if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+                        self._evict_disk()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not persist embedding cache entry: {str(e)}")
+
+    def _evict_disk(self) -> None:
+        """Drop the oldest persisted vectors until the file is back under its cap. Caller holds the lock."""
+        while self._disk_bytes > self.disk_max_bytes:
+            rows = self._conn.execute(
+                "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY rowid LIMIT 500"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            self._conn.execute("BEGIN")
+            for rowid, size in rows:
+                self._conn.execute("DELETE FROM embeddings WHERE rowid = ?", (rowid,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+            self._conn.execute("COMMIT")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._disk_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache."""
+    return EmbeddingCache(
+        settings.EMBEDDING_CACHE_MAX_BYTES,
+        settings.EMBEDDING_CACHE_PATH,
+        settings.EMBEDDING_CACHE_DISK_MAX_BYTES
+    )
+
+
+def embed_cached(texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+    """
+    Embed texts, serving repeats from the embedding cache.
+
+    Only the texts not in the cache are sent, together in a single request.
+
+    Args:
+        texts: Texts to embed
+        model: Embedding model, settings.EMBEDDING_MODEL by default
+
+    Returns:
+        List[List[float]]: One vector per text, in order
+    """
+    provider = get_embedding_provider(model or settings.EMBEDDING_MODEL)
+    cache = get_embedding_cache()
+    vectors: List[Optional[List[float]]] = [cache.get(provider.model_id, text) for text in texts]
+    for vector in vectors:
+        record_cache("embedding", vector is not None)
+
+    missing = [index for index, vector in enumerate(vectors) if vector is None]
+    if missing:
+        # Identical texts in one call are only sent once
+        unique = list(dict.fromkeys(normalize_text(texts[index]) for index in missing))
+        fresh = dict(zip(unique, provider.embed(unique)))
+        for text, vector in fresh.items():
+            cache.set(provider.model_id, text, vector)
+        for index in missing:
+            vectors[index] = fresh[normalize_text(texts[index])]
+    return vectors
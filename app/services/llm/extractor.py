@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Union, get_args
 import json
 from datetime import datetime
-from functools import lru_cache
-from openai import OpenAI
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from app.core.config import settings
+from app.core.metrics import span, record_cache, record_tokens
+from app.services.llm.cache import LLMResponseCache, get_llm_cache
+from app.services.llm.gateway import get_llm_gateway
+from app.services.llm.merge import merge_results
+from app.services.llm.embedding_cache import embed_cached
+from app.services.llm.chunking import count_tokens, pack_chunks, split_to_budget
+from app.services.llm.prefill import Prefill, extract_contact, rewrite_dates, strip_contact
+from app.services.llm.schema import EXTRACTION_FUNCTION_NAME, extraction_tool
+from app.services.llm.streaming import IncrementalJSONParser, JSONEvent
 from app.schemas.candidate import (
     CandidateCreate,
     EducationCreate,
@@ -21,279 +30,378 @@ from pydantic import HttpUrl
 
 logger = logging.getLogger(__name__)
 
+# HttpUrl is an Annotated alias in pydantic v2; isinstance needs the class underneath
+_URL_TYPE = get_args(HttpUrl)[0] if get_args(HttpUrl) else HttpUrl
+
+# CV sections that carry information for CandidateCreate, in prompt order
+LLM_SECTIONS = ("contact", "summary", "experience", "education", "skills", "projects", "certifications")
+
+# "other" is sent too when the sections above hold less than this share of the
+# sectioned text, as when unusual headings put most of a CV under "other"
+MIN_KNOWN_SECTION_SHARE = 0.5
+
+# A CV with content in any of these sections always gets the full extraction schema
+LITE_EXCLUDED_SECTIONS = ("education", "projects", "certifications")
+# Without sections, contact details are looked for in this many leading characters
+CONTACT_SCAN_CHARS = 1000
+
+# Bump whenever the system prompt or output format changes, so cached results are not reused
+SYSTEM_PROMPT_VERSION = "2"
+LLM_TEMPERATURE = 0.1
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+@dataclass
+class ExtractionPlan:
+    """The LLM requests needed for one CV, and the fields already found without the LLM."""
+    chunks: List[str]
+    lite: bool = False
+    prefill: Prefill = field(default_factory=Prefill)
+
 class InformationExtractor:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.embedding_model = self._initialize_embedding_model()
-        self.output_parser = PydanticOutputParser(pydantic_object=CandidateCreate)
+        # Shared client: rate limits, retries and priorities are handled process-wide
+        self.gateway = get_llm_gateway()
         self.system_prompt = self._create_system_prompt()
-        self._embedding_cache = {}  # Simple in-memory cache for embeddings
-    
-    def _initialize_embedding_model(self) -> OpenAIEmbeddings:
-        """Initialize the OpenAI embeddings model."""
-        return OpenAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        # The prompt embeds the current year, so its hash is part of the cache key
+        prompt_hash = hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()[:16]
+        self.prompt_version = f"{SYSTEM_PROMPT_VERSION}-{prompt_hash}"
+        self.response_cache = get_llm_cache()
     
+    def warm_up(self, probe: bool = True) -> bool:
+        """
+        Build everything the first extraction would otherwise build lazily.
+
+        Loads the tokenizer, compiles both function schemas and, with probe,
+        checks the OpenAI connection.
+
+        Returns:
+            bool: False if the probe failed; extraction may still work later
+        """
+        count_tokens("warm up", settings.OPENAI_MODEL)
+        extraction_tool(False)
+        extraction_tool(True)
+        return self.gateway.probe() if probe else True
+
     def _create_system_prompt(self) -> str:
-        """Create a highly detailed and strict system prompt for CV extraction."""
-        return f"""You are an expert-level CV parser with deep expertise in recruitment, HR standards, and structured data extraction. 
-        Your task is to convert unstructured CV/resume text into perfectly structured JSON that strictly complies with the following Pydantic schema.
-
-        🔒 **STRICT COMPLIANCE REQUIRED**:
-        1. ✅ **NEVER** omit required fields or return invalid formats
-        2. 🧠 Use **intelligent inference** when data is implied but not explicit
-        3. 📐 **Always** maintain schema validity - use placeholders when necessary
-
-        ---
-        📜 **SCHEMA REQUIREMENTS**:
-
-        ### ROOT LEVEL (MANDATORY):
-        - `full_name`: string (e.g., "Jane Doe")
-        - `email`: valid email format (use "unknown@example.com" if missing)
-        - `phone`: string (use "000-000-0000" if missing)
-        - `location`: string (city/country preferred, "Unknown Location" if missing)
-
-        ### EDUCATION (Array of objects):
-        Each must contain:
-        - `institution`: string (required)
-        - `degree`: string (e.g., "Bachelor's in Computer Science")
-        - `field_of_study`: string (required)
-        - `start_date`: ISO date (YYYY-MM-DD, never use text like "Unknown")
-        - `end_date`: ISO date or null if ongoing. If unknown, infer plausible fake date.
-        - `description`: string or null
-
-        ### WORK EXPERIENCE (Array of objects):
-        Each must contain:
-        - `company`: string (use "Anonymous Corp" if unknown)
-        - `position`: string (use "Unknown Role" if missing)
-        - `start_date`: ISO date (use "YYYY-01-01" if only year known, never use non-date strings)
-        - `end_date`: ISO date or null if current
-        - `description`: string (required, summarize key responsibilities)
-        - `achievements`: array of strings or null
-        - `location`: string or null
-
-        ### SKILLS (Array of strings):
-        - Include both technical (e.g., "Python", "Docker") and soft skills (e.g., "Team Leadership")
-
-        ### PROJECTS (Array of objects):
-        Each must contain:
-        - `name`: string (required)
-        - `description`: string (required)
-        - `start_date`: ISO date or null
-        - `end_date`: ISO date or null
-        - `technologies`: array of strings or null
-        - `url`: valid HTTP URL (must start with http:// or https://) or null. If you cannot infer a valid URL, set to null. NEVER return a partial or invalid URL.
-
-        ### CERTIFICATIONS (Array of objects):
-        Each must contain:
-        - `name`: string (required)
-        - `issuer`: string (use "Unknown Issuer" if missing)
-        - `issue_date`: ISO date (e.g., "1900-01-01", generate plausible date if missing)
-        - `expiry_date`: ISO date or null
-        - `credential_id`: string or null
-        - `credential_url`: HTTP URL (must start with http:// or https://) or null. If you cannot infer a valid URL, set to null. NEVER return a partial or invalid URL.
-
-        ---
-        🛠 **PROCESSING RULES**:
-        1. 📅 **Date Handling**:
-        - Always use ISO format (YYYY-MM-DD), never return free-text like "Unknown Start Date"
-        - Use "01-01" as default month/day if only year is known (e.g., "2015-01-01")
-        - If date is missing, infer a **realistic fake date** instead of leaving blank
-        - For current positions: set `end_date` to null
-
-        2. 🧠 **Inference Guidelines**:
-        - Prioritize most recent 5 years of work experience
-        - Infer dates from context when possible (e.g., "2015-2017" → "2015-01-01" to "2017-01-01")
-        - Extract skills from project descriptions and work experience
-
-        3. ⚠ **Error Prevention**:
-        - Reject ambiguous data rather than guessing incorrectly
-        - Use schema-compliant placeholders for missing required fields
-        - Never return null for required fields
-
-        4. 🔍 **Data Prioritization**:
-        - Focus on recent and relevant experience
-        - Include all certifications with verifiable details
-        - Capture project technologies and methodologies
-
-        ---
-        📌 **OUTPUT REQUIREMENTS**:
-        {self.output_parser.get_format_instructions()}
-
-        🕒 **Context**:
-        - Current Year: {datetime.now().year}
-        - This output will be strictly validated against Pydantic models
-        - Incomplete or invalid data will cause pipeline failures
-
-        🚨 **Critical Reminder**: Your output must be 100% schema-compliant. When in doubt:
-        1) Infer intelligently 2) Use placeholders 3) Never omit required fields
         """
+        Create the system prompt for CV extraction.
+
+        The output format is enforced by the record_candidate function schema,
+        so the prompt only carries the rules the schema cannot express. Bump
+        SYSTEM_PROMPT_VERSION when changing it.
+        """
+        return (
+            f"You extract structured data from CV text by calling {EXTRACTION_FUNCTION_NAME}. "
+            "Rules: "
+            "Dates are YYYY-MM-DD; use YYYY-01-01 when only the year is known, and end_date null for current roles. "
+            "Fill required fields that are missing with placeholders: email unknown@example.com, "
+            "company \"Anonymous Corp\", position \"Unknown Role\", issuer \"Unknown Issuer\", "
+            "and a plausible date for missing required dates. "
+            "URLs must start with http:// or https://, otherwise use null. "
+            "Skills include technical and soft skills, also those implied by projects and experience. "
+            "Summarize each job's responsibilities in its description. "
+            f"The current year is {datetime.now().year}."
+        )
 
     def _preprocess_text(self, text: str) -> str:
-        """Preprocess CV text for better extraction."""
-        text = ' '.join(text.split())
+        """
+        Preprocess CV text for better extraction.
+
+        Spaces are collapsed within each line, but line and paragraph breaks
+        are kept: split_to_budget cuts an oversized section on them first.
+        """
         text = text.replace('\x00', '')
         text = text.replace('\r\n', '\n').replace('\r', '\n')
-        while '\n\n\n' in text:
-            text = text.replace('\n\n\n', '\n\n')
+        paragraphs = (
+            '\n'.join(' '.join(line.split()) for line in paragraph.split('\n') if line.strip())
+            for paragraph in _PARAGRAPH_BREAK_RE.split(text)
+        )
+        text = '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+        # Hand the model ISO date ranges instead of "Mar 2019 - present"
+        text = rewrite_dates(text)
         return text.strip()
     
-    def _split_long_text(self, text: str, max_length: int = 4000) -> List[str]:
-        """Split long CV text into manageable chunks."""
-        if len(text) <= max_length:
-            return [text]
-            
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_length,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+    def _extract_from_chunk(self, chunk: str, bypass_cache: bool = False, lite: bool = False) -> Dict[str, Any]:
+        """
+        Extract information from a single chunk of text.
+
+        With lite, only the fields in schema.LITE_FIELDS are requested.
+
+        Results are looked up in and written to the persistent response cache.
+        With bypass_cache the lookup is skipped, but the fresh result is still
+        stored so later calls pick it up.
+        """
+        cache_key = self.cache_key(chunk, lite)
+        if cache_key is not None and not bypass_cache:
+            cached = self.response_cache.get(cache_key)
+            record_cache("llm", cached is not None)
+            if cached is not None:
+                return cached
+
+        data = self._call_llm(chunk, lite)
+        if cache_key is not None:
+            try:
+                self.response_cache.set(cache_key, data)
+            except Exception as e:
+                logger.warning(f"Could not write LLM cache entry: {str(e)}")
+        return data
+
+    def cache_key(self, chunk: str, lite: bool = False) -> Optional[str]:
+        """Response cache key for a chunk, or None when caching is disabled."""
+        if self.response_cache is None:
+            return None
+        return LLMResponseCache.make_key(
+            settings.OPENAI_MODEL,
+            LLM_TEMPERATURE,
+            f"{self.prompt_version}-lite" if lite else self.prompt_version,
+            chunk
         )
-        return splitter.split_text(text)
-    
-    def _extract_from_chunk(self, chunk: str) -> Dict[str, Any]:
-        """Extract information from a single chunk of text."""
-        messages = [
-            {
-                "role": "system",
-                "content": self.system_prompt
-            },
-            {
-                "role": "user",
-                "content": f"Here is the CV text to analyze:\n\n{chunk}\n\nPlease extract the information in the specified format. Remember to NEVER return null values for required fields. Make reasonable inferences if information is not explicitly stated."
-            }
-        ]
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=4000
+
+    def chat_request(self, chunk: str, lite: bool = False) -> Dict[str, Any]:
+        """Arguments of the chat completion request that extracts a chunk."""
+        return {
+            "model": settings.OPENAI_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self.system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": chunk
+                }
+            ],
+            "temperature": LLM_TEMPERATURE,
+            "max_tokens": settings.LLM_MAX_OUTPUT_TOKENS,
+            "tools": [extraction_tool(lite)],
+            "tool_choice": {"type": "function", "function": {"name": EXTRACTION_FUNCTION_NAME}}
+        }
+
+    def parse_completion(self, response: Any) -> Dict[str, Any]:
+        """
+        Read the extracted data from a chat completion's function call.
+
+        Args:
+            response: A ChatCompletion from the SDK, or its JSON body as a dict
+                (e.g. a line of a batch results file)
+
+        Returns:
+            Dict[str, Any]: Sanitized candidate fields
+
+        Raises:
+            ValueError: If the output was cut off or has no function call
+        """
+        if isinstance(response, dict):
+            usage = response.get("usage") or {}
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+            choice = response["choices"][0]
+            finish_reason = choice.get("finish_reason")
+            tool_calls = choice["message"].get("tool_calls") or []
+            arguments = tool_calls[0]["function"]["arguments"] if tool_calls else None
+        else:
+            usage = response.usage
+            prompt_tokens = usage.prompt_tokens if usage else None
+            completion_tokens = usage.completion_tokens if usage else None
+            choice = response.choices[0]
+            finish_reason = choice.finish_reason
+            tool_calls = choice.message.tool_calls or []
+            arguments = tool_calls[0].function.arguments if tool_calls else None
+
+        if prompt_tokens is not None:
+            record_tokens(settings.OPENAI_MODEL, prompt_tokens, completion_tokens or 0)
+            logger.info(
+                f"LLM extraction call used {prompt_tokens} prompt and "
+                f"{completion_tokens} completion tokens"
             )
-            result_text = response.choices[0].message.content
-            
-            try:
-                # First try to parse as is
-                parsed_data = self.output_parser.parse(result_text)
-                # Convert to dict immediately to avoid Pydantic model issues
-                data = parsed_data.model_dump() if hasattr(parsed_data, 'model_dump') else parsed_data
-                # Sanitize dates before returning
-                data = self.sanitize_dates(data)
-                # Sanitize urls before returning
-                data = self.sanitize_urls(data)
-                return data
-            except Exception as parse_error:
-                logger.warning(f"Initial parse failed, attempting to clean and retry: {str(parse_error)}")
-                
-                # Try to clean the response and parse again
-                cleaned_text = self._clean_llm_response(result_text)
-                try:
-                    parsed_data = self.output_parser.parse(cleaned_text)
-                    data = parsed_data.model_dump() if hasattr(parsed_data, 'model_dump') else parsed_data
-                    # Sanitize dates before returning
-                    data = self.sanitize_dates(data)
-                    # Sanitize urls before returning
-                    data = self.sanitize_urls(data)
-                    return data
-                except Exception as second_parse_error:
-                    logger.error(f"Failed to parse even after cleaning: {str(second_parse_error)}")
-                    raise ValueError(f"Failed to parse LLM response into valid CandidateCreate format: {str(second_parse_error)}")
-                    
+        if finish_reason == "length":
+            raise ValueError(
+                f"LLM output was cut off at {settings.LLM_MAX_OUTPUT_TOKENS} tokens"
+            )
+        if arguments is None:
+            raise ValueError("LLM did not return the candidate function call")
+
+        data = json.loads(arguments)
+        # Sanitize dates and urls before returning
+        data = self.sanitize_dates(data)
+        data = self.sanitize_urls(data)
+        return data
+
+    def _call_llm(self, chunk: str, lite: bool = False) -> Dict[str, Any]:
+        """Send a chunk to the chat model and read the structured answer from its function call."""
+        try:
+            with span("llm.chunk"):
+                response = self.gateway.chat(**self.chat_request(chunk, lite))
+            return self.parse_completion(response)
         except Exception as e:
             logger.error(f"Error processing chunk: {str(e)}")
             raise
     
-    def _clean_llm_response(self, text: str) -> str:
-        """Clean and normalize the LLM response for better parsing."""
+    def _sanitize_event(self, event: JSONEvent) -> JSONEvent:
+        """Apply the date and URL fixes to a streamed part before it leaves the extractor."""
+        wrapped = self.sanitize_urls(self.sanitize_dates({event.key: event.value}))
+        return JSONEvent(event.key, wrapped[event.key], event.item)
+
+    async def _stream_chunk(
+        self,
+        chunk: str,
+        emit: Callable[[JSONEvent], None],
+        bypass_cache: bool = False,
+        lite: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Extract a chunk with a streamed completion, emitting its parts as they close.
+
+        A cached result is emitted whole, field by field. The complete output
+        goes through parse_completion like a regular response, so token
+        accounting, truncation checks and sanitizing are the same.
+        """
+        cache_key = self.cache_key(chunk, lite)
+        if cache_key is not None and not bypass_cache:
+            cached = self.response_cache.get(cache_key)
+            record_cache("llm", cached is not None)
+            if cached is not None:
+                for key, value in cached.items():
+                    for item in value if isinstance(value, list) else ():
+                        emit(JSONEvent(key, item, item=True))
+                    emit(JSONEvent(key, value))
+                return cached
+
+        parser = IncrementalJSONParser()
+        finish_reason = None
+        usage = None
+        saw_call = False
+        with span("llm.chunk"):
+            request = self.chat_request(chunk, lite)
+            request["stream_options"] = {"include_usage": True}
+            async for part in self.gateway.chat_stream(**request):
+                if part.usage:
+                    usage = {
+                        "prompt_tokens": part.usage.prompt_tokens,
+                        "completion_tokens": part.usage.completion_tokens
+                    }
+                if not part.choices:
+                    continue
+                choice = part.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                for call in choice.delta.tool_calls or []:
+                    saw_call = True
+                    if call.function and call.function.arguments:
+                        for event in parser.feed(call.function.arguments):
+                            emit(self._sanitize_event(event))
+
+        data = self.parse_completion({
+            "usage": usage,
+            "choices": [{
+                "finish_reason": finish_reason,
+                "message": {
+                    "tool_calls": [{"function": {"arguments": parser.text}}] if saw_call else []
+                }
+            }]
+        })
+        if cache_key is not None:
+            try:
+                self.response_cache.set(cache_key, data)
+            except Exception as e:
+                logger.warning(f"Could not write LLM cache entry: {str(e)}")
+        return data
+
+    async def stream_information(
+        self,
+        cv_text: str,
+        sections: Optional[Dict[str, str]] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Union[JSONEvent, CandidateCreate]]:
+        """
+        Extract structured information from CV text, streaming partial results.
+
+        Every top-level field and every element of a list field (one work
+        experience, one skill) is yielded as a JSONEvent as soon as the model
+        has finished writing it, so callers can start on it before the whole
+        completion is done. Chunks of a long CV stream concurrently, so events
+        from different chunks interleave and may repeat; the final candidate,
+        yielded last, is combined and deduplicated as in extract_information.
+
+        Args:
+            cv_text: Raw text extracted from CV
+            sections: Optional section name -> text mapping from CVProcessor.extract_document
+            bypass_cache: Call the LLM even for chunks already in the response cache
+
+        Yields:
+            JSONEvent for each completed part, then the final CandidateCreate
+        """
+        plan = self.plan_extraction(cv_text, sections)
+        if plan.prefill.email:
+            yield JSONEvent("email", plan.prefill.email)
+        if plan.prefill.phone:
+            yield JSONEvent("phone", plan.prefill.phone)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._stream_chunk(chunk, queue.put_nowait, bypass_cache, plan.lite))
+            for chunk in plan.chunks
+        ]
         try:
-            # Try to parse as JSON first
-            data = json.loads(text)
-            
-            # Replace None/null values with empty strings for required string fields
-            if isinstance(data, dict):
-                for key in ['full_name', 'email', 'phone', 'location']:
-                    if key in data and data[key] is None:
-                        data[key] = ""
-                
-                # Handle education entries
-                if 'education' in data and isinstance(data['education'], list):
-                    for edu in data['education']:
-                        for key in ['institution', 'degree', 'field_of_study']:
-                            if key in edu and edu[key] is None:
-                                edu[key] = ""
-                
-                # Handle work experience entries
-                if 'work_experience' in data and isinstance(data['work_experience'], list):
-                    for exp in data['work_experience']:
-                        for key in ['company', 'position', 'description']:
-                            if key in exp and exp[key] is None:
-                                exp[key] = ""
-                
-                # Handle certification entries
-                if 'certifications' in data and isinstance(data['certifications'], list):
-                    for cert in data['certifications']:
-                        for key in ['name', 'issuer']:
-                            if key in cert and cert[key] is None:
-                                cert[key] = ""
-            
-            return json.dumps(data)
-        except json.JSONDecodeError:
-            # If not valid JSON, return as is
-            return text
-    
+            pending = set(tasks)
+            while pending:
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+                pending -= done
+                for task in done - {getter}:
+                    # Surface the first failure right away
+                    task.result()
+            while not queue.empty():
+                yield queue.get_nowait()
+            results = [task.result() for task in tasks]
+        except Exception as e:
+            logger.error(f"Error streaming information from CV: {str(e)}")
+            raise
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        yield self.finalize(results, plan)
+
+    def _extract_from_chunks(
+        self,
+        chunks: List[str],
+        bypass_cache: bool = False,
+        lite: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract information from all chunks concurrently, keeping their order.
+
+        A multi-chunk CV takes about as long as its slowest chunk rather than
+        the sum of all of them. Each chunk runs in a copy of the caller's
+        context so stage timings still reach the current request.
+        """
+        if len(chunks) == 1:
+            return [self._extract_from_chunk(chunks[0], bypass_cache, lite)]
+
+        workers = min(len(chunks), max(1, settings.LLM_CHUNK_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._extract_from_chunk, chunk, bypass_cache, lite)
+                for chunk in chunks
+            ]
+            return [future.result() for future in futures]
+
     def _combine_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Combine and deduplicate results from multiple chunks."""
-        if not results:
-            raise ValueError("No results to combine")
-            
-        # First result is already a dict from _extract_from_chunk
-        combined = results[0].copy() if isinstance(results[0], dict) else results[0].model_dump()
-        
-        for result in results[1:]:
-            # Convert result to dict if it's a Pydantic model
-            result_dict = result.model_dump() if hasattr(result, 'model_dump') else result
-            
-            # Ensure all list fields are initialized as lists, not None
-            for field in ["education", "work_experience", "skills", "projects", "certifications"]:
-                if combined.get(field) is None:
-                    combined[field] = []
-                if result_dict.get(field) is None:
-                    result_dict[field] = []
-            
-            # Merge education (avoid duplicates)
-            combined["education"].extend([
-                edu for edu in result_dict["education"]
-                if edu not in combined["education"]
-            ])
-            
-            # Merge work experience (avoid duplicates)
-            combined["work_experience"].extend([
-                exp for exp in result_dict["work_experience"]
-                if exp not in combined["work_experience"]
-            ])
-            
-            # Merge skills (avoid duplicates)
-            combined["skills"] = list(set(combined["skills"] + result_dict["skills"]))
-            
-            # Merge projects (avoid duplicates)
-            combined["projects"].extend([
-                proj for proj in result_dict["projects"]
-                if proj not in combined["projects"]
-            ])
-            
-            # Merge certifications (avoid duplicates)
-            combined["certifications"].extend([
-                cert for cert in result_dict["certifications"]
-                if cert not in combined["certifications"]
-            ])
-        
+        # Results are dicts from _extract_from_chunk, but accept Pydantic models too
+        combined = merge_results([
+            result.model_dump() if hasattr(result, 'model_dump') else result
+            for result in results
+        ])
+
         # Convert HttpUrl objects to strings before returning
         combined = self.convert_httpurl_to_str(combined)
         return combined
-    
+
     def sanitize_dates(self, data):
         """
         Recursively replace invalid or missing date strings with '1900-01-01'.
@@ -315,6 +423,28 @@ class InformationExtractor:
                 self.sanitize_dates(item)
         return data
 
+    def dates_to_datetimes(self, data):
+        """
+        Recursively turn YYYY-MM-DD strings in date fields into datetimes.
+
+        The model answers with dates, but Pydantic v2 does not parse a
+        date-only string into the datetime fields of CandidateCreate.
+        """
+        date_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if 'date' in key and isinstance(value, str) and date_pattern.match(value):
+                    try:
+                        data[key] = datetime.strptime(value, "%Y-%m-%d")
+                    except ValueError:
+                        pass
+                elif isinstance(value, (dict, list)):
+                    self.dates_to_datetimes(value)
+        elif isinstance(data, list):
+            for item in data:
+                self.dates_to_datetimes(item)
+        return data
+
     def sanitize_urls(self, data):
         """
         Recursively ensure all URL fields are valid. If not, prepend 'https://' or set to None.
@@ -342,24 +472,75 @@ class InformationExtractor:
         """
         if isinstance(data, dict):
             for key, value in data.items():
-                if isinstance(value, HttpUrl):
+                if isinstance(value, _URL_TYPE):
                     data[key] = str(value)
                 elif isinstance(value, (dict, list)):
                     self.convert_httpurl_to_str(value)
         elif isinstance(data, list):
             for i, item in enumerate(data):
-                if isinstance(item, HttpUrl):
+                if isinstance(item, _URL_TYPE):
                     data[i] = str(item)
                 elif isinstance(item, (dict, list)):
                     self.convert_httpurl_to_str(item)
         return data
 
-    def extract_information(self, cv_text: str) -> CandidateCreate:
+    def _build_llm_blocks(
+        self,
+        cv_text: str,
+        sections: Optional[Dict[str, str]] = None,
+        max_tokens: Optional[int] = None
+    ) -> List[str]:
+        """
+        Build the blocks of text sent to the LLM, each fitting the token budget.
+
+        When the CV processor found sections, only the ones the schema needs
+        are sent, each under a short label, and blocks like hobbies or
+        references are dropped. Those blocks are kept when the known sections
+        hold little of the CV, since the segmenter then probably missed its
+        headings, and all sections are sent unlabelled when it found none
+        besides contact. Without sections the whole text is used. A section
+        too long for one chunk is split and its label repeated on each piece.
+        """
+        budget = max_tokens or settings.LLM_CHUNK_TOKEN_BUDGET
+        if not sections:
+            return [self._preprocess_text(cv_text)]
+        if not any(sections.get(name) for name in LLM_SECTIONS if name != "contact"):
+            # Built from the sections rather than cv_text, whose contact block is not stripped
+            return [self._preprocess_text("\n\n".join(text for text in sections.values() if text))]
+
+        names = list(LLM_SECTIONS)
+        known_chars = sum(len(sections.get(name) or "") for name in LLM_SECTIONS)
+        other_chars = len(sections.get("other") or "")
+        if other_chars and known_chars < MIN_KNOWN_SECTION_SHARE * (known_chars + other_chars):
+            names.append("other")
+
+        blocks = []
+        for name in names:
+            if not sections.get(name):
+                continue
+            label = f"{name.upper()}:\n"
+            body_budget = max(1, budget - count_tokens(label, settings.OPENAI_MODEL))
+            for piece in split_to_budget(self._preprocess_text(sections[name]), body_budget, settings.OPENAI_MODEL):
+                blocks.append(label + piece)
+        return blocks
+
+    def _build_llm_input(self, cv_text: str, sections: Optional[Dict[str, str]] = None) -> str:
+        """Build the full text sent to the LLM, before chunking."""
+        return "\n\n".join(self._build_llm_blocks(cv_text, sections))
+
+    def extract_information(
+        self,
+        cv_text: str,
+        sections: Optional[Dict[str, str]] = None,
+        bypass_cache: bool = False
+    ) -> CandidateCreate:
         """
         Extract structured information from CV text using OpenAI.
         
         Args:
             cv_text: Raw text extracted from CV
+            sections: Optional section name -> text mapping from CVProcessor.extract_document
+            bypass_cache: Call the LLM even for chunks already in the response cache
             
         Returns:
             CandidateCreate: Structured candidate information
@@ -368,48 +549,114 @@ class InformationExtractor:
             Exception: If extraction fails
         """
         try:
-            # Preprocess text
-            cv_text = self._preprocess_text(cv_text)
-            
-            # Split text if too long
-            text_chunks = self._split_long_text(cv_text)
-            
-            # Process each chunk
-            all_results = []
-            for chunk in text_chunks:
-                result = self._extract_from_chunk(chunk)
-                all_results.append(result)
-            
-            # Combine results
-            candidate_dict = self._combine_results(all_results)
-            
-            # Remove any extra fields that aren't in CandidateCreate
-            candidate_dict.pop('experience_embedding', None)
-            candidate_dict.pop('skills_embedding', None)
+            plan = self.plan_extraction(cv_text, sections)
             
-            # Convert all HttpUrl objects to strings before creating CandidateCreate
-            candidate_dict = self.convert_httpurl_to_str(candidate_dict)
+            # Process all chunks concurrently
+            all_results = self._extract_from_chunks(plan.chunks, bypass_cache, plan.lite)
             
-            # Create final CandidateCreate instance
-            return CandidateCreate(**candidate_dict)
+            return self.finalize(all_results, plan)
             
         except Exception as e:
             logger.error(f"Error extracting information from CV: {str(e)}")
             raise
 
-    @lru_cache(maxsize=100)
+    def plan_extraction(self, cv_text: str, sections: Optional[Dict[str, str]] = None) -> ExtractionPlan:
+        """
+        Decide what to send to the LLM for a CV.
+
+        Contact details are found with rules and kept out of the LLM input,
+        the remaining text is packed into token-budgeted chunks, and short
+        simple CVs are marked for the lite schema.
+        """
+        # Find contact details with rules and keep them out of the LLM input
+        if sections and sections.get("contact"):
+            prefill = extract_contact(sections["contact"])
+            sections = {**sections, "contact": strip_contact(sections["contact"], prefill)}
+        else:
+            # Only the head of the CV stands in for the contact block; emails and
+            # phones further down belong to employers or referees
+            head = cv_text[:CONTACT_SCAN_CHARS]
+            if len(cv_text) > CONTACT_SCAN_CHARS:
+                # Cut at whitespace so no email or phone number straddles the boundary
+                cut = max(head.rfind(c) for c in " \n\t")
+                if cut > 0:
+                    head = head[:cut]
+            prefill = extract_contact(head)
+            cv_text = f"{strip_contact(head, prefill)} {cv_text[len(head):].lstrip()}".strip()
+
+        # Preprocess text, keeping only the relevant sections when known,
+        # and pack it into as few token-budgeted chunks as possible,
+        # splitting at section boundaries first
+        chunks = pack_chunks(
+            self._build_llm_blocks(cv_text, sections),
+            settings.LLM_CHUNK_TOKEN_BUDGET,
+            settings.OPENAI_MODEL
+        )
+
+        # Short CVs with only contact, experience and skills need a much smaller schema
+        lite = bool(
+            prefill.email
+            and sections
+            and len(chunks) == 1
+            and not any(sections.get(name) for name in LITE_EXCLUDED_SECTIONS)
+            and count_tokens(chunks[0], settings.OPENAI_MODEL) <= settings.LLM_LITE_MAX_TOKENS
+        )
+        return ExtractionPlan(chunks=chunks, lite=lite, prefill=prefill)
+
+    def finalize(self, results: List[Dict[str, Any]], plan: ExtractionPlan) -> CandidateCreate:
+        """Combine the per-chunk results of a plan into the candidate."""
+        candidate_dict = self._combine_results(results)
+
+        # Rule-based contact details win over the model's
+        if plan.prefill.email:
+            candidate_dict['email'] = plan.prefill.email
+        if plan.prefill.phone:
+            candidate_dict['phone'] = plan.prefill.phone
+        
+        # Remove any extra fields that aren't in CandidateCreate
+        candidate_dict.pop('experience_embedding', None)
+        candidate_dict.pop('skills_embedding', None)
+        
+        # Convert all HttpUrl objects to strings before creating CandidateCreate
+        candidate_dict = self.convert_httpurl_to_str(candidate_dict)
+        candidate_dict = self.dates_to_datetimes(candidate_dict)
+        
+        # Create final CandidateCreate instance
+        return CandidateCreate(**candidate_dict)
+
     def _get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text with caching."""
+        """
+        Get embedding for text through the shared embedding cache.
+
+        Never answers with the fallback provider: these vectors are stored.
+        """
         # Clean and normalize text first
         text = ' '.join(text.split())
         if not text:
             return []
-            
-        try:
-            return self.embedding_model.embed_query(text)
-        except Exception as e:
-            logger.error(f"Error generating embedding: {str(e)}")
-            return []
+        return embed_cached([text], settings.EMBEDDING_MODEL)[0]
+
+    def experience_text(self, work_experience: List[Dict[str, Any]]) -> str:
+        """Text embedded for a candidate's work experience."""
+        # Only use the most recent experiences to keep text length manageable
+        recent_experiences = sorted(
+            work_experience or [],
+            key=lambda x: str(x.get('start_date') or '1900-01-01'),
+            reverse=True
+        )[:3]  # Only use 3 most recent experiences
+
+        return " ".join([
+            f"{exp['position']} at {exp['company']}: {exp['description']}"
+            for exp in recent_experiences
+        ])
+
+    def skills_text(self, skills: List[str]) -> str:
+        """Text embedded for a candidate's skills."""
+        return " ".join(skills[:20])  # Limit to top 20 skills
+
+    def warm_skills_embedding(self, skills: List[str]) -> None:
+        """Embed the skills text ahead of generate_embeddings, which then hits the cache."""
+        self._get_embedding(self.skills_text(skills))
 
     def generate_embeddings(self, candidate: CandidateCreate, cv_text: str) -> dict:
         """
@@ -421,40 +668,33 @@ class InformationExtractor:
             
         Returns:
             dict: Dictionary containing the embeddings with at least 1 dimension
+
+        Raises:
+            Exception: If the embedding model fails; the candidate must not be
+                stored with placeholder or fallback vectors
         """
         try:
             # Convert candidate to dict for processing
             candidate_dict = candidate.model_dump()
             
             # Generate experience embedding from work experience descriptions
-            # Only use the most recent experiences to keep text length manageable
-            recent_experiences = sorted(
-                candidate_dict["work_experience"],
-                key=lambda x: x.get('start_date', '1900-01-01'),
-                reverse=True
-            )[:3]  # Only use 3 most recent experiences
-            
-            experience_text = " ".join([
-                f"{exp['position']} at {exp['company']}: {exp['description']}"
-                for exp in recent_experiences
-            ])
+            experience_text = self.experience_text(candidate_dict["work_experience"])
             
             # Generate skills embedding - limit to top skills to keep text length manageable
-            skills_text = " ".join(candidate_dict["skills"][:20])  # Limit to top 20 skills
+            skills_text = self.skills_text(candidate_dict["skills"])
             
             # Get embeddings with caching
             experience_embedding = self._get_embedding(experience_text)
             skills_embedding = self._get_embedding(skills_text)
             
-            # Ensure we have valid embeddings with at least 1 dimension
-            # If empty or invalid, use a fallback embedding
+            # Candidates without experience or skills text get zero vectors
             if not experience_embedding or len(experience_embedding) == 0:
-                # Use a simple fallback embedding with 1536 dimensions (standard OpenAI embedding size)
-                experience_embedding = [0.0] * 1536
+                # Use a simple fallback embedding with the configured vector dimension
+                experience_embedding = [0.0] * settings.VECTOR_DIMENSION
                 
             if not skills_embedding or len(skills_embedding) == 0:
-                # Use a simple fallback embedding with 1536 dimensions
-                skills_embedding = [0.0] * 1536
+                # Use a simple fallback embedding with the configured vector dimension
+                skills_embedding = [0.0] * settings.VECTOR_DIMENSION
             
             return {
                 "experience_embedding": experience_embedding,
@@ -463,8 +703,22 @@ class InformationExtractor:
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
-            # Return fallback embeddings with 1536 dimensions in case of error
-            return {
-                "experience_embedding": [0.0] * 1536,
-                "skills_embedding": [0.0] * 1536
-            }
\ No newline at end of file
+            raise
+
+
+_extractor: Optional[InformationExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_information_extractor() -> InformationExtractor:
+    """
+    Get the process-wide information extractor.
+
+    The extractor keeps no per-request state, so one instance serves all
+    concurrent requests and its embedding cache stays warm.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = InformationExtractor()
+        return _extractor
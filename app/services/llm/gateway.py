@@ -0,0 +1,438 @@
+"""
+Shared, rate-limit-aware gateway for every OpenAI call the application makes.
+
+All chat completions and embeddings go through one ``AsyncOpenAI`` client
+running on a dedicated event loop thread. A single limiter sits in front of
+it and:
+
+- adapts the number of requests in flight AIMD-style: one more slot per
+  window of successful calls, half as many after a 429;
+- reads the ``x-ratelimit-*`` response headers and waits for the reset
+  when the requests-per-minute or tokens-per-minute budget runs out;
+- hands free slots to interactive work (searches, single uploads) first,
+  while guaranteeing bulk ingestion a share so it is never starved.
+
+Transient failures are retried with jittered exponential backoff.
+
+Synchronous callers (worker threads) use ``chat()``/``embed()``; code already
+running on an event loop uses ``chat_async()``/``chat_stream()``/``embed_async()``.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Mapping, Optional
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from app.core.config import settings
+from app.core.metrics import record_retry, span
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=INTERACTIVE)
+
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_STREAM_END = object()
+
+
+@contextmanager
+def priority(level: str) -> Iterator[None]:
+    """
+    Run LLM calls made inside the block at the given priority.
+
+    The priority is a context variable: it orders calls within this process
+    only, and threads started inside the block need the context copied
+    (contextvars.copy_context().run) to inherit it.
+
+    Example:
+        with priority(BULK):
+            pipeline.ingest_file(path)
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit reset durations such as "1s", "6m0s" or "20ms" to seconds."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter with a fair two-level queue.
+
+    Priorities only order calls within this process. Bulk jobs run as
+    separate CLI processes, so to leave rate limit headroom for the API
+    server their calls can also be paced to bulk_requests_per_minute.
+
+    Must only be used from the gateway's event loop.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        bulk_share: int = 4,
+        bulk_requests_per_minute: int = 0
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        # When both queues are waiting, every bulk_share-th slot goes to bulk work
+        self.bulk_share = bulk_share
+        self.in_flight = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {INTERACTIVE: deque(), BULK: deque()}
+        self._interactive_streak = 0
+        self._bulk_interval = 60.0 / bulk_requests_per_minute if bulk_requests_per_minute else 0.0
+        self._next_bulk_at = 0.0
+        self._paused_until = 0.0
+        self._remaining_tokens: Optional[int] = None
+        self._tokens_reset_at = 0.0
+
+    async def acquire(self, level: str, estimated_tokens: int = 0) -> None:
+        """Wait for a slot, then for the rate-limit budget to allow the call."""
+        if level == BULK and self._bulk_interval:
+            await self._pace_bulk()
+        if self.in_flight < int(self.limit) and not any(self._waiters.values()):
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            queue = self._waiters[level if level in self._waiters else INTERACTIVE]
+            queue.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before cancellation
+                    self.release()
+                else:
+                    try:
+                        queue.remove(waiter)
+                    except ValueError:
+                        # Already popped by _wake, which skips cancelled waiters
+                        pass
+                raise
+
+        try:
+            await self._wait_for_budget(estimated_tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    async def _pace_bulk(self) -> None:
+        """Space bulk calls evenly, before they take a slot."""
+        now = time.monotonic()
+        start = max(now, self._next_bulk_at)
+        self._next_bulk_at = start + self._bulk_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _wait_for_budget(self, estimated_tokens: int) -> None:
+        while True:
+            now = time.monotonic()
+            delay = self._paused_until - now
+            if (
+                self._remaining_tokens is not None
+                and estimated_tokens > self._remaining_tokens
+                and self._tokens_reset_at > now
+            ):
+                delay = max(delay, self._tokens_reset_at - now)
+            if delay <= 0:
+                if self._remaining_tokens is not None:
+                    self._remaining_tokens -= estimated_tokens
+                return
+            await asyncio.sleep(delay)
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next waiter, interactive first."""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self.in_flight < int(self.limit):
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.cancelled():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        interactive, bulk = self._waiters[INTERACTIVE], self._waiters[BULK]
+        if interactive and (not bulk or self._interactive_streak < self.bulk_share - 1):
+            self._interactive_streak += 1
+            return interactive.popleft()
+        if bulk:
+            self._interactive_streak = 0
+            return bulk.popleft()
+        return None
+
+    def on_success(self) -> None:
+        """Additive increase: about one extra slot per limit's worth of successful calls."""
+        self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+        self._wake()
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        """Multiplicative decrease, and stop sending until the limit resets."""
+        self.limit = max(float(self.minimum), self.limit / 2)
+        pause = retry_after if retry_after is not None else 1.0
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning(f"OpenAI rate limit hit, concurrency lowered to {int(self.limit)}, pausing {pause:.1f}s")
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Track the request and token budgets reported by the API."""
+        now = time.monotonic()
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        if remaining_requests is not None and remaining_requests <= 0:
+            reset = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._paused_until = max(self._paused_until, now + reset)
+
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+        if remaining_tokens is not None:
+            self._remaining_tokens = remaining_tokens
+            reset = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            self._tokens_reset_at = now + (reset or 0.0)
+
+
+class LLMGateway:
+    """Process-wide OpenAI client with adaptive rate limiting, retries and priorities."""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        self.limiter = AdaptiveLimiter(
+            initial=settings.LLM_INITIAL_CONCURRENCY,
+            maximum=settings.LLM_MAX_CONCURRENCY,
+            bulk_share=settings.LLM_BULK_SHARE,
+            bulk_requests_per_minute=settings.LLM_BULK_REQUESTS_PER_MINUTE
+        )
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the event loop thread."""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+
+    def probe(self, timeout: float = 10.0) -> bool:
+        """
+        Check that the API is reachable with the configured key.
+
+        Also opens the HTTP connection, so the first real call does not pay
+        for the TLS handshake. Never raises.
+        """
+        try:
+            self._submit(self._client.models.retrieve(settings.OPENAI_MODEL)).result(timeout=timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"OpenAI health probe failed: {str(e)}")
+            return False
+
+    def _submit(self, coroutine: Awaitable[Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _call(
+        self,
+        name: str,
+        request: Callable[[], Awaitable[Any]],
+        level: str,
+        estimated_tokens: int,
+        keep_slot: bool = False
+    ) -> Any:
+        """
+        Run a raw-response API call under the limiter, retrying transient errors.
+
+        With keep_slot the limiter slot stays taken after a successful call,
+        for streams that are still being read; the caller must release it.
+        """
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(settings.LLM_MAX_RETRIES),
+            wait=wait_random_exponential(multiplier=0.5, max=30),
+            retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+            before_sleep=lambda state: record_retry(name),
+            reraise=True
+        )
+        async for attempt in retrying:
+            with attempt:
+                await self.limiter.acquire(level, estimated_tokens)
+                try:
+                    raw = await request()
+                    self.limiter.observe_headers(raw.headers)
+                    result = raw.parse()
+                except RateLimitError as e:
+                    retry_after = None
+                    if getattr(e, "response", None) is not None:
+                        retry_after = _parse_duration(e.response.headers.get("x-ratelimit-reset-requests"))
+                        header = e.response.headers.get("retry-after")
+                        if header:
+                            try:
+                                retry_after = float(header)
+                            except ValueError:
+                                pass
+                    self.limiter.on_rate_limited(retry_after)
+                    self.limiter.release()
+                    raise
+                except BaseException:
+                    self.limiter.release()
+                    raise
+                if not keep_slot:
+                    self.limiter.release()
+                self.limiter.on_success()
+                return result
+
+    @staticmethod
+    def _estimate_chat_tokens(kwargs: Dict[str, Any]) -> int:
+        # Rough cost for the tokens-per-minute budget: prompt characters / 4 plus the output reservation
+        estimated = sum(len(str(message.get("content") or "")) for message in kwargs.get("messages", [])) // 4
+        return estimated + (kwargs.get("max_tokens") or 0)
+
+    async def _chat(self, level: str, kwargs: Dict[str, Any]) -> Any:
+        return await self._call(
+            "llm.chat",
+            lambda: self._client.chat.completions.with_raw_response.create(**kwargs),
+            level,
+            self._estimate_chat_tokens(kwargs)
+        )
+
+    async def _chat_stream(self, level: str, kwargs: Dict[str, Any], emit: Callable[[Any], None]) -> None:
+        """Open a streamed completion and pass each chunk to emit, holding a slot until it ends."""
+        stream = await self._call(
+            "llm.chat",
+            lambda: self._client.chat.completions.with_raw_response.create(stream=True, **kwargs),
+            level,
+            self._estimate_chat_tokens(kwargs),
+            keep_slot=True
+        )
+        try:
+            # Only opening the stream is retried; chunks already emitted cannot be taken back
+            async for chunk in stream:
+                emit(chunk)
+        finally:
+            self.limiter.release()
+            await stream.close()
+
+    async def _embed(self, level: str, texts: List[str], model: str) -> List[List[float]]:
+        estimated = sum(len(text) for text in texts) // 4
+        response = await self._call(
+            "llm.embed",
+            lambda: self._client.embeddings.with_raw_response.create(input=texts, model=model),
+            level,
+            estimated
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def chat(self, **kwargs: Any) -> Any:
+        """Create a chat completion, blocking the calling thread. Takes the OpenAI create() arguments."""
+        return self._submit(self._chat(_priority.get(), kwargs)).result()
+
+    async def chat_async(self, **kwargs: Any) -> Any:
+        """Create a chat completion from another event loop."""
+        return await asyncio.wrap_future(self._submit(self._chat(_priority.get(), kwargs)))
+
+    async def chat_stream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Stream a chat completion from another event loop, yielding its chunks.
+
+        Chunks are handed over from the gateway's loop as they arrive. Closing
+        the iterator early cancels the request.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        future = self._submit(
+            self._chat_stream(_priority.get(), kwargs, lambda chunk: loop.call_soon_threadsafe(queue.put_nowait, chunk))
+        )
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+            # Raise whatever ended the stream early
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Embed a batch of texts, blocking the calling thread."""
+        with span("llm.embedding"):
+            return self._submit(
+                self._embed(_priority.get(), texts, model or settings.EMBEDDING_MODEL)
+            ).result()
+
+    async def embed_async(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Embed a batch of texts from another event loop."""
+        with span("llm.embedding"):
+            return await asyncio.wrap_future(
+                self._submit(self._embed(_priority.get(), texts, model or settings.EMBEDDING_MODEL))
+            )
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the process-wide LLM gateway."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+def shutdown_llm_gateway() -> None:
+    """Close the process-wide LLM gateway if it was started."""
+    global _gateway
+    with _gateway_lock:
+        gateway, _gateway = _gateway, None
+    if gateway is not None:
+        gateway.close()
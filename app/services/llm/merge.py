@@ -0,0 +1,145 @@
+"""
+Merging of the per-chunk extraction results of one CV.
+
+Overlapping chunks often describe the same job or degree twice, once in
+full and once partially, or with different spacing and case. Entries are
+therefore matched on a normalized identity tuple rather than on exact
+equality, and duplicates are merged field by field. Every list is merged in
+a single pass with a dict lookup per entry, so combining is linear in the
+number of entries.
+"""
+import re
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+LIST_FIELDS = ("education", "work_experience", "skills", "projects", "certifications")
+
+
+def normalize_text(value: Any) -> str:
+    """Case-fold, drop punctuation and collapse whitespace, for comparing names."""
+    if value is None:
+        return ""
+    return " ".join(_PUNCTUATION_RE.sub(" ", str(value)).casefold().split())
+
+
+def normalize_name(value: Any) -> str:
+    """Case-fold and collapse whitespace only, so "C", "C#" and "C++" stay distinct skills."""
+    return " ".join(str(value).casefold().split()) if value is not None else ""
+
+
+def _month(value: Any) -> str:
+    """Compare dates at month precision; chunks disagree on the day more often than not."""
+    return str(value)[:7] if value else ""
+
+
+# Fields identifying the same entry across chunks, per list field
+IDENTITY_KEYS: Dict[str, Callable[[Dict[str, Any]], Tuple[Hashable, ...]]] = {
+    "work_experience": lambda entry: (
+        normalize_text(entry.get("company")),
+        normalize_text(entry.get("position")),
+        _month(entry.get("start_date")),
+    ),
+    "education": lambda entry: (
+        normalize_text(entry.get("institution")),
+        normalize_text(entry.get("degree")),
+    ),
+    "projects": lambda entry: (normalize_text(entry.get("name")),),
+    "certifications": lambda entry: (
+        normalize_text(entry.get("name")),
+        normalize_text(entry.get("issuer")),
+    ),
+}
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def _merge_unique(existing: List[Any], new: Iterable[Any]) -> List[Any]:
+    """Append the items of new not already in existing, by normalized name, keeping order."""
+    seen = {normalize_name(item) for item in existing}
+    for item in new:
+        key = normalize_name(item)
+        if key not in seen:
+            seen.add(key)
+            existing.append(item)
+    return existing
+
+
+def _merge_entry(target: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Fill the fields of target that other knows and target does not."""
+    for name, value in other.items():
+        current = target.get(name)
+        if _is_empty(current):
+            target[name] = list(value) if isinstance(value, list) else value
+        elif isinstance(current, list) and isinstance(value, list):
+            _merge_unique(current, value)
+        elif isinstance(current, str) and isinstance(value, str) and len(value) > len(current):
+            # Keep the fuller of two versions of the same text, e.g. a cut-off description,
+            # but not a mere spelling variant such as "ACME  corp." for "Acme Corp"
+            current_key, value_key = normalize_text(current), normalize_text(value)
+            if current_key != value_key and current_key in value_key:
+                target[name] = value
+
+
+def merge_entries(field: str, lists: Iterable[Optional[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Merge the entries of one list field from several chunks.
+
+    Args:
+        field: List field name, one of IDENTITY_KEYS
+        lists: The field's value in each chunk result, in chunk order
+
+    Returns:
+        List[Dict[str, Any]]: One entry per identity, in first-seen order
+    """
+    identity = IDENTITY_KEYS[field]
+    merged: Dict[Tuple[Hashable, ...], Dict[str, Any]] = {}
+    for entries in lists:
+        for entry in entries or []:
+            key = identity(entry)
+            if key in merged:
+                _merge_entry(merged[key], entry)
+            else:
+                merged[key] = {
+                    name: list(value) if isinstance(value, list) else value
+                    for name, value in entry.items()
+                }
+    return list(merged.values())
+
+
+def merge_skills(lists: Iterable[Optional[List[str]]]) -> List[str]:
+    """Deduplicate skills by normalized name, keeping the first spelling and the original order."""
+    merged: Dict[str, str] = {}
+    for skills in lists:
+        for skill in skills or []:
+            key = normalize_name(skill)
+            if key and key not in merged:
+                merged[key] = skill.strip()
+    return list(merged.values())
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the extraction results of all chunks of a CV.
+
+    Scalar fields take the first non-empty value in chunk order; list fields
+    are merged with merge_entries and merge_skills.
+
+    Raises:
+        ValueError: If there are no results
+    """
+    if not results:
+        raise ValueError("No results to combine")
+
+    combined: Dict[str, Any] = {}
+    for result in results:
+        for name, value in result.items():
+            if name not in LIST_FIELDS and _is_empty(combined.get(name)):
+                combined[name] = value
+
+    combined["skills"] = merge_skills(result.get("skills") for result in results)
+    for field in IDENTITY_KEYS:
+        combined[field] = merge_entries(field, (result.get(field) for result in results))
+    return combined
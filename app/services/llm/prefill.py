@@ -0,0 +1,145 @@
+"""
+Rule-based pre-extraction that runs before the LLM.
+
+Emails, phone numbers and profile links are found with compiled regexes and
+filled in directly, then removed from the text sent to the model. Dates and
+date ranges are rewritten to ISO form in place, so the model copies them
+instead of interpreting "Mar 2019 – present" itself.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\w+])(?:\+|00)?\d[\d\s().-]{6,22}\d(?!\w)")
+URL_RE = re.compile(r"\b(?:https?://|www\.)[^\s<>\"')]+|\b(?:linkedin|github|gitlab)\.com/[^\s<>\"')]+", re.IGNORECASE)
+PROFILE_URL_RE = re.compile(r"(?:linkedin|github|gitlab)\.com/", re.IGNORECASE)
+
+_MONTHS = {
+    # English
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8, "sep": 9, "sept": 9,
+    "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+    # French
+    "janv": 1, "janvier": 1, "févr": 2, "fev": 2, "février": 2, "fevrier": 2, "mars": 3, "avr": 4,
+    "avril": 4, "mai": 5, "juin": 6, "juil": 7, "juillet": 7, "août": 8, "aout": 8, "déc": 12,
+    "décembre": 12, "decembre": 12, "octobre": 10, "novembre": 11, "septembre": 9,
+}
+_PRESENT_WORDS = (
+    "present", "current", "now", "today", "ongoing",
+    "aujourd'hui", "présent", "actuel", "hiện tại", "nay",
+)
+
+_MONTH_NAMES = "|".join(sorted((re.escape(name) for name in _MONTHS), key=len, reverse=True))
+_DATE = (
+    rf"(?:\b(?:{_MONTH_NAMES})\.?\s+(?:19|20)\d{{2}}"   # Mar 2019, mars 2019, not "Omar 2019"
+    r"|(?:0?[1-9]|1[0-2])[/.-](?:19|20)\d{2}"           # 03/2019, 3.2019
+    r"|(?:19|20)\d{2}[/.-](?:0?[1-9]|1[0-2])(?!\d)"    # 2019-03
+    r"|(?:tháng\s+)?(?:0?[1-9]|1[0-2])\s*/\s*(?:19|20)\d{2}"  # tháng 3/2019
+    r"|(?:19|20)\d{2})"                                  # 2019
+)
+_PRESENT = "|".join(re.escape(word) for word in _PRESENT_WORDS)
+DATE_RANGE_RE = re.compile(
+    rf"(?<!\d)(?P<start>{_DATE})\s*(?:-|–|—|to|until|à|au|đến)\s*(?P<end>{_DATE}|(?:{_PRESENT})\b)(?!\d)",
+    re.IGNORECASE
+)
+_DATE_PARTS_RE = re.compile(r"(?:19|20)\d{2}|\d{1,2}|[^\W\d_]+", re.UNICODE)
+
+
+@dataclass
+class Prefill:
+    """Fields found by the rule-based pass."""
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    urls: List[str] = field(default_factory=list)
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """
+    Normalize a phone number to "+<digits>" or "<digits>", or None if it is not one.
+
+    The result always satisfies the CandidateCreate phone validator.
+    """
+    digits = re.sub(r"\D", "", raw)
+    international = raw.lstrip().startswith(("+", "00"))
+    if raw.lstrip().startswith("00"):
+        digits = digits[2:]
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}" if international else digits
+
+
+def parse_date(text: str) -> Optional[str]:
+    """Parse a CV date such as "Mar 2019", "03/2019" or "2019" to YYYY-MM-DD (day 01)."""
+    year = None
+    month = 1
+    for part in _DATE_PARTS_RE.findall(text.lower()):
+        if len(part) == 4 and part.isdigit():
+            year = int(part)
+        elif part.isdigit():
+            month = int(part)
+        elif part.rstrip(".") in _MONTHS:
+            month = _MONTHS[part.rstrip(".")]
+    if year is None or not 1 <= month <= 12:
+        return None
+    return f"{year:04d}-{month:02d}-01"
+
+
+def _rewrite_range(match: re.Match) -> str:
+    start = parse_date(match.group("start"))
+    end = match.group("end")
+    end_iso = None if end.lower() in _PRESENT_WORDS else parse_date(end)
+    if start is None:
+        return match.group(0)
+    return f"{start} to {end_iso or 'present'}"
+
+
+def rewrite_dates(text: str) -> str:
+    """Rewrite every date range in a text to "YYYY-MM-DD to YYYY-MM-DD|present"."""
+    return DATE_RANGE_RE.sub(_rewrite_range, text)
+
+
+def normalize_url(url: str) -> str:
+    url = url.rstrip(".,;:")
+    return url if re.match(r"https?://", url, re.IGNORECASE) else f"https://{url}"
+
+
+def extract_contact(contact_text: str) -> Prefill:
+    """
+    Find the email, phone number and links in the contact part of a CV.
+
+    Args:
+        contact_text: Contact section, or the start of the CV when there are no sections
+
+    Returns:
+        Prefill: The fields that could be found
+    """
+    result = Prefill()
+    email = EMAIL_RE.search(contact_text)
+    if email:
+        result.email = email.group(0).lower()
+
+    # Date ranges look like phone numbers to a loose regex, so drop them first
+    without_dates = DATE_RANGE_RE.sub(" ", EMAIL_RE.sub(" ", URL_RE.sub(" ", contact_text)))
+    for match in PHONE_RE.finditer(without_dates):
+        phone = normalize_phone(match.group(0))
+        if phone:
+            result.phone = phone
+            break
+
+    result.urls = [normalize_url(url) for url in URL_RE.findall(contact_text)]
+    return result
+
+
+def strip_contact(contact_text: str, prefill: Prefill) -> str:
+    """Remove what the rule-based pass already found from the contact text sent to the LLM."""
+    text = contact_text
+    if prefill.email:
+        text = EMAIL_RE.sub(" ", text)
+    # Profile links are not part of the schema; other links may be project URLs
+    text = URL_RE.sub(lambda m: " " if PROFILE_URL_RE.search(m.group(0)) else normalize_url(m.group(0)), text)
+    if prefill.phone:
+        text = PHONE_RE.sub(
+            lambda m: " " if normalize_phone(m.group(0)) == prefill.phone else m.group(0), text
+        )
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Type
+from pydantic import BaseModel
+from app.schemas.candidate import CandidateCreate
+
+EXTRACTION_FUNCTION_NAME = "record_candidate"
+
+# Fields the LLM fills in for short, simple CVs; contact details come from the rule-based pass
+LITE_FIELDS = ("full_name", "location", "work_experience", "skills")
+
+# JSON schema keywords that only add tokens without guiding the model
+_DROPPED_KEYS = {"title", "default"}
+
+
+def _compact(node: Any, definitions: Dict[str, Any]) -> Any:
+    """Inline $refs, collapse Optional[X] to a nullable X and drop titles and defaults."""
+    if isinstance(node, list):
+        return [_compact(item, definitions) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    if "$ref" in node:
+        return _compact(definitions[node["$ref"].rsplit("/", 1)[-1]], definitions)
+
+    options = node.get("anyOf")
+    if options is not None:
+        non_null = [option for option in options if option.get("type") != "null"]
+        if len(non_null) == 1 and len(non_null) < len(options):
+            compacted = _compact(non_null[0], definitions)
+            if isinstance(compacted.get("type"), str):
+                compacted = {**compacted, "type": [compacted["type"], "null"]}
+            return compacted
+
+    compacted = {}
+    for key, value in node.items():
+        if key in _DROPPED_KEYS or key == "$defs":
+            continue
+        if key == "format" and value == "date-time":
+            # Dates are all the model needs to produce; times are never in a CV
+            value = "date"
+        compacted[key] = _compact(value, definitions)
+    return compacted
+
+
+def compact_json_schema(model: Type[BaseModel], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Build a compact, self-contained JSON schema for a Pydantic model.
+
+    Args:
+        model: The Pydantic model to describe
+        exclude: Top-level fields the model should not fill in
+
+    Returns:
+        Dict[str, Any]: JSON schema without $refs, titles or defaults
+    """
+    schema = model.model_json_schema()
+    compacted = _compact(schema, schema.get("$defs", {}))
+    for name in exclude:
+        compacted.get("properties", {}).pop(name, None)
+        if name in compacted.get("required", []):
+            compacted["required"].remove(name)
+    return compacted
+
+
+@lru_cache()
+def extraction_tool(lite: bool = False) -> Dict[str, Any]:
+    """
+    Function-calling tool definition the LLM fills in with the candidate's data.
+
+    Args:
+        lite: Only ask for LITE_FIELDS, for CVs whose other fields are found without the LLM
+    """
+    parameters = compact_json_schema(CandidateCreate, exclude=("cv_file_id", "cv_sha256"))
+    if lite:
+        parameters["properties"] = {
+            name: value for name, value in parameters["properties"].items() if name in LITE_FIELDS
+        }
+        parameters["required"] = [name for name in parameters.get("required", []) if name in LITE_FIELDS]
+    return {
+        "type": "function",
+        "function": {
+            "name": EXTRACTION_FUNCTION_NAME,
+            "description": "Record the candidate information found in a CV.",
+            "parameters": parameters,
+        },
+    }
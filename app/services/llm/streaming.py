@@ -0,0 +1,144 @@
+"""
+Incremental parsing of the extraction function call while it streams.
+
+The model writes the candidate as one JSON object. Rather than waiting for
+the closing brace, the parser scans each delta as it arrives and reports
+every top-level field as soon as its value is complete, and every element
+of a top-level array (one work experience, one skill) as soon as that
+element closes.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+
+@dataclass
+class JSONEvent:
+    """A completed part of the streamed object."""
+    key: str
+    value: Any
+    # True for one element of the array in `key`, False for the complete field
+    item: bool = False
+
+
+class IncrementalJSONParser:
+    """
+    Scan a JSON object fed in fragments and emit its parts as they close.
+
+    Only the structure is tracked while scanning; each completed value is
+    then decoded once with json.loads, so the cost stays linear in the
+    length of the output.
+
+    Example:
+        parser = IncrementalJSONParser()
+        for delta in deltas:
+            for event in parser.feed(delta):
+                ...
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._literal_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the top-level object has been closed."""
+        return self._pos > 0 and not self._stack
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def _in_top_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1] == "["
+
+    def _begin(self, index: int) -> None:
+        """A string, container or literal starts at index, at the current depth."""
+        depth = len(self._stack)
+        if depth == 1:
+            if self._expect_key:
+                self._key_start = index
+            else:
+                self._value_start = index
+        elif self._in_top_array():
+            self._item_start = index
+
+    def _end(self, end: int, events: List[JSONEvent]) -> None:
+        """The value begun at the current depth ends just before end."""
+        depth = len(self._stack)
+        if depth == 1:
+            if self._key_start is not None:
+                self._key = json.loads(self._text[self._key_start:end])
+                self._key_start = None
+            elif self._value_start is not None:
+                events.append(JSONEvent(self._key, json.loads(self._text[self._value_start:end])))
+                self._value_start = None
+        elif self._in_top_array() and self._item_start is not None:
+            events.append(JSONEvent(self._key, json.loads(self._text[self._item_start:end]), item=True))
+            self._item_start = None
+
+    def _end_literal(self, end: int, events: List[JSONEvent]) -> None:
+        if self._literal_start is not None:
+            self._literal_start = None
+            self._end(end, events)
+
+    def feed(self, fragment: str) -> List[JSONEvent]:
+        """
+        Add the next fragment of output.
+
+        Returns:
+            List[JSONEvent]: Fields and array elements completed by this fragment
+        """
+        events: List[JSONEvent] = []
+        self._text += fragment
+        text = self._text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end(index + 1, events)
+                continue
+            if char.isspace():
+                continue
+
+            if char == '"':
+                self._begin(index)
+                self._in_string = True
+            elif char in "{[":
+                self._begin(index)
+                self._stack.append(char)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+            elif char in "}]":
+                self._end_literal(index, events)
+                if self._stack:
+                    self._stack.pop()
+                self._end(index + 1, events)
+            elif char == ",":
+                self._end_literal(index, events)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+            elif char == ":":
+                if len(self._stack) == 1:
+                    self._expect_key = False
+            elif self._literal_start is None:
+                # Numbers, true, false and null run until the next delimiter
+                self._begin(index)
+                self._literal_start = index
+        self._pos = len(text)
+        return events
@@ -4,7 +4,8 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from app.db.models import Candidate, Skill
 from app.core.config import settings
-from app.services.llm.extractor import InformationExtractor
+from app.services.llm.extractor import get_information_extractor
+from app.services.llm.embedding_cache import embed_cached
 import logging
 import numpy as np
 
@@ -13,7 +14,7 @@ logger = logging.getLogger(__name__)
 class SearchService:
     def __init__(self, db: Session):
         self.db = db
-        self.extractor = InformationExtractor()
+        self.extractor = get_information_extractor()
     
     async def semantic_search(
         self,
@@ -42,7 +43,7 @@ class SearchService:
         """
         try:
             # Generate query embedding
-            query_embedding = self.extractor.embedding_model.embed_query(query)
+            query_embedding = embed_cached([query], settings.EMBEDDING_MODEL)[0]
             
             # Build base query
             base_query = self.db.query(Candidate)
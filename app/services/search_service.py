@@ -1,14 +1,22 @@
 from typing import List, Optional, Tuple
 from supabase import Client
 from app.schemas.candidate import CandidateResponse, CandidateDetail
-from app.services.embedding_service import generate_query_embeddings
+from app.core.config import settings
+from app.services.embedding_service import generate_query_embeddings, query_prompts
+from app.services.embeddings import transport
+from app.services.embeddings.base import EmbeddingProvider
+from app.services.embeddings.factory import get_fallback_embedding_provider
+from app.services.llm.extractor import get_information_extractor
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 class SearchService:
     def __init__(self, supabase: Client):
         self.supabase = supabase
+        # Set by semantic_search when it had to rank with the fallback embedding model
+        self.degraded = False
 
     def semantic_search(
         self,
@@ -23,14 +31,29 @@ class SearchService:
         """
         Perform semantic search using vector similarity on experience and skills embeddings,
         with filters compatible with Supabase schema.
+
+        If the query cannot be embedded and settings.EMBEDDING_FALLBACK_MODEL is
+        set, the filtered candidates are ranked with the fallback model instead
+        and self.degraded is set.
         """
         try:
             # Generate embeddings for the search query
-            experience_embedding, skills_embedding = generate_query_embeddings(query)
-
-            # Start with base query
+            fallback = None
+            try:
+                experience_embedding, skills_embedding = generate_query_embeddings(query)
+            except Exception as e:
+                fallback = get_fallback_embedding_provider()
+                if fallback is None:
+                    raise
+                logger.warning(f"Query embedding failed, searching in degraded mode with {fallback.model_id}: {str(e)}")
+                self.degraded = True
+
+            # Start with base query; packed transports fetch the vectors separately,
+            # and degraded mode does not use the stored vectors at all
+            packed = settings.EMBEDDING_TRANSPORT in transport.PACKED_FUNCTIONS
+            columns = 'id' if packed or fallback is not None else 'id, experience_embedding, skills_embedding'
             base_query = self.supabase.table('candidates') \
-                .select('id, experience_embedding, skills_embedding')
+                .select(columns)
 
             # Filter: location
             if location:
@@ -106,43 +129,41 @@ class SearchService:
             result = base_query.execute()
             if not result.data:
                 return []
-            candidates_with_scores = []
-            # Debug: print candidate count after filters
-           # print("Candidates after filters:", len(result.data))
-            import json
-            for candidate in result.data:
-                exp_emb = candidate['experience_embedding']
-                skills_emb = candidate['skills_embedding']
 
-                # Parse embeddings if they are JSON strings
-                if isinstance(exp_emb, str):
-                    try:
-                        exp_emb = json.loads(exp_emb)
-                    except Exception as e:
-                        continue
-                if isinstance(skills_emb, str):
-                    try:
-                        skills_emb = json.loads(skills_emb)
-                    except Exception as e:
-                        continue
+            if fallback is not None:
+                return self._rank_with_fallback(query, [row['id'] for row in result.data], fallback, limit)
+
+            if packed:
+                rows = self._get_packed_embeddings([row['id'] for row in result.data])
+                half = settings.EMBEDDING_TRANSPORT == transport.FLOAT16
+                exp_matrix, exp_present = transport.decode_packed(
+                    [row['experience_embedding'] for row in rows], half=half
+                )
+                skills_matrix, skills_present = transport.decode_packed(
+                    [row['skills_embedding'] for row in rows], half=half
+                )
+            else:
+                rows = result.data
+                exp_matrix, exp_present = transport.decode_json(
+                    [row['experience_embedding'] for row in rows], len(experience_embedding)
+                )
+                skills_matrix, skills_present = transport.decode_json(
+                    [row['skills_embedding'] for row in rows], len(skills_embedding)
+                )
+            if not rows:
+                return []
 
-                if exp_emb and skills_emb:
-                    exp_similarity = self._cosine_similarity(
-                        experience_embedding,
-                        exp_emb
-                    )
-                    skills_similarity = self._cosine_similarity(
-                        skills_embedding,
-                        skills_emb
-                    )
-                    avg_similarity = (exp_similarity + skills_similarity) / 2
-                    print(f"Candidate {candidate.get('id')} avg_similarity: {avg_similarity}")
-                    candidates_with_scores.append((candidate['id'], avg_similarity))
+            # Score every candidate at once
+            scores = (
+                transport.cosine_similarities(exp_matrix, experience_embedding)
+                + transport.cosine_similarities(skills_matrix, skills_embedding)
+            ) / 2
 
             # Filter by similarity threshold and sort
             SIMILARITY_THRESHOLD = 0.8
+            keep = exp_present & skills_present & (scores >= SIMILARITY_THRESHOLD)
             filtered_candidates = [
-                (cid, score) for cid, score in candidates_with_scores if score >= SIMILARITY_THRESHOLD
+                (rows[index]['id'], float(scores[index])) for index in keep.nonzero()[0]
             ]
             filtered_candidates.sort(key=lambda x: x[1], reverse=True)
 
@@ -155,6 +176,45 @@ class SearchService:
             logger.error(f"Error in semantic search: {str(e)}")
             raise
 
+    def _rank_with_fallback(
+        self,
+        query: str,
+        candidate_ids: List[int],
+        provider: EmbeddingProvider,
+        limit: int
+    ) -> List[CandidateDetail]:
+        """
+        Rank candidates against the query with the fallback embedding model (degraded mode).
+
+        Stored vectors come from EMBEDDING_MODEL and cannot be compared with a
+        query embedded by another model, so the experience and skills texts of
+        the already filtered candidates are embedded on the spot, in the same
+        space as the query. No similarity threshold applies: it is calibrated
+        for EMBEDDING_MODEL.
+        """
+        candidates = self._get_candidates_by_ids(candidate_ids)
+        if not candidates:
+            return []
+        extractor = get_information_extractor()
+        texts = list(query_prompts(query))
+        for candidate in candidates:
+            data = candidate.model_dump()
+            texts.append(extractor.experience_text(data['work_experience']) or " ")
+            texts.append(extractor.skills_text([skill['name'] for skill in data['skills']]) or " ")
+        vectors = np.asarray(provider.embed(texts), dtype=np.float32)
+        scores = (
+            transport.cosine_similarities(vectors[2::2], vectors[0])
+            + transport.cosine_similarities(vectors[3::2], vectors[1])
+        ) / 2
+        order = np.argsort(-scores, kind="stable")
+        return [candidates[index] for index in order[:limit]]
+
+    def _get_packed_embeddings(self, candidate_ids: List[int]) -> List[dict]:
+        """Get the embeddings of candidates as base64 pgvector binary (see app/db/sql)."""
+        function = transport.PACKED_FUNCTIONS[settings.EMBEDDING_TRANSPORT]
+        result = self.supabase.rpc(function, {'candidate_ids': candidate_ids}).execute()
+        return result.data or []
+
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         try:
@@ -0,0 +1,53 @@
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Optional
+from app.core.config import settings
+
+
+def sha256_file(path: str, chunk_size: Optional[int] = None) -> str:
+    """Hash a file without loading it into memory."""
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CVStorage(ABC):
+    """Where original CV files are kept once they have been uploaded."""
+
+    #: Short backend name, as used in settings.CV_STORAGE_BACKEND
+    name: str = ""
+
+    @property
+    def deferred(self) -> bool:
+        """
+        Whether saving can be postponed until after the candidate is created.
+
+        Slow remote backends opt in so the upload is not on the critical path;
+        the stored file id is then written to the candidate afterwards.
+        """
+        return False
+
+    @abstractmethod
+    def save(self, path: str, filename: str, sha256: str, mimetype: str = 'application/pdf') -> str:
+        """
+        Store a CV file.
+
+        Args:
+            path: Local path of the file to store
+            filename: Original file name supplied by the user
+            sha256: Hex SHA-256 digest of the file content
+            mimetype: MIME type of the file
+
+        Returns:
+            str: Identifier to record as the candidate's cv_file_id
+        """
+
+    def discard(self, file_id: str) -> None:
+        """
+        Remove a file stored for an upload that failed after it was saved.
+
+        Backends whose objects can be shared between candidates keep them.
+        """
@@ -0,0 +1,22 @@
+from functools import lru_cache
+from typing import Optional
+from app.core.config import settings
+from app.services.storage.base import CVStorage
+
+
+@lru_cache(maxsize=None)
+def get_cv_storage(backend: Optional[str] = None) -> CVStorage:
+    """
+    Get the CV storage backend selected by settings.CV_STORAGE_BACKEND.
+
+    Backends are imported lazily so the local backend works without the
+    Google client libraries or credentials.
+    """
+    backend = backend or settings.CV_STORAGE_BACKEND
+    if backend == "local":
+        from app.services.storage.local import LocalCVStorage
+        return LocalCVStorage()
+    if backend == "google_drive":
+        from app.services.storage.google_drive import GoogleDriveCVStorage
+        return GoogleDriveCVStorage()
+    raise ValueError(f"Unknown CV storage backend: {backend}")
@@ -0,0 +1,69 @@
+import logging
+import threading
+from functools import lru_cache
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload
+from app.core.config import settings
+from app.services.storage.base import CVStorage
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/drive']
+
+
+@lru_cache(maxsize=1)
+def _get_credentials() -> service_account.Credentials:
+    """Load the service account credentials once per process."""
+    return service_account.Credentials.from_service_account_file(
+        settings.GOOGLE_DRIVE_CREDENTIALS_FILE, scopes=SCOPES
+    )
+
+
+_local = threading.local()
+
+
+def get_google_drive_service():
+    """
+    Get a Google Drive service using a Service Account.
+
+    The discovery client is built once per thread: its httplib2 transport is
+    not thread-safe, but building it on every upload was far too slow.
+    """
+    service = getattr(_local, 'service', None)
+    if service is None:
+        service = build('drive', 'v3', credentials=_get_credentials(), cache_discovery=False)
+        _local.service = service
+    return service
+
+
+class GoogleDriveCVStorage(CVStorage):
+    """Stores CVs in the configured Google Drive folder."""
+
+    name = "google_drive"
+
+    @property
+    def deferred(self) -> bool:
+        return settings.CV_STORAGE_DEFERRED
+
+    def save(self, path: str, filename: str, sha256: str, mimetype: str = 'application/pdf') -> str:
+        file_metadata = {
+            'name': filename,
+            'parents': [settings.GOOGLE_DRIVE_FOLDER_ID],
+            'appProperties': {'sha256': sha256}
+        }
+        media = MediaFileUpload(
+            path,
+            mimetype=mimetype,
+            chunksize=settings.UPLOAD_CHUNK_SIZE,
+            resumable=True
+        )
+        uploaded_file = get_google_drive_service().files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id'
+        ).execute()
+        return uploaded_file.get('id')
+
+    def discard(self, file_id: str) -> None:
+        get_google_drive_service().files().delete(fileId=file_id).execute()
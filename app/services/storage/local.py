@@ -0,0 +1,78 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
+from app.core.config import settings
+from app.services.storage.base import CVStorage
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCVStorage(CVStorage):
+    """
+    Content-addressed CV storage on the local filesystem.
+
+    Files are stored as <root>/<sha[:2]>/<sha[2:4]>/<sha><ext>, so identical
+    uploads are kept once and no directory grows too large to list.
+    """
+
+    name = "local"
+    ID_PREFIX = "local/"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(settings.UPLOAD_FOLDER, "cvs")
+        os.makedirs(self.root, exist_ok=True)
+        # Uploads and zip members are spooled here and deleted after use, never edited
+        self.spool_dir = os.path.realpath(os.path.join(settings.UPLOAD_FOLDER, "tmp"))
+
+    def _is_spooled(self, path: str) -> bool:
+        return os.path.dirname(os.path.realpath(path)) == self.spool_dir
+
+    def _relative_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(sha256[:2], sha256[2:4], f"{sha256}{ext}")
+
+    def path_for(self, file_id: str) -> str:
+        """Resolve a cv_file_id created by this backend to its file path."""
+        if not file_id.startswith(self.ID_PREFIX):
+            raise ValueError(f"Not a local storage file id: {file_id}")
+        return os.path.join(self.root, file_id[len(self.ID_PREFIX):])
+
+    def discard(self, file_id: str) -> None:
+        # Content-addressed: the object may also back another candidate, and a
+        # retry of the same file reuses it, so it is kept
+        pass
+
+    def save(self, path: str, filename: str, sha256: str, mimetype: str = 'application/pdf') -> str:
+        ext = os.path.splitext(filename or path)[1].lower()
+        relative_path = self._relative_path(sha256, ext)
+        target = os.path.join(self.root, relative_path)
+
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            linked = False
+            if self._is_spooled(path):
+                # Hard link our own spooled temp file: no data is copied, and nothing
+                # else holds the other name. Caller-owned files (e.g. bulk import
+                # sources) are copied, so editing them cannot change the stored object.
+                try:
+                    os.link(path, target)
+                    linked = True
+                except FileExistsError:
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                # Copy to a temp name first so readers never see a partial file
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+                try:
+                    with os.fdopen(fd, 'wb') as dst, open(path, 'rb') as src:
+                        shutil.copyfileobj(src, dst, settings.UPLOAD_CHUNK_SIZE)
+                    os.replace(tmp_path, target)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+        else:
+            logger.info(f"CV {sha256} already stored, skipping write")
+
+        return f"{self.ID_PREFIX}{relative_path.replace(os.sep, '/')}"
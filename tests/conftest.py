@@ -0,0 +1,15 @@
+import os
+import sys
+
+# The app is a namespace package: make it importable when running plain `pytest`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings requires these; tests never reach the services they point to
+for _name in (
+    "DATABASE_URL", "SUPABASE_SERVICE_KEY", "SECRET_KEY",
+    "SUPABASE_DB_HOST", "SUPABASE_DB_NAME", "SUPABASE_DB_USER", "SUPABASE_DB_PASSWORD",
+):
+    os.environ.setdefault(_name, "test")
+# The shared Supabase client is created at import; it does not connect until used
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
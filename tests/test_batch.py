@@ -0,0 +1,182 @@
+import glob
+import os
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("openai")
+
+from app.crud import candidate as candidate_crud
+from app.services.llm import batch
+from app.services.llm import extractor as extractor_module
+
+CV_JANE = (
+    "Jane Doe jane.doe@example.com Paris. "
+    "Backend developer at Acme, Mar 2019 - present, building Python services."
+)
+CV_JOHN = (
+    "John Smith john.smith@example.com Lyon. "
+    "Data engineer at Initech, 2016 - 2019, maintaining ETL pipelines."
+)
+
+CANNED = {
+    "full_name": "Canned Name",
+    "email": "unknown@example.com",
+    "location": "Paris",
+    "skills": ["Python", "SQL"],
+    "work_experience": [{
+        "company": "Acme",
+        "position": "Backend developer",
+        "start_date": "2019-03-01",
+        "end_date": None,
+        "description": "Built Python services."
+    }],
+}
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    # No OpenAI client and no response cache: everything runs offline
+    monkeypatch.setattr(extractor_module, "get_llm_gateway", lambda: None)
+    monkeypatch.setattr(extractor_module, "get_llm_cache", lambda: None)
+    instance = extractor_module.InformationExtractor()
+    monkeypatch.setattr(
+        instance, "generate_embeddings",
+        lambda candidate, cv_text: {"experience_embedding": [0.1, 0.2], "skills_embedding": [0.3, 0.4]}
+    )
+    return instance
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """Candidates written by create_candidates_bulk, stored in memory."""
+    rows = []
+
+    def create_candidates_bulk(items):
+        written = []
+        for candidate_data, _ in items:
+            rows.append(candidate_data)
+            written.append({"id": len(rows), "cv_sha256": candidate_data.cv_sha256})
+        return written
+
+    monkeypatch.setattr(candidate_crud, "create_candidates_bulk", create_candidates_bulk)
+    return rows
+
+
+def replay(directory):
+    processor = batch.LocalBatchProcessor(default=CANNED)
+    for requests_path in sorted(glob.glob(os.path.join(directory, batch.REQUESTS_PATTERN))):
+        processor.process(requests_path, requests_path.replace("requests-", "results-"))
+
+
+def test_replay_then_ingest_creates_each_cv_once(tmp_path, extractor, created):
+    directory = str(tmp_path / "batch")
+    with batch.BatchWriter(directory, extractor) as writer:
+        assert writer.add("jane.pdf", CV_JANE, sha256="a" * 64) > 0
+        assert writer.add("john.pdf", CV_JOHN, sha256="b" * 64) > 0
+        # Same content under another name
+        assert writer.add("copies/jane.pdf", CV_JANE, sha256="a" * 64) == 0
+    assert writer.documents_written == 2
+    assert writer.documents_skipped == 1
+
+    # Preparing the same source again adds nothing
+    with batch.BatchWriter(directory, extractor) as writer:
+        assert writer.known("jane.pdf", "a" * 64)
+        assert writer.add("john.pdf", CV_JOHN, sha256="b" * 64) == 0
+    assert writer.documents_written == 0
+
+    replay(directory)
+    stats = batch.BatchIngestor(directory, extractor, batch_size=1).ingest()
+    assert stats.succeeded == 2
+    assert stats.failed == 0
+    assert sorted(candidate.email for candidate in created) == ["jane.doe@example.com", "john.smith@example.com"]
+    assert sorted(candidate.cv_sha256 for candidate in created) == ["a" * 64, "b" * 64]
+
+    # A second ingest finds everything done
+    stats = batch.BatchIngestor(directory, extractor).ingest()
+    assert stats.succeeded == 0
+    assert stats.skipped == 2
+    assert len(created) == 2
+
+
+def test_ingest_skips_duplicate_documents_within_one_run(tmp_path, extractor, created):
+    directory = str(tmp_path / "batch")
+    with batch.BatchWriter(directory, extractor) as writer:
+        writer.add("jane.pdf", CV_JANE, sha256="a" * 64)
+    # A documents file written before duplicates were skipped at prepare time
+    with open(os.path.join(directory, batch.DOCUMENTS_FILE), encoding="utf-8") as f:
+        line = f.readline()
+    with open(os.path.join(directory, batch.DOCUMENTS_FILE), "a", encoding="utf-8") as f:
+        f.write(line)
+
+    replay(directory)
+    stats = batch.BatchIngestor(directory, extractor, batch_size=10).ingest()
+    assert stats.succeeded == 1
+    assert stats.skipped == 1
+    assert len(created) == 1
+
+
+def test_llm_blocks_keep_other_when_known_sections_are_small(extractor):
+    # Unusual headings left most of the CV under "other"
+    sections = {
+        "skills": "Python",
+        "other": "Backend developer at Acme since 2019, building Python services.",
+    }
+    blocks = extractor._build_llm_blocks("", sections)
+    assert blocks[-1].startswith("OTHER:\n")
+
+    sections["experience"] = "Backend developer at Acme since 2019, building Python services and APIs."
+    sections["other"] = "Chess"
+    assert not any(block.startswith("OTHER:") for block in extractor._build_llm_blocks("", sections))
+
+
+def test_llm_blocks_send_all_sections_without_known_ones(extractor):
+    blocks = extractor._build_llm_blocks(CV_JANE, {"contact": "Jane Doe", "other": "Chess"})
+    assert blocks == ["Jane Doe\n\nChess"]
+
+
+def test_prompt_version_follows_the_year_in_the_prompt(monkeypatch, extractor):
+    class NextYear(extractor_module.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return extractor_module.datetime(2100, 1, 1)
+
+    monkeypatch.setattr(extractor_module, "datetime", NextYear)
+    later = extractor_module.InformationExtractor()
+    assert "2100" in later.system_prompt
+    assert later.prompt_version != extractor.prompt_version
+    assert later.prompt_version.startswith(extractor_module.SYSTEM_PROMPT_VERSION + "-")
+
+
+def test_preprocess_keeps_line_breaks_for_chunking(extractor):
+    text = extractor._preprocess_text("Acme   Corp \r\n  Developer\n\n\n\nInitech\x00 \n")
+    assert text == "Acme Corp\nDeveloper\n\nInitech"
+
+
+def test_plan_strips_contact_when_only_contact_was_found(extractor):
+    # The segmenter found no heading: the whole CV is the contact section
+    plan = extractor.plan_extraction(CV_JANE, {"contact": CV_JANE})
+    assert plan.prefill.email == "jane.doe@example.com"
+    assert "jane.doe@example.com" not in plan.chunks[0]
+    assert "Backend developer at Acme" in plan.chunks[0]
+
+
+def test_plan_keeps_a_head_without_whitespace_whole(extractor):
+    cv_text = "x" * (extractor_module.CONTACT_SCAN_CHARS + 200) + " Backend developer"
+    plan = extractor.plan_extraction(cv_text)
+    assert "".join(plan.chunks).replace(" ", "").replace("\n", "") == cv_text.replace(" ", "")
+
+
+def test_manifest_entry_is_written_before_requests(tmp_path, extractor, monkeypatch):
+    directory = str(tmp_path / "batch")
+
+    def crash():
+        raise OSError("disk full")
+
+    with batch.BatchWriter(directory, extractor) as writer:
+        monkeypatch.setattr(writer, "_request_file", crash)
+        with pytest.raises(OSError):
+            writer.add("jane.pdf", CV_JANE, sha256="a" * 64)
+    # No request can exist without the document it belongs to
+    with batch.BatchWriter(directory, extractor) as writer:
+        assert writer.known("jane.pdf", "a" * 64)
+    assert glob.glob(os.path.join(directory, batch.REQUESTS_PATTERN)) == []
@@ -0,0 +1,47 @@
+from app.services.llm.chunking import count_tokens, pack_chunks, split_to_budget
+
+BUDGET = 40
+
+
+def words(text):
+    return text.split()
+
+
+def test_small_blocks_share_a_chunk_in_order():
+    blocks = ["SKILLS:\nPython, SQL", "EDUCATION:\nMSc, Paris", "PROJECTS:\nSite"]
+    assert pack_chunks(blocks, BUDGET) == ["\n\n".join(blocks)]
+
+
+def test_chunks_stay_within_budget_and_keep_all_text():
+    blocks = [f"Block {i}: " + "word " * (i * 7) for i in range(1, 12)]
+    chunks = pack_chunks(blocks, BUDGET)
+    assert all(count_tokens(chunk) <= BUDGET for chunk in chunks)
+    assert words(" ".join(chunks)) == words(" ".join(blocks))
+
+
+def test_blocks_are_not_split_when_they_fit_alone():
+    first = "EXPERIENCE:\n" + "a" * 100
+    second = "SKILLS:\n" + "b" * 100
+    # Together they are over budget, each alone fits
+    assert pack_chunks([first, second], BUDGET) == [first, second]
+
+
+def test_oversized_section_is_split_on_line_breaks():
+    lines = [f"Line {i} of the experience section." for i in range(12)]
+    chunks = pack_chunks(["\n".join(lines)], BUDGET)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= BUDGET for chunk in chunks)
+    # No line is cut in the middle
+    assert [line for chunk in chunks for line in chunk.split("\n")] == lines
+
+
+def test_paragraphs_are_preferred_over_lines():
+    paragraph = "\n".join(["x" * 40] * 3)
+    pieces = split_to_budget(f"{paragraph}\n\n{paragraph}", 40)
+    assert pieces == [paragraph, paragraph]
+
+
+def test_text_without_boundaries_is_hard_split():
+    pieces = split_to_budget("x" * 1000, BUDGET)
+    assert "".join(pieces) == "x" * 1000
+    assert all(count_tokens(piece) <= BUDGET for piece in pieces)
@@ -0,0 +1,82 @@
+import json
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("supabase")
+
+from app.crud import candidate as candidate_crud
+from app.schemas.candidate import CandidateCreate
+
+
+class FakeSupabase:
+    """Records RPC calls and answers write_candidates with one row per payload element."""
+
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        rows = [{"id": index + 1, **item["candidate"]} for index, item in enumerate(params["payload"])]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows))
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(candidate_crud, "get_supabase", lambda: fake)
+    return fake
+
+
+def make_candidate(email, sha256):
+    return CandidateCreate(
+        full_name="Jane Doe",
+        email=email,
+        skills=["Python", "SQL"],
+        work_experience=[{
+            "company": "Acme",
+            "position": "Developer",
+            "start_date": "2019-03-01T00:00:00",
+            "description": "Built services.",
+        }],
+        projects=[{"name": "Site", "description": "Portfolio", "url": "https://example.com/site"}],
+        cv_sha256=sha256,
+    )
+
+
+def test_create_candidate_writes_everything_in_one_call(supabase):
+    candidate = candidate_crud.create_candidate(
+        make_candidate("jane@example.com", "a" * 64),
+        {"experience_embedding": [0.5, 0.25], "skills_embedding": [1.0]}
+    )
+    assert candidate["id"] == 1
+    ((name, params),) = supabase.calls
+    assert name == "write_candidates"
+    (item,) = params["payload"]
+    # The payload goes out as JSON, so nothing in it may need a custom encoder
+    json.dumps(params)
+    assert item["skills"] == ["Python", "SQL"]
+    assert item["work_experience"][0]["start_date"] == "2019-03-01T00:00:00"
+    assert item["projects"][0]["url"] == "https://example.com/site"
+    assert item["education"] == [] and item["certifications"] == []
+    row = item["candidate"]
+    assert row["cv_sha256"] == "a" * 64
+    assert row["experience_embedding"] == "[0.5,0.25]"
+    assert not set(candidate_crud.RELATED_FIELDS + ["skills"]) & set(row)
+
+
+def test_create_candidates_bulk_is_one_call_in_order(supabase):
+    candidates = candidate_crud.create_candidates_bulk([
+        (make_candidate("a@example.com", "a" * 64), None),
+        (make_candidate("b@example.com", "b" * 64), None),
+    ])
+    assert [c["email"] for c in candidates] == ["a@example.com", "b@example.com"]
+    assert len(supabase.calls) == 1
+
+
+def test_failed_write_is_reported(monkeypatch, supabase):
+    def rpc(name, params):
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=[]))
+    monkeypatch.setattr(supabase, "rpc", rpc)
+    with pytest.raises(Exception, match="Error creating candidates in bulk"):
+        candidate_crud.create_candidates_bulk([(make_candidate("a@example.com", "a" * 64), None)])
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("supabase")
+
+from app.crud import skill as skill_crud
+
+
+class FakeTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def upsert(self, rows, **options):
+        self.db.upserts.append((self.name, rows, options))
+        if self.name == "skills":
+            data = [{"id": self.db.skill_id(row["name"]), "name": row["name"]} for row in rows]
+        else:
+            data = rows
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.upserts = []
+        self.skills = {}
+
+    def skill_id(self, name):
+        return self.skills.setdefault(name, len(self.skills) + 1)
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+    def rows(self, table):
+        return [row for name, rows, _ in self.upserts if name == table for row in rows]
+
+
+@pytest.fixture
+def supabase():
+    skill_crud.clear_skill_cache()
+    yield FakeSupabase()
+    skill_crud.clear_skill_cache()
+
+
+def test_links_record_each_skill_position_per_candidate(supabase):
+    skill_crud.link_skills(
+        [(1, "Python"), (1, "SQL"), (1, "Python"), (2, "SQL"), (1, " "), (1, "Go"), (2, "Rust")],
+        supabase
+    )
+    links = {(row["candidate_id"], row["skill_id"]): row["position"] for row in supabase.rows("candidate_skills")}
+    ids = supabase.skills
+    # A repeated skill keeps its first position; blanks are not linked but still count
+    assert links == {
+        (1, ids["Python"]): 0,
+        (1, ids["SQL"]): 1,
+        (1, ids["Go"]): 4,
+        (2, ids["SQL"]): 0,
+        (2, ids["Rust"]): 1,
+    }
+    ((_, _, options),) = [upsert for upsert in supabase.upserts if upsert[0] == "candidate_skills"]
+    assert options == {"on_conflict": "candidate_id,skill_id", "ignore_duplicates": True}
+
+
+def test_known_skills_are_served_from_the_cache(supabase):
+    skill_crud.link_skills([(1, "Python"), (1, "SQL")], supabase)
+    skill_crud.link_skills([(2, "SQL"), (2, "Go"), (2, "Python")], supabase)
+    skill_upserts = [rows for name, rows, _ in supabase.upserts if name == "skills"]
+    # The second call only creates the skill it has not seen
+    assert skill_upserts == [[{"name": "Python"}, {"name": "SQL"}], [{"name": "Go"}]]
+
+    skill_crud.link_skills([(3, "Go"), (3, "SQL")], supabase)
+    assert len([name for name, _, _ in supabase.upserts if name == "skills"]) == 2
+
+
+def test_clearing_the_cache_looks_skills_up_again(supabase):
+    assert skill_crud.get_skill_ids(["Python", "Python", ""], supabase) == {"Python": 1}
+    skill_crud.clear_skill_cache()
+    assert skill_crud.get_skill_ids(["Python"], supabase) == {"Python": 1}
+    assert len(supabase.rows("skills")) == 2
+
+
+def test_nothing_to_link(supabase):
+    skill_crud.link_skills([], supabase)
+    skill_crud.link_skills([(1, "")], supabase)
+    assert supabase.rows("candidate_skills") == []
@@ -0,0 +1,89 @@
+import io
+import zipfile
+
+from app.services.cv_processor.docx_parser import iter_docx_lines, read_docx_metadata
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+STYLES = f"""<?xml version="1.0" encoding="UTF-8"?>
+<w:styles {NAMESPACES}>
+  <w:style w:type="paragraph" w:styleId="Titre1"><w:name w:val="heading 1"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+</w:styles>"""
+
+
+def paragraph(text, style=None, bold=False, size=None):
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    rpr = ""
+    if bold or size:
+        rpr = "<w:rPr>" + ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size}"/>' if size else "") + "</w:rPr>"
+    return f"<w:p>{ppr}<w:r>{rpr}<w:t>{text}</w:t></w:r></w:p>"
+
+
+def text_box(text):
+    # Word stores a text box twice: DrawingML in the Choice, VML in the Fallback
+    content = f"<w:txbxContent>{paragraph(text)}</w:txbxContent>"
+    return (
+        "<w:p><w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\">{content}</mc:Choice>"
+        f"<mc:Fallback>{content}</mc:Fallback>"
+        "</mc:AlternateContent></w:r><w:r><w:t>Anchor</w:t></w:r></w:p>"
+    )
+
+
+def table(*rows):
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>"
+        for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def make_docx(body, core=None) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f'<?xml version="1.0" encoding="UTF-8"?><w:document {NAMESPACES}><w:body>{body}</w:body></w:document>'
+        )
+        archive.writestr("word/styles.xml", STYLES)
+        if core:
+            archive.writestr("docProps/core.xml", core)
+    return buffer.getvalue()
+
+
+def test_lines_from_paragraphs_tables_and_text_boxes_in_order():
+    docx = make_docx(
+        paragraph("Jane Doe", bold=True, size=32)
+        + text_box("jane@example.com")
+        + paragraph("Expérience", style="Titre1")
+        + table(("2019 - present", "Developer at Acme"), ("2016 - 2019", "Intern at Initech"))
+        + paragraph("Python, SQL")
+    )
+    lines = list(iter_docx_lines(io.BytesIO(docx)))
+    assert [line.text for line in lines] == [
+        "Jane Doe",
+        # The text box comes out once, before the paragraph anchoring it
+        "jane@example.com",
+        "Anchor",
+        "Expérience",
+        "2019 - present", "Developer at Acme",
+        "2016 - 2019", "Intern at Initech",
+        "Python, SQL",
+    ]
+    assert lines[0].bold and lines[0].size == 16.0
+    # Word localizes style IDs; the style is matched on its name
+    assert lines[3].heading_style
+    assert not any(line.heading_style for line in lines[4:])
+
+
+def test_metadata_uses_pdf_keys():
+    core = (
+        '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title> CV </dc:title><dc:creator>Jane</dc:creator>'
+        "</cp:coreProperties>"
+    )
+    assert read_docx_metadata(make_docx(paragraph("x"), core)) == {"title": "CV", "author": "Jane"}
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("tenacity")
+
+from app.services.llm.gateway import BULK, INTERACTIVE, AdaptiveLimiter
+
+
+async def start_waiting(limiter, level=INTERACTIVE):
+    task = asyncio.ensure_future(limiter.acquire(level))
+    # Let it reach the queue
+    await asyncio.sleep(0)
+    return task
+
+
+def test_cancelled_waiter_popped_by_wake_does_not_raise():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire(INTERACTIVE)
+        task = await start_waiting(limiter)
+        task.cancel()
+        # _wake pops the cancelled waiter before the task handles its cancellation
+        limiter.release()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.in_flight == 0
+        assert not any(limiter._waiters.values())
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_after_being_woken_gives_its_slot_back():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire(INTERACTIVE)
+        task = await start_waiting(limiter)
+        second = await start_waiting(limiter, BULK)
+        # The slot goes to the first waiter, which is cancelled before it resumes
+        limiter.release()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The slot it gave back went to the next waiter
+        await second
+        assert limiter.in_flight == 1
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_interactive_waiters_go_first_but_bulk_gets_its_share():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=1, bulk_share=2)
+        await limiter.acquire(INTERACTIVE)
+        order = []
+
+        async def call(name, level):
+            await limiter.acquire(level)
+            order.append(name)
+            limiter.release()
+
+        tasks = [asyncio.ensure_future(call(f"bulk{i}", BULK)) for i in range(2)]
+        tasks += [asyncio.ensure_future(call(f"interactive{i}", INTERACTIVE)) for i in range(3)]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert order == ["interactive0", "bulk0", "interactive1", "bulk1", "interactive2"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+import pytest
+
+from app.services.llm.merge import merge_results
+
+
+def test_duplicate_experiences_with_case_and_spacing_variants_merge():
+    first = {"work_experience": [
+        {"company": "Acme Corp", "position": "Backend Developer", "start_date": "2019-03-01",
+         "description": "Built services", "achievements": ["Cut latency"]},
+    ]}
+    second = {"work_experience": [
+        {"company": "ACME  corp.", "position": "backend developer", "start_date": "2019-03-15",
+         "description": "Built services and APIs for billing", "achievements": ["cut latency", "Led migration"],
+         "location": "Paris"},
+    ]}
+    (entry,) = merge_results([first, second])["work_experience"]
+    # The first spelling wins, the fuller description and the missing fields are taken
+    assert entry["company"] == "Acme Corp"
+    assert entry["description"] == "Built services and APIs for billing"
+    assert entry["achievements"] == ["Cut latency", "Led migration"]
+    assert entry["location"] == "Paris"
+
+
+def test_different_start_months_are_different_jobs():
+    results = [
+        {"work_experience": [{"company": "Acme", "position": "Dev", "start_date": "2019-03-01"}]},
+        {"work_experience": [{"company": "Acme", "position": "Dev", "start_date": "2021-06-01"}]},
+    ]
+    assert len(merge_results(results)["work_experience"]) == 2
+
+
+def test_skills_deduplicate_on_case_and_whitespace_only():
+    results = [
+        {"skills": ["Python", " machine  learning", "C"]},
+        {"skills": ["python", "Machine Learning", "C#", "C++", "c", ""]},
+    ]
+    assert merge_results(results)["skills"] == ["Python", "machine  learning", "C", "C#", "C++"]
+
+
+def test_order_is_first_seen_across_chunks():
+    results = [
+        {"full_name": "", "education": [{"institution": "B School", "degree": "MSc"}],
+         "projects": [{"name": "Beta"}]},
+        {"full_name": "Jane Doe", "education": [{"institution": "A College", "degree": "BSc"},
+                                                {"institution": "b school", "degree": "msc"}],
+         "projects": [{"name": "Alpha"}, {"name": "beta!"}]},
+        {"full_name": "Other Name"},
+    ]
+    combined = merge_results(results)
+    assert combined["full_name"] == "Jane Doe"
+    assert [e["institution"] for e in combined["education"]] == ["B School", "A College"]
+    assert [p["name"] for p in combined["projects"]] == ["Beta", "Alpha"]
+    assert combined["certifications"] == []
+
+
+def test_inputs_are_not_modified():
+    experience = {"company": "Acme", "position": "Dev", "start_date": "2019", "achievements": ["a"]}
+    merge_results([{"work_experience": [experience]}, {"work_experience": [dict(experience, achievements=["b"])]}])
+    assert experience["achievements"] == ["a"]
+
+
+def test_no_results():
+    with pytest.raises(ValueError):
+        merge_results([])
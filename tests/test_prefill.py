@@ -0,0 +1,39 @@
+from app.services.llm.prefill import Prefill, extract_contact, parse_date, rewrite_dates, strip_contact
+
+
+def test_rewrite_dates_month_year_range():
+    assert rewrite_dates("Developer, Mar 2019 – present") == "Developer, 2019-03-01 to present"
+    assert rewrite_dates("03/2018 - 12/2020") == "2018-03-01 to 2020-12-01"
+
+
+def test_rewrite_dates_ignores_month_names_inside_words():
+    # "mar" in Omar, "dec" in Decathlon, "may" in Maya must not be read as months
+    assert rewrite_dates("Omar 2019 - 2021") == "Omar 2019-01-01 to 2021-01-01"
+    assert rewrite_dates("Decathlon 2017 - 2018") == "Decathlon 2017-01-01 to 2018-01-01"
+    assert rewrite_dates("Maya 2020 to present") == "Maya 2020-01-01 to present"
+
+
+def test_parse_date():
+    assert parse_date("Sept 2021") == "2021-09-01"
+    assert parse_date("juillet 2015") == "2015-07-01"
+    assert parse_date("no year") is None
+
+
+def test_extract_contact_skips_date_ranges():
+    prefill = extract_contact("jane.doe@example.com 2019 - 2021 +33 6 12 34 56 78")
+    assert prefill.email == "jane.doe@example.com"
+    assert prefill.phone == "+33612345678"
+
+
+def test_strip_contact_keeps_other_numbers():
+    prefill = Prefill(email="jane@example.com", phone="+33612345678")
+    text = strip_contact("jane@example.com +33 6 12 34 56 78 ref: 0123456789", prefill)
+    assert "jane@example.com" not in text
+    assert "0123456789" in text
+
+
+def test_rewrite_dates_present_word_must_end_a_word():
+    # "now" in nowhere and "current" in currently are not the end of a range
+    assert rewrite_dates("2019 - nowhere") == "2019 - nowhere"
+    assert rewrite_dates("2019 - currently at Acme") == "2019 - currently at Acme"
+    assert rewrite_dates("2019 - now, Acme") == "2019-01-01 to present, Acme"
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("supabase")
+pytest.importorskip("numpy")
+pytest.importorskip("openai")
+
+from app.services import search_service as search_module
+from app.services.llm.extractor import InformationExtractor
+from app.services.search_service import SearchService
+
+CANDIDATES = [
+    {"id": 1, "full_name": "Jane", "email": "jane@example.com", "created_at": "2024-01-01T00:00:00",
+     "skills": [{"name": "Cooking"}], "work_experience": [
+         {"company": "Bistro", "position": "Chef", "start_date": "2019-01-01T00:00:00", "description": "Cooking"}]},
+    {"id": 2, "full_name": "John", "email": "john@example.com", "created_at": "2024-01-01T00:00:00",
+     "skills": [{"name": "Python"}], "work_experience": [
+         {"company": "Acme", "position": "Developer", "start_date": "2019-01-01T00:00:00", "description": "Python"}]},
+]
+
+
+class FakeQuery:
+    def __init__(self, table, calls):
+        self.table = table
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((self.table, name, args))
+            return self
+        return method
+
+    def execute(self):
+        return SimpleNamespace(data=CANDIDATES)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(name, self.calls)
+
+    def rpc(self, *args):
+        raise AssertionError("Stored vectors must not be read in degraded mode")
+
+
+class KeywordProvider:
+    """Embeds texts as counts of a few words, so rankings are predictable."""
+    model_id = "keywords"
+    words = ("python", "cooking", "developer", "chef")
+
+    def embed(self, texts):
+        return [[float(text.lower().count(word)) for word in self.words] for text in texts]
+
+
+@pytest.fixture
+def degraded(monkeypatch):
+    def unavailable(query):
+        raise RuntimeError("OpenAI is down")
+
+    monkeypatch.setattr(search_module, "generate_query_embeddings", unavailable)
+    monkeypatch.setattr(search_module, "get_fallback_embedding_provider", lambda: KeywordProvider())
+    monkeypatch.setattr(
+        search_module, "get_information_extractor", lambda: InformationExtractor.__new__(InformationExtractor)
+    )
+
+
+def test_degraded_search_ranks_with_the_fallback_model_only(degraded):
+    supabase = FakeSupabase()
+    service = SearchService(supabase)
+    results = service.semantic_search("python developer")
+    assert service.degraded
+    assert [candidate.id for candidate in results] == [2, 1]
+    # Only ids are selected: the stored vectors belong to another model
+    assert ("candidates", "select", ("id",)) in supabase.calls
+
+
+def test_search_fails_without_a_fallback(monkeypatch, degraded):
+    monkeypatch.setattr(search_module, "get_fallback_embedding_provider", lambda: None)
+    with pytest.raises(RuntimeError):
+        SearchService(FakeSupabase()).semantic_search("python")
@@ -0,0 +1,59 @@
+from app.services.cv_processor.sections import TextLine, classify_heading, segment_sections
+
+
+def lines(*texts, size=10.0):
+    return [TextLine(text, size=size) for text in texts]
+
+
+def test_text_before_the_first_heading_is_contact():
+    sections = segment_sections(lines(
+        "Jane Doe", "jane@example.com",
+        "Experience", "Developer at Acme",
+        "SKILLS:", "Python, SQL",
+    ))
+    assert sections == {
+        "contact": "Jane Doe\njane@example.com",
+        "experience": "Developer at Acme",
+        "skills": "Python, SQL",
+    }
+
+
+def test_headings_in_other_languages_and_with_decoration():
+    sections = segment_sections(lines(
+        "— Expériences professionnelles —", "Développeur chez Acme",
+        "# Học vấn", "Đại học Bách Khoa",
+    ))
+    assert sections["experience"] == "Développeur chez Acme"
+    assert sections["education"] == "Đại học Bách Khoa"
+
+
+def test_keyword_inside_a_longer_line_is_not_a_heading():
+    sections = segment_sections(lines("Experience", "Engineer at FPT Technologies", "Skills used daily"))
+    assert set(sections) == {"experience"}
+    assert sections["experience"] == "Engineer at FPT Technologies\nSkills used daily"
+
+
+def test_joined_headings_need_emphasis():
+    assert classify_heading(TextLine("Skills & Languages", bold=True), 10.0) == "skills"
+    assert classify_heading(TextLine("Skills & Languages", size=14.0), 10.0) == "skills"
+    assert classify_heading(TextLine("Skills & Languages", size=10.0), 10.0) is None
+
+
+def test_unknown_headings_stay_in_the_current_section():
+    sections = segment_sections([
+        TextLine("Experience", size=14.0),
+        TextLine("Developer at Acme", size=10.0),
+        TextLine("Achievements", size=14.0, bold=True),
+        TextLine("Cut costs by half", size=10.0),
+        TextLine("Hobbies", size=14.0),
+        TextLine("Chess", size=10.0),
+    ])
+    assert sections["experience"] == "Developer at Acme\nAchievements\nCut costs by half"
+    assert sections["other"] == "Chess"
+
+
+def test_empty_sections_are_left_out():
+    assert segment_sections(lines("Jane Doe", "Education", "Skills", "Python")) == {
+        "contact": "Jane Doe",
+        "skills": "Python",
+    }
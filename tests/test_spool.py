@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("multipart")
+
+from app.core.config import settings
+from app.services.cv_processor import spool as spool_module
+from app.services.cv_processor.spool import UploadRejected, UploadTooLarge, spool_request
+
+BOUNDARY = "spooltestboundary"
+
+
+class FakeRequest:
+    """Just enough of a Starlette request for spool_request."""
+
+    def __init__(self, body: bytes, chunk_size: int = 7, content_length: bool = True):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+        if content_length:
+            self.headers["content-length"] = str(len(body))
+        self.received = 0
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[start:start + self.chunk_size]
+            self.received += len(chunk)
+            yield chunk
+        yield b""
+
+
+def multipart(*parts) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def reject_docx(filename):
+    if filename.endswith(".docx"):
+        raise UploadRejected("no docx")
+
+
+@pytest.fixture(autouse=True)
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+def spooled_files(upload_folder):
+    return os.listdir(os.path.join(upload_folder, "tmp"))
+
+
+def test_spools_each_file_once_with_its_hash(upload_folder):
+    content = b"%PDF-1.4 " + bytes(range(256)) * 10
+    request = FakeRequest(multipart(("note", None, b"ignored"), ("file", "cv.PDF", content)))
+    result = asyncio.run(spool_request(request, "file"))
+    (spool,) = result.files
+    assert spool.filename == "cv.PDF"
+    assert spool.path.endswith(".pdf")
+    assert spool.size == len(content)
+    assert spool.sha256 == hashlib.sha256(content).hexdigest()
+    with open(spool.path, "rb") as f:
+        assert f.read() == content
+    result.cleanup()
+    assert spooled_files(upload_folder) == []
+
+
+def test_rejects_on_content_length_before_reading(upload_folder):
+    request = FakeRequest(multipart(("file", "cv.pdf", b"x" * (spool_module.MULTIPART_OVERHEAD + 2000))))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_request(request, "file", max_size=1000))
+    assert request.received == 0
+
+
+def test_stops_reading_once_a_file_is_too_large(upload_folder):
+    request = FakeRequest(multipart(("file", "cv.pdf", b"x" * 5000)), content_length=False)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_request(request, "file", max_size=1000))
+    assert request.received < len(request.body)
+    assert spooled_files(upload_folder) == []
+
+
+def test_keep_going_reports_refused_files(upload_folder):
+    request = FakeRequest(multipart(
+        ("files", "a.pdf", b"a" * 10),
+        ("files", "big.pdf", b"b" * 500),
+        ("files", "c.docx", b"c" * 10),
+        ("files", "d.pdf", b"d" * 10),
+    ))
+    result = asyncio.run(spool_request(
+        request, "files", max_files=4, max_size=100, check=reject_docx, keep_going=True
+    ))
+    assert [spool.filename for spool in result.files] == ["a.pdf", "d.pdf"]
+    assert [filename for filename, _ in result.rejected] == ["big.pdf", "c.docx"]
+    assert sorted(spooled_files(upload_folder)) == sorted(os.path.basename(s.path) for s in result.files)
+    result.cleanup()
+
+
+def test_too_many_files_discards_what_was_spooled(upload_folder):
+    request = FakeRequest(multipart(("files", "a.pdf", b"a"), ("files", "b.pdf", b"b")))
+    with pytest.raises(UploadRejected):
+        asyncio.run(spool_request(request, "files", max_files=1))
+    assert spooled_files(upload_folder) == []
+
+
+def test_truncated_body_is_rejected(upload_folder):
+    body = multipart(("file", "cv.pdf", b"x" * 100))
+    # Cut inside the file content, before the closing boundary
+    request = FakeRequest(body[:-40], content_length=False)
+    with pytest.raises(UploadRejected):
+        asyncio.run(spool_request(request, "file"))
+    assert spooled_files(upload_folder) == []
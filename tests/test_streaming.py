@@ -0,0 +1,77 @@
+import json
+
+from app.services.llm.streaming import IncrementalJSONParser, JSONEvent
+
+CANDIDATE = {
+    "full_name": "Zoë \"Zed\" Đặng",
+    "email": "zoe@example.com",
+    "years": 7,
+    "remote": True,
+    "phone": None,
+    "skills": ["C++", "naïve \\ bayes", "😀 emoji"],
+    "work_experience": [
+        {"company": "Acme {Inc}", "position": "Dev, [senior]", "tags": ["a", {"b": [1, 2]}]},
+        {"company": "Initech", "position": "Intern", "end_date": None},
+    ],
+    "location": "Hà Nội",
+}
+
+
+def feed_all(fragments):
+    parser = IncrementalJSONParser()
+    events = []
+    for fragment in fragments:
+        events.extend(parser.feed(fragment))
+    return parser, events
+
+
+def expected_events(data):
+    events = []
+    for key, value in data.items():
+        if isinstance(value, list):
+            events.extend(JSONEvent(key, item, item=True) for item in value)
+        events.append(JSONEvent(key, value))
+    return events
+
+
+def test_events_are_the_same_however_the_output_is_split():
+    text = json.dumps(CANDIDATE, ensure_ascii=False, indent=1)
+    whole_parser, whole = feed_all([text])
+    assert whole == expected_events(CANDIDATE)
+    assert whole_parser.done
+    for size in (1, 2, 3, 7):
+        parser, events = feed_all(text[i:i + size] for i in range(0, len(text), size))
+        assert events == whole
+        assert parser.done
+
+
+def test_escapes_split_across_fragments():
+    # The backslash and the quote it escapes arrive in different fragments
+    parser, events = feed_all(['{"name": "say \\', '"hi\\', '" \\u00', 'e9\\', 'n"}'])
+    assert events == [JSONEvent("name", 'say "hi" é\n')]
+    assert parser.done
+
+
+def test_ascii_escaped_unicode():
+    text = json.dumps({"location": "Hà Nội 😀", "skills": ["naïve"]})
+    assert "\\u" in text
+    _, events = feed_all(text[i:i + 5] for i in range(0, len(text), 5))
+    assert events == [
+        JSONEvent("location", "Hà Nội 😀"),
+        JSONEvent("skills", "naïve", item=True),
+        JSONEvent("skills", ["naïve"]),
+    ]
+
+
+def test_fields_are_reported_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"full_name": "Jane", "years": 1') == [JSONEvent("full_name", "Jane")]
+    # A number is only complete at the next delimiter
+    assert parser.feed("2") == []
+    assert parser.feed(', "skills": ["Python"') == [
+        JSONEvent("years", 12), JSONEvent("skills", "Python", item=True)
+    ]
+    assert not parser.done
+    assert parser.feed("]}") == [JSONEvent("skills", ["Python"])]
+    assert parser.done
+    assert parser.text == '{"full_name": "Jane", "years": 12, "skills": ["Python"]}'
@@ -0,0 +1,53 @@
+import base64
+import numpy as np
+import pytest
+
+from app.services.embeddings import transport
+
+
+def packed(vector, half=False):
+    """Base64 of pgvector's vector_send/halfvec_send output for a vector."""
+    header = len(vector).to_bytes(2, "big") + b"\0\0"
+    return base64.b64encode(header + np.asarray(vector, dtype=">f2" if half else ">f4").tobytes()).decode()
+
+
+def test_decode_float32_rows():
+    rows = [[0.1, -2.5, 3.0], [1e-8, 0.0, 123456.789]]
+    matrix, present = transport.decode_packed([packed(row) for row in rows])
+    assert matrix.dtype == np.float32
+    assert present.tolist() == [True, True]
+    np.testing.assert_array_equal(matrix, np.asarray(rows, dtype=np.float32))
+
+
+def test_decode_float16_rows():
+    rows = [[0.5, -1.25], [2.0, 1000.0]]
+    matrix, present = transport.decode_packed([packed(row, half=True) for row in rows], half=True)
+    assert matrix.dtype == np.float32
+    np.testing.assert_array_equal(matrix, np.asarray(rows, dtype=np.float32))
+
+
+def test_missing_and_malformed_rows_are_zero_and_absent():
+    values = [None, packed([1.0, 2.0]), "", packed([1.0, 2.0, 3.0]), packed([3.0, 4.0])]
+    matrix, present = transport.decode_packed(values)
+    assert present.tolist() == [False, True, False, False, True]
+    np.testing.assert_array_equal(matrix, [[0, 0], [1, 2], [0, 0], [0, 0], [3, 4]])
+
+
+def test_no_vectors_at_all():
+    matrix, present = transport.decode_packed([None, None])
+    assert matrix.shape == (2, 0)
+    assert not present.any()
+
+
+def test_out_is_filled_in_place():
+    out = np.full((2, 2), 9.0, dtype=np.float32)
+    matrix, present = transport.decode_packed([packed([1.0, 2.0]), None], out=out)
+    assert matrix is out
+    np.testing.assert_array_equal(out, [[1, 2], [0, 0]])
+
+
+@pytest.mark.parametrize("vector", [[0.1, 0.2, 0.3], [1 / 3, -2 / 7]])
+def test_vector_literal_keeps_float32_precision(vector):
+    literal = transport.vector_literal(vector)
+    parsed = np.asarray([float(value) for value in literal.strip("[]").split(",")], dtype=np.float32)
+    np.testing.assert_array_equal(parsed, np.asarray(vector, dtype=np.float32))